@@ -1,49 +1,150 @@
 from django.contrib import admin
-from .models import Category, Priority, Task, SubTask, Note
+from django.forms.models import BaseInlineFormSet
+from .models import Category, Priority, Task, SubTask, Note, ArchivedTask
+from .pagination import EstimatedCountPaginator
+from . import search
 
-class SubTaskInline(admin.TabularInline):
+# Large-data mode: every admin below joins its FK columns into the change list
+# query, counts from the dashboard counters instead of COUNT(*), searches the
+# full-text index, and uses autocomplete widgets instead of <select>s listing
+# every row. Task inlines show one page of children at a time.
+class LargeDataAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.search(queryset, search_term), False
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    # Set per request by PaginatedInlineMixin.get_formset
+    page = 1
+    per_page = 20
+    page_param = 'page'
+    query = None
+    count_field = None  # counter on the parent kept by Application/progress.py
+
+    def get_queryset(self):
+        if not hasattr(self, '_page_queryset'):
+            qs = super().get_queryset()
+            if self.count_field and self.instance.pk is not None:
+                self.total = getattr(self.instance, self.count_field)
+            else:
+                self.total = qs.count()
+            start = (self.page - 1) * self.per_page
+            self._page_queryset = qs[start:start + self.per_page]
+        return self._page_queryset
+
+    def page_url(self, page):
+        query = self.query.copy()
+        query[self.page_param] = page
+        return '?' + query.urlencode()
+
+    def previous_url(self):
+        return self.page_url(self.page - 1) if self.page > 1 else None
+
+    def next_url(self):
+        self.get_queryset()
+        return self.page_url(self.page + 1) if self.page * self.per_page < self.total else None
+
+
+class PaginatedInlineMixin:
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/paginated.html'
+    per_page = 20
+    ordering = ('-created_at', '-pk')
+    count_field = None
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        page_param = f'{self.model._meta.model_name}_page'
+        try:
+            page = max(1, int(request.GET.get(page_param, 1)))
+        except ValueError:
+            page = 1
+        return type(formset.__name__, (formset,), {
+            'page': page,
+            'per_page': self.per_page,
+            'page_param': page_param,
+            'query': request.GET.copy(),
+            'count_field': self.count_field,
+        })
+
+class SubTaskInline(PaginatedInlineMixin, admin.TabularInline):
         model = SubTask
+        count_field = 'subtask_count'
         extra = 1
         fields = ("title", "status")
         show_change_link = True
-class NoteInline(admin.StackedInline):
+        base_template = "admin/edit_inline/tabular.html"
+class NoteInline(PaginatedInlineMixin, admin.StackedInline):
         model = Note
+        count_field = 'note_count'
         extra = 1
         fields = ("content", "created_at")
         readonly_fields = ("created_at",)
+        base_template = "admin/edit_inline/stacked.html"
 
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
-    list_display = ('title', 'status', 'deadline', 'priority', 'category')
+class TaskAdmin(LargeDataAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'status', 'deadline', 'priority', 'category', 'progress')
     list_filter = ('status', 'priority', 'category')
+    readonly_fields = ('subtask_count', 'subtasks_done', 'note_count', 'progress')
+    list_select_related = ('priority', 'category')
     search_fields = ('title', 'description')
+    autocomplete_fields = ('priority', 'category')
     inlines = [SubTaskInline, NoteInline]
 
 
 @admin.register(SubTask)
-class SubTaskAdmin(admin.ModelAdmin):
+class SubTaskAdmin(LargeDataAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'status', 'parent_task_name')
     list_filter = ('status',)
+    list_select_related = ('task',)
     search_fields = ('title',)
+    autocomplete_fields = ('task',)
 
     @admin.display(description='Parent Task')
     def parent_task_name(self, obj):
         return obj.task.title
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(LargeDataAdminMixin, admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
 @admin.register(Priority)
-class PriorityAdmin(admin.ModelAdmin):
+class PriorityAdmin(LargeDataAdminMixin, admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
 
 
 @admin.register(Note)
-class NoteAdmin(admin.ModelAdmin):
-    list_display = ('task', 'content', 'created_at')
+class NoteAdmin(LargeDataAdminMixin, admin.ModelAdmin):
+    list_display = ('task', 'preview', 'created_at')
     list_filter = ('created_at',)
-    search_fields = ('content',)
\ No newline at end of file
+    list_select_related = ('task',)
+    search_fields = ('content',)
+    autocomplete_fields = ('task',)
+
+    def get_queryset(self, request):
+        # The changelist shows the preview; the change form loads the body itself
+        return super().get_queryset(request).defer('content')
+
+
+# Archived tasks are moved here by Application/archiving.py and never edited
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(LargeDataAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'status', 'priority', 'category', 'updated_at', 'archived_at')
+    list_filter = ('priority', 'category')
+    list_select_related = ('priority', 'category')
+    search_fields = ('title', 'description')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,222 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core import signing
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.forms import model_to_dict, modelform_factory
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.generic import View
+
+from Application import counters, progress, rollups, sync, versions
+from Application.models import Category, Priority, Task, SubTask, Note, parse_status
+
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class BatchView(LoginRequiredMixin, View):
+    """Create and update many rows in one request.
+
+    The body is a JSON array of objects. Items with an "id" update that row
+    (missing fields keep their current values); items without one are created.
+    The whole batch is validated first and nothing is written if any item is
+    invalid; otherwise it's written with bulk_create/bulk_update in a single
+    transaction. Foreign keys are given as ids and checked with one query per
+    related model, not one per item.
+    """
+    raise_exception = True
+    model = None
+    fields = []
+    foreign_keys = {}  # field name -> related model
+    also_changes = ()  # other models whose rows the batch writes to (progress counts)
+    derived_fields = []  # columns save() would compute from the others; set in prepare()
+
+    def post(self, request, *args, **kwargs):
+        try:
+            items = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'Body must be JSON.'}, status=400)
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return JsonResponse({'error': 'Body must be a JSON array of objects.'}, status=400)
+        limit = getattr(settings, 'API_BATCH_LIMIT', 5000)
+        if len(items) > limit:
+            return JsonResponse({'error': f'At most {limit} items per batch.'}, status=400)
+
+        objects, errors = self.validate(items)
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+
+        created = [obj for obj in objects if obj.pk is None]
+        updated = [obj for obj in objects if obj.pk is not None]
+        now = timezone.now()
+        for obj in updated:
+            obj.updated_at = now
+        for obj in objects:
+            self.prepare(obj)
+        with transaction.atomic():
+            self.model.objects.bulk_create(created, batch_size=500)
+            self.model.objects.bulk_update(updated, self.fields + self.derived_fields + ['updated_at'], batch_size=500)
+            # Bulk writes skip signals, so keep the counters, version stamps and feed in step here
+            counters.track_created(self.model, created)
+            progress.track_bulk(self.model, created, updated)
+            rollups.track_bulk(self.model, created, updated)
+            versions.bump(self.model, *self.also_changes)
+            sync.record(self.model, [obj.pk for obj in objects])
+
+        results = [
+            {'index': i, 'id': obj.pk, 'status': 'updated' if item.get('id') else 'created'}
+            for i, (item, obj) in enumerate(zip(items, objects))
+        ]
+        return JsonResponse({'created': len(created), 'updated': len(updated), 'results': results})
+
+    def prepare(self, obj):
+        """Fill in derived_fields, which bulk writes don't get from save()."""
+
+    def validate(self, items):
+        form_class = modelform_factory(
+            self.model, fields=[f for f in self.fields if f not in self.foreign_keys]
+        )
+        # Ids and foreign keys have to be integers before they're looked up
+        malformed = [
+            {
+                name: [{'message': 'Must be an integer id.', 'code': 'invalid'}]
+                for name in ['id', *self.foreign_keys]
+                if item.get(name) is not None and not is_id(item[name])
+            }
+            for item in items
+        ]
+        existing = self.model.objects.in_bulk([
+            item['id'] for item, bad in zip(items, malformed) if not bad and item.get('id')
+        ])
+        known_ids = {
+            name: set(related.objects.filter(
+                pk__in=[item[name] for item in items if is_id(item.get(name))]
+            ).values_list('pk', flat=True))
+            for name, related in self.foreign_keys.items()
+        }
+
+        # Missing fields on new items fall back to the model defaults (e.g. status)
+        defaults = {
+            name: field.get_default()
+            for name, field in ((f, self.model._meta.get_field(f)) for f in self.fields)
+            if field.has_default()
+        }
+
+        objects, errors = [], []
+        seen = set()
+        for i, item in enumerate(items):
+            if not malformed[i] and item.get('id') in seen:
+                # Each copy would be counted as its own change (progress, counters, rollups)
+                malformed[i] = {'id': ['Listed more than once in this batch.']}
+            if malformed[i]:
+                errors.append({'index': i, 'errors': malformed[i]})
+                objects.append(None)
+                continue
+            if item.get('id'):
+                seen.add(item['id'])
+            item_errors = {}
+            instance = None
+            data = {**defaults, **item}
+            if item.get('id'):
+                instance = existing.get(item['id'])
+                if instance is None:
+                    errors.append({'index': i, 'errors': {'id': ['No such object.']}})
+                    objects.append(None)
+                    continue
+                data = {**model_to_dict(instance, fields=self.fields), **item}
+            if 'status' in data:
+                # Statuses are given as labels ("In Progress"); codes are accepted too
+                data['status'] = parse_status(data['status'])
+
+            form = form_class(data=data, instance=instance)
+            if not form.is_valid():
+                item_errors.update(form.errors.get_json_data())
+            for name in self.foreign_keys:
+                # As forms.CurrentChoicesMixin: a row keeps its current parent even
+                # while that parent waits for a background delete (VisibleManager)
+                current = getattr(instance, f'{name}_id', None)
+                if data.get(name) not in known_ids[name] and (current is None or data.get(name) != current):
+                    item_errors[name] = [{'message': 'Select a valid choice.', 'code': 'invalid_choice'}]
+
+            if item_errors:
+                errors.append({'index': i, 'errors': item_errors})
+                objects.append(None)
+                continue
+            obj = form.save(commit=False)
+            for name in self.foreign_keys:
+                setattr(obj, f'{name}_id', data[name])
+            objects.append(obj)
+        return objects, errors
+
+
+class TaskBatchView(BatchView):
+    model = Task
+    fields = ['title', 'description', 'status', 'deadline', 'priority', 'category']
+    foreign_keys = {'priority': Priority, 'category': Category}
+
+
+class SubTaskBatchView(BatchView):
+    also_changes = (Task,)
+    model = SubTask
+    fields = ['task', 'title', 'status']
+    foreign_keys = {'task': Task}
+
+
+class NoteBatchView(BatchView):
+    also_changes = (Task,)
+    model = Note
+    fields = ['task', 'content']
+    foreign_keys = {'task': Task}
+    derived_fields = ['preview', 'preview_truncated']
+
+    def prepare(self, obj):
+        obj.set_preview()
+
+
+class TaskLookupView(View):
+    """Task typeahead for the SubTask and Note forms (see TaskLookupWidget).
+
+    Matches a case-insensitive title prefix as a range scan over
+    task_title_lower_idx, ordered by (lower(title), id), ``per_page`` rows at
+    a time. ``next`` is the URL of the following page, or null.
+    """
+    per_page = 20
+    salt = 'Application.api.task-lookup'
+
+    def get(self, request, *args, **kwargs):
+        prefix = request.GET.get('q', '').strip().lower()
+        qs = Task.objects.annotate(title_lower=Lower('title'))
+        if prefix:
+            qs = qs.filter(title_lower__gte=prefix, title_lower__lt=prefix + '\U0010ffff')
+        after = self.decode(request.GET.get('cursor'))
+        if after:
+            title, pk = after
+            qs = qs.filter(Q(title_lower__gt=title) | Q(title_lower=title, pk__gt=pk))
+        rows = list(
+            qs.order_by('title_lower', 'pk').values_list('pk', 'title', 'title_lower')[:self.per_page + 1]
+        )
+
+        next_url = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            query = request.GET.copy()
+            query['cursor'] = signing.dumps([rows[-1][2], rows[-1][0]], salt=self.salt)
+            next_url = f"{reverse('task-lookup')}?{query.urlencode()}"
+        return JsonResponse({
+            'results': [{'id': pk, 'text': title} for pk, title, _ in rows],
+            'next': next_url,
+        })
+
+    def decode(self, cursor):
+        if not cursor:
+            return None
+        try:
+            return signing.loads(cursor, salt=self.salt)
+        except signing.BadSignature:
+            return None
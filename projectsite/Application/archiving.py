@@ -0,0 +1,87 @@
+"""Hot/cold split: completed tasks move out of the working tables.
+
+``archive_completed`` moves Completed tasks that haven't changed for
+ARCHIVE_AFTER_DAYS, with their subtasks and notes, into the Archived* tables,
+one transaction per chunk of tasks, so the list views, dashboard counters and
+changes feed only deal with the active set. ArchiveListView searches what
+was moved.
+
+The working rows are removed with a single DELETE per table rather than
+QuerySet.delete(), which would send post_delete for every row; the
+bookkeeping those receivers do (counters, version stamps, the changes feed's
+log) is done here in bulk instead. Task progress counts need no
+adjusting as a task always leaves with all of its children.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from Application import counters, progress, sync, versions
+from Application.models import Task, SubTask, Note, Notification, ArchivedTask, ArchivedSubTask, ArchivedNote
+
+# Columns copied as-is; archived rows keep their ids
+COPIED_FIELDS = {
+    ArchivedTask: [
+        'id', 'title', 'description', 'status', 'deadline', 'priority_id', 'category_id',
+        'subtask_count', 'subtasks_done', 'note_count', 'progress', 'created_at', 'updated_at',
+    ],
+    ArchivedSubTask: ['id', 'task_id', 'title', 'status', 'created_at', 'updated_at'],
+    ArchivedNote: ['id', 'task_id', 'content', 'created_at', 'updated_at'],
+}
+
+
+def copy(model, instances):
+    fields = COPIED_FIELDS[model]
+    return model.objects.bulk_create([
+        model(**{field: getattr(obj, field) for field in fields}) for obj in instances
+    ])
+
+
+def raw_delete(qs):
+    """DELETE the rows of qs without the Collector or signals; returns the row count."""
+    return qs._raw_delete(qs.db)
+
+
+def move(tasks):
+    """Move tasks and their children to the archive. Run inside a transaction."""
+    pks = [task.pk for task in tasks]
+    subtasks = list(SubTask.objects.filter(task_id__in=pks))
+    notes = list(Note.objects.filter(task_id__in=pks))
+
+    archived = copy(ArchivedTask, tasks)
+    copy(ArchivedSubTask, subtasks)
+    copy(ArchivedNote, notes)
+
+    # Deadline notifications aren't kept for archived tasks
+    raw_delete(Notification.objects.filter(task_id__in=pks))
+    raw_delete(Note.objects.filter(task_id__in=pks))
+    raw_delete(SubTask.objects.filter(task_id__in=pks))
+    raw_delete(Task.objects.filter(pk__in=pks))
+
+    for model, rows in ((Task, tasks), (SubTask, subtasks), (Note, notes)):
+        counters.track_deleted(model, rows)
+        sync.record(model, [obj.pk for obj in rows])
+    counters.track_created(ArchivedTask, archived)
+    versions.bump(Task, SubTask, Note, ArchivedTask)
+
+
+def archive_completed(days=None, chunk_size=None, now=None):
+    """Archive completed tasks not updated for ``days``; returns how many were moved."""
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    chunk_size = chunk_size or settings.ARCHIVE_CHUNK_SIZE
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    candidates = Task.objects.filter(status=progress.DONE, updated_at__lt=cutoff).order_by('pk')
+
+    moved, last = 0, 0
+    while True:
+        with transaction.atomic():
+            # Selected inside the transaction, so a task reopened in the
+            # meantime is left alone
+            tasks = list(candidates.filter(pk__gt=last).select_for_update()[:chunk_size])
+            if not tasks:
+                return moved
+            move(tasks)
+        moved += len(tasks)
+        last = tasks[-1].pk
@@ -0,0 +1,162 @@
+"""Static asset build and serving.
+
+``BundledManifestStaticFilesStorage`` is the production staticfiles storage.
+On top of Django's manifest hashing, ``collectstatic`` also:
+
+1. concatenates the files listed in settings.STATIC_BUNDLES into one file
+   per bundle (CSS is minified on the way; the JS sources are already
+   minified vendor builds),
+2. writes a .gz (and a .br when the optional ``brotli`` package is
+   installed) next to every hashed text asset,
+3. renders serviceworker.js into STATIC_ROOT with PRECACHE_URLS pointing at
+   the hashed bundles, and a cache version derived from their hashes.
+
+Templates load bundles with ``{% bundle %}`` (templatetags/asset_tags.py),
+which falls back to the individual source files when the storage doesn't
+build bundles, i.e. in development.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional; gzip variants are always written
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.eot', '.ttf')
+SERVICE_WORKER = 'serviceworker.js'
+SOURCE_MAP = re.compile(r'^\s*(//# sourceMappingURL=.*|/\*# sourceMappingURL=.*\*/)\s*$', re.M)
+PRECACHE_URLS = re.compile(r'const PRECACHE_URLS = \[.*?\];', re.S)
+CACHE_VERSION = re.compile(r"const CACHE_VERSION = '[^']*';")
+FAR_FUTURE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=3600'
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    # Spaces around these never matter (unlike ':' or '+', which can be part of selectors or calc())
+    return re.sub(r'\s*([{};,])\s*', r'\1', text).strip()
+
+
+def bundle_content(name, sources):
+    # Source maps would point into the wrong file once concatenated
+    parts = [SOURCE_MAP.sub('', source) for source in sources]
+    if name.endswith('.css'):
+        return minify_css('\n'.join(parts))
+    return ';\n'.join(part.strip() for part in parts) + '\n'
+
+
+def compress(path):
+    """Write gzip (and brotli) variants of the file at path; returns the written paths."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = []
+    variants = [('.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', lambda d: brotli.compress(d, quality=11)))
+    for suffix, compressor in variants:
+        compressed = compressor(data)
+        # Not worth serving if it barely shrinks (fonts that are already compressed)
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class BundledManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    bundles_enabled = True
+    # Vendor files reference source maps that aren't shipped; only rewrite
+    # url() and @import
+    patterns = (
+        ('*.css', (
+            r"""(?P<matched>url\(['"]{0,1}\s*(?P<url>.*?)["']{0,1}\))""",
+            (r"""(?P<matched>@import\s*["']\s*(?P<url>.*?)["'])""", """@import url("%(url)s")"""),
+        )),
+    )
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name, sources in settings.STATIC_BUNDLES.items():
+                contents = []
+                for source in sources:
+                    with self.open(source) as f:
+                        contents.append(f.read().decode('utf-8'))
+                if self.exists(name):
+                    self.delete(name)
+                self._save(name, ContentFile(bundle_content(name, contents).encode('utf-8')))
+                paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE) and self.exists(hashed_name):
+                for path in compress(self.path(hashed_name)):
+                    yield hashed_name, os.path.relpath(path, self.location), True
+        self.write_service_worker()
+
+    def precache_names(self):
+        return list(settings.STATIC_BUNDLES) + list(getattr(settings, 'STATIC_PRECACHE', []))
+
+    def write_service_worker(self):
+        urls = [self.url(name, force=True) for name in self.precache_names()]
+        version = hashlib.md5(''.join(urls).encode()).hexdigest()[:12]
+        with self.open(os.path.join('js', SERVICE_WORKER)) as f:
+            source = f.read().decode('utf-8')
+        source = PRECACHE_URLS.sub(lambda m: 'const PRECACHE_URLS = %s;' % json.dumps(urls, indent=2), source)
+        source = CACHE_VERSION.sub(lambda m: "const CACHE_VERSION = '%s';" % version, source)
+        if self.exists(SERVICE_WORKER):
+            self.delete(SERVICE_WORKER)
+        self._save(SERVICE_WORKER, ContentFile(source.encode('utf-8')))
+
+
+def is_hashed(name):
+    try:
+        return name in staticfiles_storage.hashed_files.values()
+    except AttributeError:  # not a manifest storage
+        return False
+
+
+def serve(request, path):
+    """Serve a collected static file, preferring a precompressed variant.
+
+    Only reached when nothing in front of Django serves STATIC_URL. Hashed
+    names never change content, so they're cached for a year.
+    """
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not os.path.isfile(fullpath):
+        raise Http404(path)
+
+    accepted = request.headers.get('Accept-Encoding', '')
+    content_type, _ = mimetypes.guess_type(fullpath)
+    encoding = None
+    for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+        if name in accepted and os.path.isfile(fullpath + suffix):
+            fullpath, encoding = fullpath + suffix, name
+            break
+
+    response = FileResponse(open(fullpath, 'rb'), content_type=content_type or 'application/octet-stream')
+    # FileResponse names the file it was given, which may be the .gz/.br
+    del response['Content-Disposition']
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = FAR_FUTURE if is_hashed(path) else SHORT_LIVED
+    return response
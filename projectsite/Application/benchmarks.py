@@ -0,0 +1,401 @@
+"""Per-view query and latency benchmarks.
+
+Used by the ``benchmark_views`` management command and by ViewBudgetTests.
+Every case runs against a dataset seeded by ``Initial_data --bulk`` and is
+checked against the query budgets in ``benchmark_budgets.json``.
+
+``throughput`` compares the sync views under the WSGI handler with their
+async variants under the ASGI handler (``benchmark_asgi`` command).
+
+``db_concurrency`` compares the development and production database
+profiles (see settings.py) under concurrent readers and writers
+(``benchmark_db`` command).
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from Application.models import Category, Priority, Task, SubTask, Note, PENDING
+
+BUDGET_FILE = Path(__file__).with_name('benchmark_budgets.json')
+
+
+def task_payload(env):
+    return {
+        "title": "Benchmark task",
+        "description": "",
+        "status": PENDING,
+        "deadline": timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "priority": env['priority'].pk,
+        "category": env['category'].pk,
+    }
+
+
+def throwaway(model, env):
+    """A fresh row for edit and delete cases, so the seeded dataset stays the same."""
+    if model is Category:
+        return Category.objects.create(name="Benchmark")
+    if model is Priority:
+        return Priority.objects.create(name="Benchmark")
+    if model is Task:
+        return Task.objects.create(title="Benchmark", priority=env['priority'], category=env['category'])
+    if model is SubTask:
+        return SubTask.objects.create(task=env['task'], title="Benchmark")
+    return Note.objects.create(task=env['task'], content="Benchmark")
+
+
+# (model, url prefix, POST payload for add/edit)
+MODELS = [
+    (Category, 'category', lambda env: {"name": "Benchmark"}),
+    (Priority, 'priority', lambda env: {"name": "Benchmark"}),
+    (Task, 'task', task_payload),
+    (SubTask, 'subtask', lambda env: {"task": env['task'].pk, "title": "Benchmark", "status": PENDING}),
+    (Note, 'note', lambda env: {"task": env['task'].pk, "content": "Benchmark"}),
+]
+
+
+def no_setup(model, env):
+    return None
+
+
+def cases():
+    """Yield (name, model, setup, request) for every view.
+
+    setup(model, env) runs outside the measurement and its result is passed
+    to request(client, env, obj) as obj.
+    """
+    yield 'home', None, no_setup, lambda client, env, obj: client.get(reverse('home'))
+    for model, prefix, payload in MODELS:
+        yield f'{prefix}-list', model, no_setup, lambda client, env, obj, p=prefix: client.get(
+            reverse(f'{p}-list'))
+        yield f'{prefix}-list-search', model, no_setup, lambda client, env, obj, p=prefix: client.get(
+            reverse(f'{p}-list'), {"q": "benchmark"})
+        yield f'{prefix}-add-form', model, no_setup, lambda client, env, obj, p=prefix: client.get(
+            reverse(f'{p}-add'))
+        yield f'{prefix}-add', model, no_setup, lambda client, env, obj, p=prefix, d=payload: client.post(
+            reverse(f'{p}-add'), d(env))
+        yield f'{prefix}-edit', model, throwaway, lambda client, env, obj, p=prefix, d=payload: client.post(
+            reverse(f'{p}-edit', args=[obj.pk]), d(env))
+        yield f'{prefix}-delete', model, throwaway, lambda client, env, obj, p=prefix: client.post(
+            reverse(f'{p}-delete', args=[obj.pk]))
+    yield 'archive-list', None, no_setup, lambda client, env, obj: client.get(reverse('archive-list'))
+    yield 'archive-list-search', None, no_setup, lambda client, env, obj: client.get(
+        reverse('archive-list'), {"q": "benchmark"})
+
+
+def seed(tasks, subtasks_per_task=3, notes_per_task=2):
+    call_command(
+        'Initial_data', bulk=True, workers=1, seed=0, tasks=tasks,
+        subtasks_per_task=subtasks_per_task, notes_per_task=notes_per_task, stdout=StringIO(),
+    )
+
+
+def measure(func):
+    """Run func() and return (result, queries, sql_ms, wall_ms)."""
+    sql_time = [0.0]
+
+    def timed(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            sql_time[0] += time.perf_counter() - started
+
+    with CaptureQueriesContext(connection) as captured, connection.execute_wrapper(timed):
+        started = time.perf_counter()
+        result = func()
+        wall = time.perf_counter() - started
+    return result, len(captured), sql_time[0] * 1000, wall * 1000
+
+
+def run(size, only=None):
+    """Seed `size` tasks and benchmark every view. Returns {case: metrics}."""
+    seed(size)
+    user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True})
+    client = Client()
+    client.force_login(user)
+    env = {
+        'category': Category.objects.first(),
+        'priority': Priority.objects.first(),
+        'task': Task.objects.first(),
+    }
+    # Give the "benchmark" searches at least one hit in every table
+    for model, _, _ in MODELS:
+        throwaway(model, env)
+
+    results = {}
+    for name, model, setup, request in cases():
+        if only and name not in only:
+            continue
+        # Warm-up request so one-off costs (template loading, sessions) aren't counted
+        request(client, env, setup(model, env))
+        obj = setup(model, env)
+        # Measure a full render: the warm-up left the page and its rows cached
+        for alias in ('pages', 'template_fragments'):
+            caches[alias].clear()
+        response, queries, sql_ms, wall_ms = measure(lambda: request(client, env, obj))
+        results[name] = {
+            'status': response.status_code,
+            'queries': queries,
+            'sql_ms': round(sql_ms, 3),
+            'wall_ms': round(wall_ms, 3),
+        }
+    return results
+
+
+def load_budgets(path=BUDGET_FILE):
+    with open(path) as f:
+        return json.load(f)
+
+
+def over_budget(results, budgets):
+    """List of human-readable budget violations."""
+    problems = []
+    for name, metrics in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            problems.append(f"{name}: no budget in {BUDGET_FILE.name}")
+            continue
+        if metrics['status'] >= 400:
+            problems.append(f"{name}: HTTP {metrics['status']}")
+        if metrics['queries'] > budget['queries']:
+            problems.append(f"{name}: {metrics['queries']} queries (budget {budget['queries']})")
+        if 'wall_ms' in budget and metrics['wall_ms'] > budget['wall_ms']:
+            problems.append(f"{name}: {metrics['wall_ms']:.1f} ms (budget {budget['wall_ms']} ms)")
+    return problems
+
+
+# (sync view, async variant) pairs compared by throughput()
+THROUGHPUT_PAIRS = [
+    ('home', 'async-home'),
+    ('task-list', 'async-task-list'),
+    ('subtask-list', 'async-subtask-list'),
+    ('note-list', 'async-note-list'),
+]
+
+
+def query_delay(delay_ms):
+    """execute_wrapper that stands in for a slow database by sleeping before every query."""
+    def delayed(execute, sql, params, many, context):
+        time.sleep(delay_ms / 1000)
+        return execute(sql, params, many, context)
+    return delayed
+
+
+def summarize(mode, outcomes, elapsed, concurrency):
+    latencies = sorted(ms for _, ms in outcomes)
+    return {
+        'mode': mode,
+        'requests': len(outcomes),
+        'concurrency': concurrency,
+        'errors': sum(1 for status, _ in outcomes if status >= 400),
+        'requests_per_s': round(len(outcomes) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 2),
+    }
+
+
+def wsgi_throughput(cookie, urls, total, threads):
+    """Sync views through Django's WSGI handler, with a fixed pool of worker threads."""
+    handler = WSGIHandler()
+
+    def one(i):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': urls[i % len(urls)],
+            'QUERY_STRING': f'r={i}',
+            'HTTP_HOST': 'testserver',
+            'HTTP_COOKIE': cookie,
+        }
+        setup_testing_defaults(environ)
+        status = []
+        started = time.perf_counter()
+        response = handler(environ, lambda s, headers, exc_info=None: status.append(int(s.split()[0])))
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return status[0], (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(one, range(total)))
+    return summarize('wsgi', outcomes, time.perf_counter() - started, threads)
+
+
+def asgi_throughput(cookie, urls, total, concurrency):
+    """Async views through Django's ASGI handler, on a single event loop."""
+    handler = ASGIHandler()
+
+    async def one(i, limit):
+        async with limit:
+            path = urls[i % len(urls)]
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': f'r={i}'.encode(), 'root_path': '',
+                'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            }
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await asyncio.Event().wait()  # the client never disconnects
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            return status[0], (time.perf_counter() - started) * 1000
+
+    async def main():
+        limit = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(one(i, limit) for i in range(total)))
+        return outcomes, time.perf_counter() - started
+
+    # Run the loop on a fresh thread, like a server's, so requests don't
+    # inherit this thread's database connection
+    with ThreadPoolExecutor(max_workers=1) as loop_thread:
+        outcomes, elapsed = loop_thread.submit(asyncio.run, main()).result()
+    return summarize('asgi', outcomes, elapsed, concurrency)
+
+
+def throughput(size, total, threads, concurrency, delay_ms=0):
+    """Seed `size` tasks and compare sync/WSGI with async/ASGI on the same pages.
+
+    The varying ``r`` parameter defeats the list page cache, so every request
+    renders. Returns [wsgi summary, asgi summary].
+    """
+    if size:
+        seed(size)
+    user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True})
+    client = Client()
+    client.force_login(user)
+    cookie = '; '.join(f'{key}={morsel.value}' for key, morsel in client.cookies.items())
+    sync_urls = [reverse(sync_name) for sync_name, _ in THROUGHPUT_PAIRS]
+    async_urls = [reverse(async_name) for _, async_name in THROUGHPUT_PAIRS]
+
+    def add_delay(sender, connection, **kwargs):
+        # Outermost, so execute_wrapper() blocks already open on this connection
+        # still pop their own wrapper
+        connection.execute_wrappers.insert(0, query_delay(delay_ms))
+
+    # Every request thread opens its own connection, so slow them all down there
+    if delay_ms:
+        connection_created.connect(add_delay)
+    try:
+        return [
+            wsgi_throughput(cookie, sync_urls, total, threads),
+            asgi_throughput(cookie, async_urls, total, concurrency),
+        ]
+    finally:
+        connection_created.disconnect(add_delay)
+
+
+# (name, connection settings, SQLite pragmas); None means the production pragmas
+DB_PROFILES = [
+    ('development', {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}, {'journal_mode': 'DELETE'}),
+    ('production', {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True}, None),
+]
+
+
+def read_page():
+    return list(Task.objects.select_related('priority', 'category').order_by('-created_at', '-pk')[:20])
+
+
+def write_task(pks):
+    Task.objects.filter(pk=random.choice(pks)).update(title=f"Benchmark {random.random()}", updated_at=timezone.now())
+
+
+def db_worker(op, deadline):
+    """Run op() back to back until the deadline, opening and releasing the
+    connection around each one the way request_started/finished do."""
+    db = connections['default']
+    latencies, errors = [], 0
+    try:
+        while time.perf_counter() < deadline:
+            db.close_if_unusable_or_obsolete()
+            started = time.perf_counter()
+            try:
+                op()
+                latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError:  # "database is locked"
+                errors += 1
+            db.close_if_unusable_or_obsolete()
+    finally:
+        db.close()
+    return latencies, errors
+
+
+def db_profile_summary(name, outcomes, readers, duration):
+    reads = [ms for latencies, _ in outcomes[:readers] for ms in latencies]
+    writes = [ms for latencies, _ in outcomes[readers:] for ms in latencies]
+
+    def p95(values):
+        values = sorted(values)
+        return round(values[max(0, int(len(values) * 0.95) - 1)], 2) if values else None
+
+    return {
+        'profile': name,
+        'readers': readers,
+        'writers': len(outcomes) - readers,
+        'reads_per_s': round(len(reads) / duration, 1),
+        'writes_per_s': round(len(writes) / duration, 1),
+        'read_p95_ms': p95(reads),
+        'write_p95_ms': p95(writes),
+        'errors': sum(errors for _, errors in outcomes),
+    }
+
+
+def db_concurrency(duration, readers, writers):
+    """Readers fetching a task list page while writers update tasks, once per
+    entry in DB_PROFILES, each for `duration` seconds. Expects a seeded,
+    file-backed database. Returns one summary per profile.
+    """
+    pks = list(Task.objects.values_list('pk', flat=True))
+    db_settings = connections['default'].settings_dict
+    original = {key: db_settings.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+    results = []
+    try:
+        for name, connection_settings, pragmas in DB_PROFILES:
+            # Worker threads build their connections from this dict
+            db_settings.update(connection_settings)
+            connection.close()
+            with override_settings(SQLITE_PRAGMAS=settings.SQLITE_PRODUCTION_PRAGMAS if pragmas is None else pragmas):
+                connection.ensure_connection()  # switches the journal mode while nothing else is connected
+                deadline = time.perf_counter() + duration
+                ops = [read_page] * readers + [lambda: write_task(pks)] * writers
+                with ThreadPoolExecutor(max_workers=readers + writers) as pool:
+                    outcomes = list(pool.map(lambda op: db_worker(op, deadline), ops))
+                connection.close()
+            results.append(db_profile_summary(name, outcomes, readers, duration))
+    finally:
+        db_settings.update(original)
+    return results
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from Application import versions
+
+PAGE_CACHE = 'pages'
+
+
+class VersionedListMixin:
+    """Conditional GET and rendered-page caching for list views.
+
+    The ETag is derived from the version stamps of ``version_models`` (bumped
+    by signals on every write), the requesting user and the query string, so
+    any write to a model shown on the page invalidates it. Unchanged pages get
+    a 304, or are served from the LRU page cache without touching the models.
+    """
+    version_models = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        stamps = versions.current(self.version_models)
+        response, validators = self.cached_response(request, stamps)
+        if response is not None:
+            return response
+        return self.store_response(super().dispatch(request, *args, **kwargs), validators)
+
+    def cached_response(self, request, stamps):
+        """(304 or cached response or None, validators to pass to store_response)."""
+        etag, last_modified = self.page_validators(request, stamps)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return self.add_validators(response, etag, last_modified), None
+
+        content = caches[PAGE_CACHE].get(f'list-page:{etag}')
+        if content is not None:
+            return self.add_validators(HttpResponse(content), etag, last_modified), None
+        return None, (etag, last_modified)
+
+    def store_response(self, response, validators):
+        if response.status_code != 200:
+            return response
+        etag, last_modified = validators
+        if hasattr(response, 'add_post_render_callback'):
+            key = f'list-page:{etag}'
+            response.add_post_render_callback(lambda r: caches[PAGE_CACHE].set(key, r.content))
+        return self.add_validators(response, etag, last_modified)
+
+    def page_validators(self, request, stamps):
+        parts = [self.__class__.__name__, str(request.user.pk)]
+        parts += [
+            f'{name}:{version}:{changed_at.timestamp() if changed_at else 0}'
+            for name, (version, changed_at) in sorted(stamps.items())
+        ]
+        parts.append(request.GET.urlencode())
+        etag = quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+        changed = [changed_at for _, changed_at in stamps.values() if changed_at]
+        last_modified = int(max(changed).timestamp()) if changed else None
+        return etag, last_modified
+
+    def add_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Pages include the username, so they're private and must be revalidated
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+        return response
+
+
+class AsyncVersionedListMixin(VersionedListMixin):
+    """VersionedListMixin for async views: the version stamps come from the async ORM."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await super(VersionedListMixin, self).dispatch(request, *args, **kwargs)
+
+        # The user (session lookup) and the version stamps don't depend on each other
+        _, stamps = await asyncio.gather(
+            sync_to_async(lambda: request.user.pk)(),
+            versions.acurrent(self.version_models),
+        )
+        response, validators = self.cached_response(request, stamps)
+        if response is not None:
+            return response
+        response = await super(VersionedListMixin, self).dispatch(request, *args, **kwargs)
+        return self.store_response(response, validators)
@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from Application.models import Counter, Category, Priority, Task, SubTask, Note, ArchivedTask
+
+# Models whose totals are shown on the dashboard, keyed by counter name
+COUNTED_MODELS = {
+    'category': Category,
+    'priority': Priority,
+    'task': Task,
+    'subtask': SubTask,
+    'note': Note,
+    'archivedtask': ArchivedTask,
+}
+
+# Models that also get a "created this year" counter
+YEARLY_MODELS = ('task', 'subtask', 'note')
+
+
+def counter_name(model):
+    return model._meta.model_name
+
+
+def year_key(name, year):
+    return f"{name}:{year}"
+
+
+def created_year(instance):
+    return timezone.localtime(instance.created_at).year
+
+
+def bump(name, delta):
+    """Add delta to a counter, creating the row the first time it's seen."""
+    if not delta:
+        return
+    if Counter.objects.filter(name=name).update(value=F('value') + delta):
+        return
+    _, created = Counter.objects.get_or_create(name=name, defaults={'value': delta})
+    if not created:
+        Counter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def track(model, instances, sign):
+    name = counter_name(model)
+    if name not in COUNTED_MODELS:
+        return
+    instances = list(instances)
+    bump(name, sign * len(instances))
+    if name in YEARLY_MODELS:
+        years = {}
+        for obj in instances:
+            year = created_year(obj)
+            years[year] = years.get(year, 0) + 1
+        for year, n in years.items():
+            bump(year_key(name, year), sign * n)
+
+
+def track_created(model, instances):
+    """Count rows written through bulk_create, which doesn't send post_save."""
+    track(model, instances, 1)
+
+
+def track_deleted(model, instances):
+    """Uncount rows removed without post_delete (see Application/archiving.py)."""
+    track(model, instances, -1)
+
+
+def snapshot_names(year=None):
+    if year is None:
+        year = timezone.localdate().year
+    return list(COUNTED_MODELS) + [year_key(name, year) for name in YEARLY_MODELS]
+
+
+def snapshot(year=None):
+    """Every dashboard number in a single query."""
+    names = snapshot_names(year)
+    values = dict(Counter.objects.filter(name__in=names).values_list('name', 'value'))
+    return {name: values.get(name, 0) for name in names}
+
+
+async def asnapshot(year=None):
+    """snapshot() on the async ORM."""
+    names = snapshot_names(year)
+    values = {
+        name: value
+        async for name, value in Counter.objects.filter(name__in=names).values_list('name', 'value')
+    }
+    return {name: values.get(name, 0) for name in names}
+
+
+def reconcile():
+    """Recompute every counter from the base tables and fix any drift."""
+    totals = {}
+    for name, model in COUNTED_MODELS.items():
+        totals[name] = model.objects.count()
+        if name in YEARLY_MODELS:
+            rows = (
+                model.objects.values('created_at__year')
+                .annotate(n=Count('pk'))
+                .order_by()
+            )
+            for row in rows:
+                totals[year_key(name, row['created_at__year'])] = row['n']
+
+    with transaction.atomic():
+        Counter.objects.exclude(name__in=totals).filter(
+            name__regex=r'^(%s)(:\d+)?$' % '|'.join(COUNTED_MODELS)
+        ).delete()
+        existing = {c.name: c for c in Counter.objects.filter(name__in=totals)}
+        changed = []
+        for name, value in totals.items():
+            counter = existing.get(name)
+            if counter is None:
+                Counter.objects.create(name=name, value=value)
+            elif counter.value != value:
+                counter.value = value
+                changed.append(counter)
+        Counter.objects.bulk_update(changed, ['value'])
+    return totals
@@ -0,0 +1,18 @@
+"""Per-connection database setup.
+
+SQLite pragmas other than journal_mode only last for the connection that
+set them, so settings.SQLITE_PRAGMAS is applied each time Django opens one.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    # On the raw connection, so execute wrappers and the debug query log don't see them
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,158 @@
+"""Due-soon and overdue notifications.
+
+``scan`` (run in a loop by the ``scan_deadlines`` command) finds the open
+tasks whose deadline crossed a threshold since the previous pass:
+
+* due soon: the deadline came within DUE_SOON_HOURS of now,
+* overdue: the deadline passed.
+
+Each threshold keeps a watermark, the point on the deadline axis its last
+pass scanned up to, so a pass only reads the deadlines between the
+watermark and the threshold's current position: a range scan over the
+(status, deadline) index per open status, however many tasks there are.
+Tasks edited since the last pass (found through the (updated_at, id) index)
+are checked against the thresholds directly, which covers new tasks and
+deadlines moved back into a range already scanned.
+
+Every active user gets one Notification per task, threshold and deadline.
+Tasks a pass finds again are skipped, and the unique constraint makes
+writing a notification twice a no-op, so passes may safely overlap.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.generic import View
+
+from Application.models import Task, Notification, Watermark, PENDING, IN_PROGRESS
+
+OPEN_STATUSES = [PENDING, IN_PROGRESS]
+CHANGES = 'deadlines:changes'
+# Edits committed while a pass runs may carry an earlier updated_at than the
+# watermark it saves; the next pass reads this far back again
+RESCAN = timedelta(seconds=5)
+NAVBAR_LIMIT = 5
+
+
+def thresholds():
+    """{kind: how long before the deadline it fires}."""
+    return {'due_soon': timedelta(hours=settings.DUE_SOON_HOURS), 'overdue': timedelta(0)}
+
+
+def kind_at(deadline, now):
+    for kind, lead in sorted(thresholds().items(), key=lambda item: item[1]):
+        if deadline <= now + lead:
+            return kind
+    return None
+
+
+def crossed(kind, lower, upper):
+    """(task id, deadline) of open tasks with lower < deadline <= upper."""
+    return list(
+        Task.objects.filter(status__in=OPEN_STATUSES, deadline__gt=lower, deadline__lte=upper)
+        .values_list('pk', 'deadline')
+    )
+
+
+def changed(since, scanned_to, now):
+    """(task id, kind, deadline) for open tasks edited since ``since`` whose
+    deadline lies in the part of the axis already scanned."""
+    rows = (
+        Task.objects.filter(updated_at__gt=since, status__in=OPEN_STATUSES, deadline__lte=scanned_to)
+        .values_list('pk', 'deadline')
+    )
+    found = [(pk, kind_at(deadline, now), deadline) for pk, deadline in rows]
+    return [(pk, kind, deadline) for pk, kind, deadline in found if kind]
+
+
+def scan(now=None):
+    """One pass; returns {kind: tasks newly announced}."""
+    now = now or timezone.now()
+    marks = dict(Watermark.objects.values_list('name', 'value'))
+    found = []
+    positions = {}
+    for kind, lead in thresholds().items():
+        upper = now + lead
+        # First pass starts from now rather than announcing every old deadline
+        lower = marks.get(kind, now)
+        if kind != 'overdue':
+            # Deadlines that have already passed are only announced as overdue
+            lower = max(lower, now)
+        found += [(pk, kind, deadline) for pk, deadline in crossed(kind, lower, upper)]
+        positions[kind] = max(upper, marks.get(kind, upper))
+    if CHANGES in marks:
+        scanned_to = max(marks.get(kind, now) for kind in thresholds())
+        found += changed(marks[CHANGES] - RESCAN, scanned_to, now)
+    positions[CHANGES] = now
+
+    # Overlapping passes find some tasks again; only count (and write) new ones
+    if found:
+        seen = set(
+            Notification.objects.filter(task_id__in={pk for pk, _, _ in found})
+            .values_list('task_id', 'kind', 'deadline').distinct()
+        )
+        found = [row for row in dict.fromkeys(found) if row not in seen]
+
+    users = list(User.objects.filter(is_active=True).values_list('pk', flat=True))
+    with transaction.atomic():
+        Notification.objects.bulk_create([
+            Notification(user_id=user, task_id=pk, kind=kind, deadline=deadline)
+            for pk, kind, deadline in found
+            for user in users
+        ], ignore_conflicts=True, batch_size=1000)
+        for name, value in positions.items():
+            Watermark.objects.update_or_create(name=name, defaults={'value': value})
+
+    totals = {kind: 0 for kind in thresholds()}
+    for _, kind, _ in found:
+        totals[kind] += 1
+    return totals
+
+
+def purge(now=None):
+    """Delete read notifications older than NOTIFICATION_RETENTION_DAYS."""
+    horizon = (now or timezone.now()) - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    deleted, _ = Notification.objects.filter(read=True, created_at__lt=horizon).delete()
+    return deleted
+
+
+class NotificationsView(LoginRequiredMixin, View):
+    """The navbar's notification list (GET) and "mark as read" (POST).
+
+    Fetched by static/js/notifications.js rather than rendered into base.html,
+    so the cached list pages don't go stale when a notification arrives.
+    """
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        rows = list(
+            Notification.objects.filter(user=request.user, read=False)
+            .select_related('task').only('kind', 'deadline', 'created_at', 'task__title')
+            .order_by('-created_at')[:NAVBAR_LIMIT + 1]
+        )
+        return JsonResponse({
+            'items': [{
+                'id': n.pk,
+                'kind': n.kind,
+                'label': n.get_kind_display(),
+                'task': n.task.title,
+                'deadline': n.deadline,
+                'created_at': n.created_at,
+                'url': reverse('task-edit', args=[n.task_id]),
+            } for n in rows[:NAVBAR_LIMIT]],
+            'more': len(rows) > NAVBAR_LIMIT,
+        })
+
+    def post(self, request, *args, **kwargs):
+        qs = Notification.objects.filter(user=request.user, read=False)
+        ids = request.POST.getlist('id')
+        if ids:
+            if not all(i.isdigit() for i in ids):
+                return JsonResponse({'error': 'id must be an integer.'}, status=400)
+            qs = qs.filter(pk__in=ids)
+        return JsonResponse({'read': qs.update(read=True)})
@@ -0,0 +1,183 @@
+"""Background deletes of large Categories, Priorities and Tasks.
+
+Deleting a category or priority cascades to every task under it, live and
+archived, and to their subtasks and notes; Django's Collector loads all of
+them and deletes them in one transaction. Parents with more than
+DELETE_INLINE_LIMIT dependents are instead flagged ``deleting``, which hides
+them straight away (VisibleManager), and handed to a DeletionJob.
+
+A job removes the dependents deepest table first, DELETION_BATCH_SIZE rows at
+a time with a plain ``DELETE ... WHERE id IN``, each batch in its own
+transaction together with the counters, activity rollups, version stamps
+and changes-feed log rows that post_delete would have updated, and the
+job's progress.
+Every batch re-selects what's left, so a job that was interrupted carries on
+where it stopped when run again. Jobs start in a thread of the process that
+scheduled them; ``run_deletion_jobs`` picks up any that stopped.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.generic import View
+
+from Application import counters, rollups, sync, versions
+from Application.archiving import raw_delete
+from Application.models import (
+    Category, Priority, Task, SubTask, Note, Notification, ArchivedTask, ArchivedSubTask, ArchivedNote,
+    DeletionJob,
+)
+
+logger = logging.getLogger(__name__)
+
+# Dependents of each parent as (model, lookup of the parent's id), in the
+# order they have to go
+PLANS = {
+    Category: [
+        (Notification, 'task__category_id'), (Note, 'task__category_id'), (SubTask, 'task__category_id'), (Task, 'category_id'),
+        (ArchivedNote, 'task__category_id'), (ArchivedSubTask, 'task__category_id'), (ArchivedTask, 'category_id'),
+    ],
+    Priority: [
+        (Notification, 'task__priority_id'), (Note, 'task__priority_id'), (SubTask, 'task__priority_id'), (Task, 'priority_id'),
+        (ArchivedNote, 'task__priority_id'), (ArchivedSubTask, 'task__priority_id'), (ArchivedTask, 'priority_id'),
+    ],
+    Task: [(Notification, 'task_id'), (Note, 'task_id'), (SubTask, 'task_id')],
+}
+PARENTS = {model._meta.model_name: model for model in PLANS}
+
+
+def dependents(model, pk):
+    """[(model, queryset)] of everything deleted along with a parent, hidden rows included."""
+    return [(child, child._base_manager.filter(**{lookup: pk})) for child, lookup in PLANS[model]]
+
+
+def is_large(obj):
+    """Whether obj has more than DELETE_INLINE_LIMIT dependents; stops counting once it knows."""
+    remaining = settings.DELETE_INLINE_LIMIT
+    for _, qs in dependents(type(obj), obj.pk):
+        remaining -= qs[:remaining + 1].count()
+        if remaining < 0:
+            return True
+    return False
+
+
+def schedule(obj):
+    """Hide obj and create the job that deletes it; returns the job."""
+    model = type(obj)
+    with transaction.atomic():
+        model._base_manager.filter(pk=obj.pk).update(deleting=True)
+        job, created = DeletionJob.objects.get_or_create(
+            model=model._meta.model_name, object_id=obj.pk, finished_at=None,
+        )
+        if created:
+            # Hidden rows are already gone as far as counts and offline copies go
+            counters.track_deleted(model, [obj])
+            if model in rollups.NAMES:
+                rollups.track_deleted(model, [obj.pk])
+            if model in sync.SYNCED_MODELS:
+                sync.record(model, [obj.pk])
+            versions.bump(model)
+            if settings.DELETION_JOBS_IN_PROCESS:
+                transaction.on_commit(lambda: start(job.pk))
+    return job
+
+
+def start(job_pk):
+    threading.Thread(target=run_in_thread, args=(job_pk,), daemon=True).start()
+
+
+def run_in_thread(job_pk):
+    try:
+        run(DeletionJob.objects.get(pk=job_pk))
+    except Exception:
+        logger.exception("Deletion job %s stopped; run_deletion_jobs will resume it", job_pk)
+    finally:
+        connection.close()
+
+
+def delete_batch(job, model, qs, batch_size):
+    """Delete up to batch_size rows of qs; returns how many went."""
+    with transaction.atomic():
+        hideable = hasattr(model, 'deleting')
+        rows = list(qs.order_by('pk').only('pk', 'created_at', *(['deleting'] if hideable else []))[:batch_size])
+        if not rows:
+            return 0
+        # Rows hidden by a job of their own were uncounted when it was scheduled
+        gone = [obj for obj in rows if not (hideable and obj.deleting)]
+        if model in rollups.NAMES:
+            rollups.track_deleted(model, [obj.pk for obj in gone])
+        raw_delete(model._base_manager.filter(pk__in=[obj.pk for obj in rows]))
+        counters.track_deleted(model, gone)
+        if model in sync.SYNCED_MODELS:
+            sync.record(model, [obj.pk for obj in gone])
+        versions.bump(model)
+        DeletionJob.objects.filter(pk=job.pk).update(deleted=F('deleted') + len(rows), updated_at=timezone.now())
+    return len(rows)
+
+
+def run(job, batch_size=None):
+    """Delete everything under the job's parent, then the parent itself."""
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    model = PARENTS[job.model]
+    steps = dependents(model, job.object_id)
+    if job.total is None:
+        job.total = job.deleted + sum(qs.count() for _, qs in steps) + 1
+        DeletionJob.objects.filter(pk=job.pk).update(total=job.total)
+
+    for child, qs in steps:
+        while delete_batch(job, child, qs, batch_size):
+            pass
+
+    with transaction.atomic():
+        deleted = raw_delete(model._base_manager.filter(pk=job.object_id))
+        versions.bump(model)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            deleted=F('deleted') + deleted, updated_at=timezone.now(), finished_at=timezone.now(),
+        )
+    job.refresh_from_db()
+    return job
+
+
+def resumable(now=None):
+    """Unfinished jobs nobody has made progress on for DELETION_JOB_STALE_SECONDS."""
+    stale = (now or timezone.now()) - timedelta(seconds=settings.DELETION_JOB_STALE_SECONDS)
+    return DeletionJob.objects.filter(finished_at=None, updated_at__lt=stale).order_by('pk')
+
+
+def claim(job, now=None):
+    """Take over a stale job; False if another worker got to it first."""
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=settings.DELETION_JOB_STALE_SECONDS)
+    return bool(DeletionJob.objects.filter(pk=job.pk, finished_at=None, updated_at__lt=stale).update(updated_at=now))
+
+
+class BackgroundDeleteMixin:
+    """DeleteView mixin: large parents go to a DeletionJob instead of being deleted inline."""
+
+    def form_valid(self, form):
+        if is_large(self.object):
+            schedule(self.object)
+            return HttpResponseRedirect(self.get_success_url())
+        return super().form_valid(form)
+
+
+class DeletionJobView(LoginRequiredMixin, View):
+    """Progress of a background delete, as JSON."""
+    raise_exception = True
+
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(DeletionJob, pk=pk)
+        return JsonResponse({
+            'model': job.model,
+            'object_id': job.object_id,
+            'deleted': job.deleted,
+            'total': job.total,
+            'finished': job.finished_at is not None,
+        })
@@ -0,0 +1,132 @@
+"""Streaming export of tasks with their subtasks and notes.
+
+Used by TaskExportView and the ``export_tasks`` management command. Tasks are
+read with ``.iterator(chunk_size=...)`` and each chunk's subtasks and notes are
+prefetched in two queries, so memory stays flat however many rows there are.
+"""
+import csv
+import json
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import HttpRequest, QueryDict, StreamingHttpResponse
+from django.views.generic import View
+
+from Application.models import SubTask, Note
+from Application.pagination import CursorPaginator
+from Application.views import TaskListView
+
+CHUNK_SIZE = 500
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_COLUMNS = [
+    'record', 'id', 'task_id', 'title', 'text', 'status', 'deadline',
+    'priority', 'category', 'created_at', 'updated_at',
+]
+
+
+def task_queryset(q='', sort_by=''):
+    """The queryset TaskListView would show for ?q=...&sort_by=..., unpaginated."""
+    request = HttpRequest()
+    request.GET = QueryDict(mutable=True)
+    request.GET.update({'q': q or '', 'sort_by': sort_by or ''})
+    view = TaskListView()
+    view.setup(request)
+    qs = view.get_queryset()
+    if view.is_ranked():
+        return qs
+    # Same index-friendly ordering (with tiebreakers) as the cursor-paginated list
+    paginator = CursorPaginator(qs, view.paginate_by, view.get_ordering())
+    return qs.order_by(*paginator.order_by())
+
+
+def iter_tasks(qs, chunk_size=CHUNK_SIZE):
+    """Yield tasks one at a time, prefetching children a chunk at a time."""
+    qs = qs.prefetch_related(
+        Prefetch('subtasks', queryset=SubTask.objects.order_by('created_at', 'pk')),
+        Prefetch('notes', queryset=Note.objects.order_by('created_at', 'pk')),
+    )
+    return qs.iterator(chunk_size=chunk_size)
+
+
+def task_record(task):
+    return {
+        'id': task.pk,
+        'title': task.title,
+        'description': task.description,
+        'status': task.get_status_display(),
+        'deadline': task.deadline,
+        'priority': task.priority.name,
+        'category': task.category.name,
+        'created_at': task.created_at,
+        'updated_at': task.updated_at,
+        'subtasks': [
+            {'id': s.pk, 'title': s.title, 'status': s.get_status_display(),
+             'created_at': s.created_at, 'updated_at': s.updated_at}
+            for s in task.subtasks.all()
+        ],
+        'notes': [
+            {'id': n.pk, 'content': n.content,
+             'created_at': n.created_at, 'updated_at': n.updated_at}
+            for n in task.notes.all()
+        ],
+    }
+
+
+def ndjson_lines(tasks):
+    encoder = DjangoJSONEncoder()
+    for task in tasks:
+        yield encoder.encode(task_record(task)) + '\n'
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(tasks):
+    """One 'task' row followed by its 'subtask' and 'note' rows."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for task in tasks:
+        yield writer.writerow([
+            'task', task.pk, '', task.title, task.description, task.get_status_display(),
+            task.deadline.isoformat() if task.deadline else '',
+            task.priority.name, task.category.name,
+            task.created_at.isoformat(), task.updated_at.isoformat(),
+        ])
+        for s in task.subtasks.all():
+            yield writer.writerow([
+                'subtask', s.pk, task.pk, s.title, '', s.get_status_display(), '', '', '',
+                s.created_at.isoformat(), s.updated_at.isoformat(),
+            ])
+        for n in task.notes.all():
+            yield writer.writerow([
+                'note', n.pk, task.pk, '', n.content, '', '', '', '',
+                n.created_at.isoformat(), n.updated_at.isoformat(),
+            ])
+
+
+def export_lines(fmt, q='', sort_by='', chunk_size=CHUNK_SIZE):
+    tasks = iter_tasks(task_queryset(q, sort_by), chunk_size)
+    return csv_lines(tasks) if fmt == 'csv' else ndjson_lines(tasks)
+
+
+class TaskExportView(LoginRequiredMixin, View):
+    """Stream every task matching the task list's ?q= and ?sort_by= as CSV or NDJSON."""
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get('format', 'ndjson')
+        if fmt not in FORMATS:
+            fmt = 'ndjson'
+        response = StreamingHttpResponse(
+            export_lines(fmt, request.GET.get('q', ''), request.GET.get('sort_by', '')),
+            content_type=FORMATS[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{fmt}"'
+        return response
@@ -0,0 +1,83 @@
+from django import forms
+from django.urls import reverse_lazy
+from django.utils.html import format_html
+
+from Application.models import Task, SubTask, Note
+
+
+class TaskLookupWidget(forms.Select):
+    """A <select> that only renders the chosen task.
+
+    A search box above it fetches matching tasks from TaskLookupView as the
+    user types (static/js/task-lookup.js), so the page never lists every task.
+    """
+
+    class Media:
+        js = ('js/task-lookup.js',)
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        self.attrs.setdefault('data-lookup-url', reverse_lazy('task-lookup'))
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if v]
+        # _base_manager: a task waiting for a background delete is still shown when it's the current value
+        tasks = Task._base_manager.filter(pk__in=selected).values_list('pk', 'title') if selected else []
+        options = [(None, [self.create_option(name, '', '---------', not selected, 0)], 0)]
+        for index, (pk, title) in enumerate(tasks, 1):
+            options.append((None, [self.create_option(name, pk, title, True, index)], index))
+        return options
+
+    def render(self, name, value, attrs=None, renderer=None):
+        search = format_html(
+            '<input type="search" class="form-control mb-2 task-lookup-search" '
+            'data-for="{}" placeholder="Search tasks..." autocomplete="off">',
+            (attrs or {}).get('id') or self.attrs.get('id', ''),
+        )
+        return search + super().render(name, value, attrs, renderer)
+
+
+class TaskChoiceField(forms.ModelChoiceField):
+    # ModelChoiceField validates the posted id with a single pk lookup
+    widget = TaskLookupWidget
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Task.objects.all(), **kwargs)
+
+
+class CurrentChoicesMixin:
+    """ModelForm mixin: foreign key choices keep the instance's current value.
+
+    Categories, priorities and tasks waiting for a background delete are
+    hidden from the choices (VisibleManager), which would otherwise make the
+    rows that still point at them fail validation until the delete finishes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            current = getattr(self.instance, f'{name}_id', None)
+            if isinstance(field, forms.ModelChoiceField) and current is not None:
+                field.queryset = field.queryset | field.queryset.model._base_manager.filter(pk=current)
+
+
+class TaskForm(CurrentChoicesMixin, forms.ModelForm):
+    class Meta:
+        model = Task
+        fields = ['title', 'description', 'status', 'deadline', 'priority', 'category']
+
+
+class SubTaskForm(CurrentChoicesMixin, forms.ModelForm):
+    task = TaskChoiceField()
+
+    class Meta:
+        model = SubTask
+        fields = ['task', 'title', 'status']
+
+
+class NoteForm(CurrentChoicesMixin, forms.ModelForm):
+    task = TaskChoiceField()
+
+    class Meta:
+        model = Note
+        fields = ['task', 'content']
@@ -0,0 +1,275 @@
+"""Streaming import of tasks with their subtasks and notes.
+
+Reads the same NDJSON and CSV layouts that ``exporting`` writes, one record
+(a task plus its children) at a time. Records are validated and written in
+batches with bulk_create, one transaction per batch. Each transaction also
+advances an ImportCheckpoint, so an import that dies halfway can be rerun
+with resume and carries on after the last committed batch.
+"""
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.generic import View
+
+from Application import counters, progress, rollups, sync, versions
+from Application.models import Category, Priority, Task, SubTask, Note, ImportCheckpoint, parse_status
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+TASK_FIELDS = ['title', 'description', 'status', 'deadline']
+
+
+def read_ndjson(stream):
+    """Yield (line number, record) for each non-blank line."""
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+def read_csv(stream):
+    """Yield (line number, record), folding subtask/note rows into the task above them."""
+    record, start = None, None
+    reader = csv.DictReader(stream)
+    for row in reader:
+        kind = row.get('record')
+        if kind == 'task':
+            if record is not None:
+                yield start, record
+            record, start = dict(row, subtasks=[], notes=[]), reader.line_num
+        elif kind == 'subtask' and record is not None:
+            record['subtasks'].append({'title': row.get('title'), 'status': row.get('status')})
+        elif kind == 'note' and record is not None:
+            record['notes'].append({'content': row.get('text')})
+        else:
+            yield reader.line_num, None
+    if record is not None:
+        yield start, record
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def format_for(filename, default='ndjson'):
+    for fmt in READERS:
+        if filename.endswith(f'.{fmt}'):
+            return fmt
+    return default
+
+
+def cleaned(model, data, fields, exclude):
+    """An unsaved instance built from data[fields], with field validation applied."""
+    values, errors = {}, {}
+    for name in fields:
+        if name in data:
+            value, field = data[name], model._meta.get_field(name)
+            # CSV has no null; an empty cell means "no value" for nullable fields
+            if value == '' and field.null:
+                value = None
+            # clean_fields() skips empty values, so a null would only fail at the INSERT
+            elif value is None and not field.null:
+                if field.blank and field.empty_strings_allowed:
+                    value = ''
+                else:
+                    errors[name] = [field.error_messages['null']]
+            values[name] = value
+    if errors:
+        raise ValidationError(errors)
+    if 'status' in values:
+        # Files spell statuses the way exports write them
+        values['status'] = parse_status(values['status'])
+    obj = model(**values)
+    obj.clean_fields(exclude=exclude)
+    return obj
+
+
+class ImportResult:
+    def __init__(self):
+        self.records = 0  # position in the input, including skipped and resumed-over records
+        self.tasks = self.subtasks = self.notes = 0
+        self.invalid = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    @property
+    def rows(self):
+        return self.tasks + self.subtasks + self.notes
+
+    @property
+    def rows_per_second(self):
+        return self.rows / max(time.monotonic() - self.started, 1e-9)
+
+    def as_dict(self):
+        return {
+            'records': self.records,
+            'tasks': self.tasks,
+            'subtasks': self.subtasks,
+            'notes': self.notes,
+            'invalid': self.invalid,
+            'errors': self.errors,
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+class Importer:
+    """Validate and write records in batches.
+
+    Category and priority names are resolved through maps loaded once up
+    front; names that don't exist yet are created the first time they're seen.
+    Invalid records are skipped and reported, never written in part.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, checkpoint=None, resume=False):
+        self.batch_size = max(1, batch_size)
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.categories = dict(Category.objects.values_list('name', 'pk'))
+        self.priorities = dict(Priority.objects.values_list('name', 'pk'))
+
+    def run(self, records, progress=None):
+        result = ImportResult()
+        if self.checkpoint:
+            checkpoint, _ = ImportCheckpoint.objects.get_or_create(name=self.checkpoint)
+            if self.resume:
+                result.records = checkpoint.records
+                records = islice(records, checkpoint.records, None)
+            elif checkpoint.records:
+                checkpoint.records = 0
+                checkpoint.save(update_fields=['records', 'updated_at'])
+
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            self.write_batch(batch, result)
+            if progress:
+                progress(result)
+        return result
+
+    def write_batch(self, batch, result):
+        valid = []
+        for offset, (line_no, data) in enumerate(batch):
+            errors = self.validate(data)
+            if isinstance(errors, dict):
+                result.invalid += 1
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append({
+                        'record': result.records + offset + 1, 'line': line_no, 'errors': errors,
+                    })
+            else:
+                valid.append(errors)
+
+        with transaction.atomic():
+            for task, data, task_subtasks, task_notes in valid:
+                progress.set_initial(task, task_subtasks, task_notes)
+                task.category_id = self.resolve(self.categories, Category, data['category'])
+                task.priority_id = self.resolve(self.priorities, Priority, data['priority'])
+            tasks = Task.objects.bulk_create([task for task, _, _, _ in valid])
+            subtasks, notes = [], []
+            for task, _, task_subtasks, task_notes in valid:
+                for subtask in task_subtasks:
+                    subtask.task_id = task.pk
+                    subtasks.append(subtask)
+                for note in task_notes:
+                    note.task_id = task.pk
+                    note.set_preview()
+                    notes.append(note)
+            SubTask.objects.bulk_create(subtasks)
+            Note.objects.bulk_create(notes)
+            # bulk_create skips post_save, so keep the counters, rollups, version stamps and feed in step here
+            counters.track_created(Task, tasks)
+            counters.track_created(SubTask, subtasks)
+            counters.track_created(Note, notes)
+            rollups.track_created(Task, tasks)
+            rollups.track_created(SubTask, subtasks)
+            rollups.track_created(Note, notes)
+            for model, written_rows in ((Task, tasks), (SubTask, subtasks), (Note, notes)):
+                sync.record(model, [obj.pk for obj in written_rows])
+            if tasks:
+                versions.bump(Task, SubTask, Note)
+            if self.checkpoint:
+                ImportCheckpoint.objects.filter(name=self.checkpoint).update(
+                    records=result.records + len(batch)
+                )
+
+        result.records += len(batch)
+        result.tasks += len(tasks)
+        result.subtasks += len(subtasks)
+        result.notes += len(notes)
+
+    def validate(self, data):
+        """(task, data, subtasks, notes) for a valid record, or a dict of errors."""
+        if not isinstance(data, dict):
+            return {'record': ['Not a task record.']}
+        errors = {}
+        for name in ('category', 'priority'):
+            if not isinstance(data.get(name), str) or not data[name].strip():
+                errors[name] = ['This field is required.']
+        try:
+            task = cleaned(Task, data, TASK_FIELDS, exclude=['category', 'priority'])
+        except ValidationError as e:
+            errors.update(e.message_dict)
+        children = {}
+        for key, model, fields in (('subtasks', SubTask, ['title', 'status']),
+                                   ('notes', Note, ['content'])):
+            children[key] = []
+            for i, child in enumerate(data.get(key) or []):
+                try:
+                    if not isinstance(child, dict):
+                        raise ValidationError('Not an object.')
+                    children[key].append(cleaned(model, child, fields, exclude=['task']))
+                except ValidationError as e:
+                    errors[f'{key}[{i}]'] = e.messages
+        if errors:
+            return errors
+        data = dict(data, category=data['category'].strip(), priority=data['priority'].strip())
+        return task, data, children['subtasks'], children['notes']
+
+    def resolve(self, ids, model, name):
+        if name not in ids:
+            ids[name] = model.objects.create(name=name).pk
+        return ids[name]
+
+
+class TaskImportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Import an uploaded NDJSON or CSV file (staff only).
+
+    POST the file as ``file``; ``format`` defaults from the file name.
+    Passing ``name`` checkpoints progress under that name, and ``resume=1``
+    continues a previous run with the same name.
+    """
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({'error': 'Upload a file as "file".'}, status=400)
+        fmt = request.POST.get('format') or format_for(upload.name)
+        if fmt not in READERS:
+            return JsonResponse({'error': f'Format must be one of {", ".join(READERS)}.'}, status=400)
+
+        # Large uploads are spooled to disk by Django; read them back as a text stream
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        importer = Importer(
+            checkpoint=request.POST.get('name') or None,
+            resume=request.POST.get('resume') in ('1', 'true', 'on'),
+        )
+        result = importer.run(READERS[fmt](stream))
+        return JsonResponse(result.as_dict())
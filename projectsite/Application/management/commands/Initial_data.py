@@ -1,8 +1,15 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand
+from django.db import connections, transaction
 from django.utils import timezone
 from Application.models import Category, Priority, Task, SubTask, Note, STATUS_CHOICES
+from Application import counters, progress, rollups, sync, versions
+from Application.seeding import generate_batch
 from faker import Faker
+import os
 import random
+import time
 
 class Command(BaseCommand):
     help = "Seed the database with demo Categories, Priorities, Tasks, SubTasks, and Notes."
@@ -11,9 +18,19 @@ class Command(BaseCommand):
         parser.add_argument('--tasks', type=int, default=30, help='How many tasks to create')
         parser.add_argument('--subtasks-per-task', type=int, default=2, help='How many subtasks per task')
         parser.add_argument('--notes-per-task', type=int, default=2, help='How many notes per task')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible datasets')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Generate rows in a process pool and insert them with bulk_create')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Tasks per generated batch and per transaction in --bulk mode')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Generator processes in --bulk mode')
 
     def handle(self, *args, **options):
         fake = Faker()
+        if options['seed'] is not None:
+            Faker.seed(options['seed'])
+            random.seed(options['seed'])
 
        
         priority_names = ["high", "medium", "low", "critical", "optional"]
@@ -37,6 +54,10 @@ class Command(BaseCommand):
         subtasks_per_task = options['subtasks_per_task']
         notes_per_task = options['notes_per_task']
 
+        if options['bulk']:
+            self.bulk_seed(options, priorities, categories, status_values)
+            return
+
         for _ in range(task_count):
             title = fake.sentence(nb_words=5)  
             description = fake.paragraph(nb_sentences=3) 
@@ -71,3 +92,81 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(
             f"Seeded {task_count} tasks, {subtasks_per_task} subtasks/task, {notes_per_task} notes/task."
         ))
+
+    def bulk_seed(self, options, priorities, categories, status_values):
+        task_count = options['tasks']
+        batch_size = max(1, options['batch_size'])
+        batches = [
+            (i, min(batch_size, task_count - start), options['seed'],
+             options['subtasks_per_task'], options['notes_per_task'],
+             status_values, len(priorities), len(categories))
+            for i, start in enumerate(range(0, task_count, batch_size))
+        ]
+
+        started = time.monotonic()
+        workers = max(1, options['workers'])
+        if workers == 1:
+            self.write_batches(map(generate_batch, batches), priorities, categories, batch_size, started)
+            return
+        # Workers never touch the database; don't let them inherit our connection
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = self.generate(pool, batches, window=workers * 2)
+            self.write_batches(results, priorities, categories, batch_size, started)
+
+    def generate(self, pool, batches, window):
+        # Yield batches in submission order (so --seed output is deterministic)
+        # while keeping at most `window` generated batches in memory.
+        pending = deque()
+        for args in batches:
+            pending.append(pool.submit(generate_batch, args))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def write_batches(self, results, priorities, categories, batch_size, started):
+        written = 0
+        for rows in results:
+            with transaction.atomic():
+                tasks, subtasks, notes = [], [], []
+                for (title, description, status, deadline, priority, category), task_subtasks, task_notes in rows:
+                    task = Task(
+                        title=title,
+                        description=description,
+                        status=status,
+                        deadline=timezone.make_aware(deadline),
+                        priority=priorities[priority],
+                        category=categories[category],
+                    )
+                    children = [SubTask(task=task, title=name, status=state) for name, state in task_subtasks]
+                    task_notes = [Note(task=task, content=content) for content in task_notes]
+                    for note in task_notes:
+                        note.set_preview()
+                    progress.set_initial(task, children, task_notes)
+                    tasks.append(task)
+                    subtasks += children
+                    notes += task_notes
+                Task.objects.bulk_create(tasks, batch_size=batch_size)
+                SubTask.objects.bulk_create(subtasks, batch_size=batch_size)
+                Note.objects.bulk_create(notes, batch_size=batch_size)
+                # bulk_create skips post_save, so keep the counters, rollups, version stamps and feed in step here
+                counters.track_created(Task, tasks)
+                counters.track_created(SubTask, subtasks)
+                counters.track_created(Note, notes)
+                rollups.track_created(Task, tasks)
+                rollups.track_created(SubTask, subtasks)
+                rollups.track_created(Note, notes)
+                for model, written_rows in ((Task, tasks), (SubTask, subtasks), (Note, notes)):
+                    sync.record(model, [obj.pk for obj in written_rows])
+                versions.bump(Task, SubTask, Note)
+
+            written += len(tasks) + len(subtasks) + len(notes)
+            elapsed = max(time.monotonic() - started, 1e-9)
+            self.stdout.write(f"{written} rows in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            f"Bulk-seeded {written} rows in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)."
+        ))
+        return written
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Application import archiving
+
+class Command(BaseCommand):
+    help = "Move completed tasks, with their subtasks and notes, to the archive tables (run periodically, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Archive completed tasks not updated for this many days')
+        parser.add_argument('--chunk-size', type=int, default=settings.ARCHIVE_CHUNK_SIZE,
+                            help='Tasks moved per transaction')
+
+    def handle(self, *args, **options):
+        moved = archiving.archive_completed(days=max(0, options['days']), chunk_size=max(1, options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} completed tasks."))
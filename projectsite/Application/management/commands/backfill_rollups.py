@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from Application import rollups
+
+class Command(BaseCommand):
+    help = ("Rebuild the daily activity rollups behind the home page charts from the task, subtask "
+            "and note tables, archive included (after deploying them, or to repair drift).")
+
+    def handle(self, *args, **options):
+        rows = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily rollup rows."))
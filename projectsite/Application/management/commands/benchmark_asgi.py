@@ -0,0 +1,45 @@
+import json
+import logging
+from django.core.management.base import BaseCommand
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from Application import benchmarks
+
+class Command(BaseCommand):
+    help = ("Compare throughput of the sync views under WSGI with their async variants under ASGI, "
+            "against a seeded throwaway test database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help='Dataset size (number of tasks)')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per mode')
+        parser.add_argument('--threads', type=int, default=4, help='WSGI worker threads')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent ASGI requests')
+        parser.add_argument('--query-delay-ms', type=float, default=0,
+                            help='Sleep before every query, to simulate a slow database')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        # Every request is deliberately slow here; don't log each one
+        logging.getLogger('Application.timing').setLevel(logging.ERROR)
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            results = benchmarks.throughput(
+                options['size'], options['requests'], options['threads'],
+                options['concurrency'], options['query_delay_ms'],
+            )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'mode':<6}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for r in results:
+            self.stdout.write(
+                f"{r['mode']:<6}{r['concurrency']:>6}{r['requests_per_s']:>10.1f}"
+                f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['errors']:>8}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from Application import benchmarks
+
+class Command(BaseCommand):
+    help = ("Compare read/write throughput of the development and production database profiles "
+            "with concurrent readers and writers, against a seeded throwaway test database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help='Dataset size (number of tasks)')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per profile')
+        parser.add_argument('--readers', type=int, default=4, help='Reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Writer threads')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = connections['default'].settings_dict
+            if db['ENGINE'] == 'django.db.backends.sqlite3':
+                # The default in-memory test database can't show journal-mode effects
+                db['TEST']['NAME'] = os.path.join(tmp, 'benchmark.sqlite3')
+            setup_test_environment()
+            runner = DiscoverRunner(verbosity=0, interactive=False)
+            old_config = runner.setup_databases()
+            try:
+                benchmarks.seed(options['size'])
+                results = benchmarks.db_concurrency(options['duration'], options['readers'], options['writers'])
+            finally:
+                runner.teardown_databases(old_config)
+                teardown_test_environment()
+
+        self.stdout.write(
+            f"{'profile':<12}{'readers':>8}{'writers':>8}{'reads/s':>10}{'writes/s':>10}"
+            f"{'read p95':>10}{'write p95':>10}{'errors':>8}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r['profile']:<12}{r['readers']:>8}{r['writers']:>8}{r['reads_per_s']:>10.1f}"
+                f"{r['writes_per_s']:>10.1f}{r['read_p95_ms'] or 0:>10.2f}{r['write_p95_ms'] or 0:>10.2f}"
+                f"{r['errors']:>8}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
@@ -0,0 +1,90 @@
+import json
+import platform
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from Application import benchmarks
+
+class Command(BaseCommand):
+    help = ("Benchmark every view against seeded datasets in a throwaway test database, "
+            "report queries / SQL time / wall time, and check the committed query budgets.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000],
+                            help='Dataset sizes (number of tasks) to benchmark')
+        parser.add_argument('--only', nargs='+', help='Only run these cases, e.g. task-list home')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--baseline', help='Earlier JSON report to compare against')
+        parser.add_argument('--check', action='store_true', help='Fail if any view is over budget')
+        parser.add_argument('--update-budgets', action='store_true',
+                            help='Rewrite the budget file with the largest query counts measured')
+
+    def handle(self, *args, **options):
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'sizes': {},
+        }
+        budgets = benchmarks.load_budgets()
+        problems = []
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        try:
+            for size in options['sizes']:
+                old_config = runner.setup_databases()
+                try:
+                    results = benchmarks.run(size, only=options['only'])
+                finally:
+                    runner.teardown_databases(old_config)
+                report['sizes'][str(size)] = results
+                problems += [f"[{size}] {p}" for p in benchmarks.over_budget(results, budgets)]
+                self.print_results(size, results)
+        finally:
+            teardown_test_environment()
+
+        if options['update_budgets']:
+            self.update_budgets(budgets, report)
+            problems = []
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                self.print_comparison(json.load(f), report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        for problem in problems:
+            self.stderr.write(problem)
+        if options['check'] and problems:
+            raise CommandError(f"{len(problems)} view(s) over budget.")
+        self.stdout.write(self.style.SUCCESS("All views within budget." if not problems else "Done."))
+
+    def update_budgets(self, budgets, report):
+        for results in report['sizes'].values():
+            for name, m in results.items():
+                budget = budgets.setdefault(name, {'queries': 0})
+                budget['queries'] = max(budget['queries'], m['queries'])
+        with open(benchmarks.BUDGET_FILE, 'w') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write('\n')
+        self.stdout.write(f"Budgets written to {benchmarks.BUDGET_FILE}")
+
+    def print_results(self, size, results):
+        self.stdout.write(f"\n{size} tasks")
+        self.stdout.write(f"{'case':<24}{'status':>7}{'queries':>9}{'sql ms':>10}{'wall ms':>10}")
+        for name, m in results.items():
+            self.stdout.write(f"{name:<24}{m['status']:>7}{m['queries']:>9}{m['sql_ms']:>10.2f}{m['wall_ms']:>10.2f}")
+
+    def print_comparison(self, baseline, report):
+        self.stdout.write("\nChange vs baseline (queries, wall ms)")
+        for size, results in report['sizes'].items():
+            before = baseline.get('sizes', {}).get(size, {})
+            for name, m in results.items():
+                if name not in before:
+                    continue
+                dq = m['queries'] - before[name]['queries']
+                dw = m['wall_ms'] - before[name]['wall_ms']
+                self.stdout.write(f"[{size}] {name:<24}{dq:>+6}{dw:>+10.2f}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from Application import exporting
+
+
+class Command(BaseCommand):
+    help = "Stream all tasks with their subtasks and notes as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exporting.FORMATS), default='ndjson')
+        parser.add_argument('--q', default='', help="Search filter, as on the task list.")
+        parser.add_argument('--sort-by', default='', help="Sort order, as on the task list.")
+        parser.add_argument('--chunk-size', type=int, default=exporting.CHUNK_SIZE)
+        parser.add_argument('--output', help="File to write to (default: stdout).")
+
+    def handle(self, *args, **options):
+        lines = exporting.export_lines(
+            options['format'], options['q'], options['sort_by'], options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                count = self.write(f, lines)
+            self.stderr.write(f"Wrote {count} lines to {options['output']}.")
+        else:
+            self.write(self.stdout, lines)
+
+    def write(self, stream, lines):
+        count = 0
+        for line in lines:
+            if stream is self.stdout:
+                stream.write(line, ending='')
+            else:
+                stream.write(line)
+            count += 1
+        return count
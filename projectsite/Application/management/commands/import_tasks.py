@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from Application import importing
+
+
+class Command(BaseCommand):
+    help = "Import tasks with their subtasks and notes from an NDJSON or CSV file (as written by export_tasks)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or - for stdin.")
+        parser.add_argument('--format', choices=sorted(importing.READERS),
+                            help="Input format (default: from the file extension, else ndjson).")
+        parser.add_argument('--batch-size', type=int, default=importing.BATCH_SIZE,
+                            help="Records per validation batch and per transaction.")
+        parser.add_argument('--name', help="Checkpoint name (default: the path).")
+        parser.add_argument('--resume', action='store_true',
+                            help="Skip the records committed by a previous run with the same name.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or importing.format_for(path)
+        importer = importing.Importer(
+            batch_size=options['batch_size'],
+            checkpoint=options['name'] or (None if path == '-' else path),
+            resume=options['resume'],
+        )
+        if options['resume'] and importer.checkpoint is None:
+            raise CommandError("--resume needs --name when reading from stdin.")
+
+        if path == '-':
+            result = importer.run(importing.READERS[fmt](sys.stdin), progress=self.progress)
+        else:
+            with open(path, newline='', encoding='utf-8') as f:
+                result = importer.run(importing.READERS[fmt](f), progress=self.progress)
+
+        for error in result.errors:
+            self.stderr.write(f"Record {error['record']} (line {error['line']}): {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.tasks} tasks, {result.subtasks} subtasks and {result.notes} notes "
+            f"({result.rows_per_second:,.0f} rows/s); {result.invalid} invalid records skipped."
+        ))
+
+    def progress(self, result):
+        self.stdout.write(f"{result.records} records, {result.rows} rows ({result.rows_per_second:,.0f} rows/s)")
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Application import sync
+
+class Command(BaseCommand):
+    help = "Delete changes-feed log rows (deletes included) older than SYNC_TOMBSTONE_DAYS (run periodically, e.g. from cron)."
+
+    def handle(self, *args, **options):
+        deleted = sync.purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {deleted} changes-feed log rows older than {settings.SYNC_TOMBSTONE_DAYS} days."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from Application import counters
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard counters from the base tables (run periodically, e.g. from cron)."
+
+    def handle(self, *args, **options):
+        totals = counters.reconcile()
+        for name in sorted(totals):
+            self.stdout.write(f"{name}: {totals[name]}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(totals)} counters."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from Application import progress
+
+class Command(BaseCommand):
+    help = "Recompute each task's subtask and note counts from the base tables, fixing any that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Tasks checked per transaction')
+
+    def handle(self, *args, **options):
+        fixed = progress.repair(chunk_size=max(1, options['chunk_size']))
+        self.stdout.write(self.style.SUCCESS(f"Repaired the counts of {fixed} tasks."))
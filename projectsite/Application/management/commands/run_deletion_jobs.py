@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Application import deletion
+
+class Command(BaseCommand):
+    help = "Resume background deletes that have stopped making progress (run periodically, e.g. from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.DELETION_BATCH_SIZE,
+                            help='Rows deleted per transaction')
+
+    def handle(self, *args, **options):
+        finished = 0
+        for job in deletion.resumable():
+            if not deletion.claim(job):
+                continue
+            self.stdout.write(f"Resuming {job}")
+            job = deletion.run(job, batch_size=max(1, options['batch_size']))
+            self.stdout.write(f"Deleted {job.model} {job.object_id}: {job.deleted} rows.")
+            finished += 1
+        self.stdout.write(self.style.SUCCESS(f"Finished {finished} deletion jobs."))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from Application import deadlines
+
+class Command(BaseCommand):
+    help = "Create due-soon and overdue notifications for tasks crossing their deadline thresholds, every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between passes')
+        parser.add_argument('--once', action='store_true', help='Run a single pass and exit (e.g. from cron)')
+
+    def handle(self, *args, **options):
+        while True:
+            found = deadlines.scan()
+            purged = deadlines.purge()
+            self.stdout.write(
+                f"{found['due_soon']} tasks due soon, {found['overdue']} overdue; "
+                f"purged {purged} old notifications."
+            )
+            if options['once']:
+                return
+            time.sleep(max(1, options['interval']))
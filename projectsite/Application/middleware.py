@@ -0,0 +1,171 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('Application.timing')
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistograms:
+    """In-process latency histograms per URL name, shared by all threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def observe(self, name, total_ms, db_ms, queries):
+        with self.lock:
+            entry = self.data.get(name)
+            if entry is None:
+                entry = self.data[name] = {
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'db_ms': 0.0,
+                    'queries': 0,
+                    'max_ms': 0.0,
+                    'buckets': [0] * (len(BUCKETS_MS) + 1),
+                }
+            entry['count'] += 1
+            entry['total_ms'] += total_ms
+            entry['db_ms'] += db_ms
+            entry['queries'] += queries
+            entry['max_ms'] = max(entry['max_ms'], total_ms)
+            entry['buckets'][bisect_left(BUCKETS_MS, total_ms)] += 1
+
+    def snapshot(self):
+        with self.lock:
+            result = {}
+            for name, entry in self.data.items():
+                labels = [f'le_{bound}' for bound in BUCKETS_MS] + ['le_inf']
+                result[name] = {
+                    'count': entry['count'],
+                    'avg_ms': round(entry['total_ms'] / entry['count'], 3),
+                    'avg_db_ms': round(entry['db_ms'] / entry['count'], 3),
+                    'avg_queries': round(entry['queries'] / entry['count'], 2),
+                    'max_ms': round(entry['max_ms'], 3),
+                    'buckets': dict(zip(labels, entry['buckets'])),
+                }
+            return result
+
+    def reset(self):
+        with self.lock:
+            self.data.clear()
+
+
+histograms = LatencyHistograms()
+
+
+class QueryRecorder:
+    """connection.execute_wrapper callable that times every query."""
+
+    def __init__(self, keep=3):
+        self.keep = keep
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []  # min-heap of (duration, sql)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.total += duration
+            item = (duration, sql[:500])
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, item)
+            elif item > self.slowest[0]:
+                heapq.heapreplace(self.slowest, item)
+
+
+class RequestTimingMiddleware:
+    """Times each request's SQL, template rendering and total duration.
+
+    Adds a Server-Timing header, logs requests slower than
+    REQUEST_TIMING_SLOW_MS with their slowest SQL, and feeds the per-URL-name
+    histograms served by MetricsView.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'REQUEST_TIMING_SLOW_MS', 500)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, recorder = self.start(request)
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, started, recorder)
+
+    async def __acall__(self, request):
+        started, recorder = self.start(request)
+        # Under ASGI the request's queries run on its own sync thread (and that
+        # thread's connection), so the wrapper has to be installed over there
+        await sync_to_async(lambda: connection.execute_wrappers.append(recorder))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(lambda: connection.execute_wrappers.remove(recorder))()
+        return self.finish(request, response, started, recorder)
+
+    def start(self, request):
+        recorder = QueryRecorder()
+        request._timing = {'recorder': recorder, 'template': 0.0}
+        return time.perf_counter(), recorder
+
+    def finish(self, request, response, started, recorder):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.total * 1000
+        template_ms = request._timing['template'] * 1000
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries"',
+            f'tpl;dur={template_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.url_name if match and match.url_name else '<unresolved>'
+        histograms.observe(name, total_ms, db_ms, recorder.count)
+
+        if total_ms >= self.slow_ms:
+            slowest = sorted(recorder.slowest, reverse=True)
+            logger.warning(
+                "Slow request %s %s (%s): %.1f ms total, %.1f ms in %d queries. Slowest SQL:\n%s",
+                request.method, request.path, name, total_ms, db_ms, recorder.count,
+                '\n'.join(f'  {d * 1000:.1f} ms: {sql}' for d, sql in slowest),
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, '_timing', None)
+        if timing is None:
+            return response
+        render = response.render
+        recorder = timing['recorder']
+
+        def timed_render():
+            # Lazy querysets evaluated while rendering count as db time, not template time
+            started, db_before = time.perf_counter(), recorder.total
+            try:
+                return render()
+            finally:
+                timing['template'] += (time.perf_counter() - started) - (recorder.total - db_before)
+
+        response.render = timed_render
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:05
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Counter = apps.get_model('Application', 'Counter')
+    for name in ('category', 'priority', 'task', 'subtask', 'note'):
+        model = apps.get_model('Application', name)
+        Counter.objects.create(name=name, value=model.objects.count())
+        if name in ('task', 'subtask', 'note'):
+            rows = model.objects.values('created_at__year').annotate(n=Count('pk')).order_by()
+            for row in rows:
+                Counter.objects.create(name=f"{name}:{row['created_at__year']}", value=row['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,245 @@
+from django.db import migrations
+
+# Full-text search index for the list views' ``q`` parameter.
+#
+# SQLite: one FTS5 table per model, keyed by rowid = object id and kept in
+# sync by triggers. Postgres: one tsvector table per model with a GIN index,
+# kept in sync by plpgsql triggers. Other backends fall back to icontains
+# (see Application/search.py) so nothing is created for them.
+
+SQLITE_FORWARD = [
+    # Tables
+    'CREATE VIRTUAL TABLE "Application_category_fts" USING fts5(name)',
+    'CREATE VIRTUAL TABLE "Application_priority_fts" USING fts5(name)',
+    'CREATE VIRTUAL TABLE "Application_task_fts" USING fts5(title, description, status, priority, category)',
+    'CREATE VIRTUAL TABLE "Application_subtask_fts" USING fts5(title, status, task)',
+    'CREATE VIRTUAL TABLE "Application_note_fts" USING fts5(content, task)',
+
+    # Category
+    '''CREATE TRIGGER "Application_category_fts_ai" AFTER INSERT ON "Application_category" BEGIN
+        INSERT INTO "Application_category_fts"(rowid, name) VALUES (new.id, new.name);
+    END''',
+    '''CREATE TRIGGER "Application_category_fts_au" AFTER UPDATE OF name ON "Application_category"
+    WHEN old.name IS NOT new.name BEGIN
+        UPDATE "Application_category_fts" SET name = new.name WHERE rowid = new.id;
+        UPDATE "Application_task_fts" SET category = new.name
+            WHERE rowid IN (SELECT id FROM "Application_task" WHERE category_id = new.id);
+    END''',
+    '''CREATE TRIGGER "Application_category_fts_ad" AFTER DELETE ON "Application_category" BEGIN
+        DELETE FROM "Application_category_fts" WHERE rowid = old.id;
+    END''',
+
+    # Priority
+    '''CREATE TRIGGER "Application_priority_fts_ai" AFTER INSERT ON "Application_priority" BEGIN
+        INSERT INTO "Application_priority_fts"(rowid, name) VALUES (new.id, new.name);
+    END''',
+    '''CREATE TRIGGER "Application_priority_fts_au" AFTER UPDATE OF name ON "Application_priority"
+    WHEN old.name IS NOT new.name BEGIN
+        UPDATE "Application_priority_fts" SET name = new.name WHERE rowid = new.id;
+        UPDATE "Application_task_fts" SET priority = new.name
+            WHERE rowid IN (SELECT id FROM "Application_task" WHERE priority_id = new.id);
+    END''',
+    '''CREATE TRIGGER "Application_priority_fts_ad" AFTER DELETE ON "Application_priority" BEGIN
+        DELETE FROM "Application_priority_fts" WHERE rowid = old.id;
+    END''',
+
+    # Task
+    '''CREATE TRIGGER "Application_task_fts_ai" AFTER INSERT ON "Application_task" BEGIN
+        INSERT INTO "Application_task_fts"(rowid, title, description, status, priority, category) VALUES (
+            new.id, new.title, new.description, new.status,
+            (SELECT name FROM "Application_priority" WHERE id = new.priority_id),
+            (SELECT name FROM "Application_category" WHERE id = new.category_id)
+        );
+    END''',
+    '''CREATE TRIGGER "Application_task_fts_au" AFTER UPDATE ON "Application_task" BEGIN
+        UPDATE "Application_task_fts" SET
+            title = new.title,
+            description = new.description,
+            status = new.status,
+            priority = (SELECT name FROM "Application_priority" WHERE id = new.priority_id),
+            category = (SELECT name FROM "Application_category" WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END''',
+    '''CREATE TRIGGER "Application_task_fts_title_au" AFTER UPDATE OF title ON "Application_task"
+    WHEN old.title IS NOT new.title BEGIN
+        UPDATE "Application_subtask_fts" SET task = new.title
+            WHERE rowid IN (SELECT id FROM "Application_subtask" WHERE task_id = new.id);
+        UPDATE "Application_note_fts" SET task = new.title
+            WHERE rowid IN (SELECT id FROM "Application_note" WHERE task_id = new.id);
+    END''',
+    '''CREATE TRIGGER "Application_task_fts_ad" AFTER DELETE ON "Application_task" BEGIN
+        DELETE FROM "Application_task_fts" WHERE rowid = old.id;
+    END''',
+
+    # SubTask
+    '''CREATE TRIGGER "Application_subtask_fts_ai" AFTER INSERT ON "Application_subtask" BEGIN
+        INSERT INTO "Application_subtask_fts"(rowid, title, status, task) VALUES (
+            new.id, new.title, new.status,
+            (SELECT title FROM "Application_task" WHERE id = new.task_id)
+        );
+    END''',
+    '''CREATE TRIGGER "Application_subtask_fts_au" AFTER UPDATE ON "Application_subtask" BEGIN
+        UPDATE "Application_subtask_fts" SET
+            title = new.title,
+            status = new.status,
+            task = (SELECT title FROM "Application_task" WHERE id = new.task_id)
+        WHERE rowid = new.id;
+    END''',
+    '''CREATE TRIGGER "Application_subtask_fts_ad" AFTER DELETE ON "Application_subtask" BEGIN
+        DELETE FROM "Application_subtask_fts" WHERE rowid = old.id;
+    END''',
+
+    # Note
+    '''CREATE TRIGGER "Application_note_fts_ai" AFTER INSERT ON "Application_note" BEGIN
+        INSERT INTO "Application_note_fts"(rowid, content, task) VALUES (
+            new.id, new.content,
+            (SELECT title FROM "Application_task" WHERE id = new.task_id)
+        );
+    END''',
+    '''CREATE TRIGGER "Application_note_fts_au" AFTER UPDATE ON "Application_note" BEGIN
+        UPDATE "Application_note_fts" SET
+            content = new.content,
+            task = (SELECT title FROM "Application_task" WHERE id = new.task_id)
+        WHERE rowid = new.id;
+    END''',
+    '''CREATE TRIGGER "Application_note_fts_ad" AFTER DELETE ON "Application_note" BEGIN
+        DELETE FROM "Application_note_fts" WHERE rowid = old.id;
+    END''',
+
+    # Backfill existing rows
+    '''INSERT INTO "Application_category_fts"(rowid, name) SELECT id, name FROM "Application_category"''',
+    '''INSERT INTO "Application_priority_fts"(rowid, name) SELECT id, name FROM "Application_priority"''',
+    '''INSERT INTO "Application_task_fts"(rowid, title, description, status, priority, category)
+        SELECT t.id, t.title, t.description, t.status, p.name, c.name
+        FROM "Application_task" t
+        JOIN "Application_priority" p ON p.id = t.priority_id
+        JOIN "Application_category" c ON c.id = t.category_id''',
+    '''INSERT INTO "Application_subtask_fts"(rowid, title, status, task)
+        SELECT s.id, s.title, s.status, t.title
+        FROM "Application_subtask" s JOIN "Application_task" t ON t.id = s.task_id''',
+    '''INSERT INTO "Application_note_fts"(rowid, content, task)
+        SELECT n.id, n.content, t.title
+        FROM "Application_note" n JOIN "Application_task" t ON t.id = n.task_id''',
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS "Application_%s_fts_%s"' % (model, suffix)
+    for model in ('category', 'priority', 'task', 'subtask', 'note')
+    for suffix in ('ai', 'au', 'ad')
+] + [
+    'DROP TRIGGER IF EXISTS "Application_task_fts_title_au"',
+] + [
+    'DROP TABLE IF EXISTS "Application_%s_fts"' % model
+    for model in ('category', 'priority', 'task', 'subtask', 'note')
+]
+
+# Postgres: SELECT that builds (id, document) rows for each model. The trigger
+# functions upsert the rows matching a WHERE clause, so related-name changes
+# reuse the same SQL.
+PG_DOCUMENTS = {
+    'category': '''SELECT c.id, to_tsvector('simple', c.name)
+        FROM "Application_category" c WHERE %s''',
+    'priority': '''SELECT p.id, to_tsvector('simple', p.name)
+        FROM "Application_priority" p WHERE %s''',
+    'task': '''SELECT t.id, to_tsvector('simple', concat_ws(' ', t.title, t.description, t.status, p.name, c.name))
+        FROM "Application_task" t
+        JOIN "Application_priority" p ON p.id = t.priority_id
+        JOIN "Application_category" c ON c.id = t.category_id
+        WHERE %s''',
+    'subtask': '''SELECT s.id, to_tsvector('simple', concat_ws(' ', s.title, s.status, t.title))
+        FROM "Application_subtask" s JOIN "Application_task" t ON t.id = s.task_id WHERE %s''',
+    'note': '''SELECT n.id, to_tsvector('simple', concat_ws(' ', n.content, t.title))
+        FROM "Application_note" n JOIN "Application_task" t ON t.id = n.task_id WHERE %s''',
+}
+
+# Documents of other models that embed a column of this one:
+# (watched column, [(dependent model, WHERE clause), ...])
+PG_DEPENDENTS = {
+    'category': ('name', [('task', 't.category_id = NEW.id')]),
+    'priority': ('name', [('task', 't.priority_id = NEW.id')]),
+    'task': ('title', [('subtask', 's.task_id = NEW.id'), ('note', 'n.task_id = NEW.id')]),
+}
+
+PG_ALIASES = {'category': 'c', 'priority': 'p', 'task': 't', 'subtask': 's', 'note': 'n'}
+
+
+def pg_upsert(model, where):
+    return '''INSERT INTO "Application_%s_fts"(id, document) %s
+        ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document;''' % (model, PG_DOCUMENTS[model] % where)
+
+
+def pg_forward():
+    statements = []
+    for model in PG_DOCUMENTS:
+        statements.append(
+            'CREATE TABLE "Application_%s_fts" (id bigint PRIMARY KEY, document tsvector NOT NULL)' % model
+        )
+        statements.append(
+            'CREATE INDEX "Application_%s_fts_document" ON "Application_%s_fts" USING GIN (document)' % (model, model)
+        )
+    for model, alias in PG_ALIASES.items():
+        body = [pg_upsert(model, '%s.id = NEW.id' % alias)]
+        if model in PG_DEPENDENTS:
+            column, dependents = PG_DEPENDENTS[model]
+            body.append("IF TG_OP = 'UPDATE' AND NEW.%s IS DISTINCT FROM OLD.%s THEN" % (column, column))
+            body += [pg_upsert(dependent, where) for dependent, where in dependents]
+            body.append('END IF;')
+        statements.append('''CREATE FUNCTION "Application_%s_fts_sync"() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM "Application_%s_fts" WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            %s
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql''' % (model, model, '\n            '.join(body)))
+        statements.append('''CREATE TRIGGER "Application_%s_fts_sync"
+            AFTER INSERT OR UPDATE OR DELETE ON "Application_%s"
+            FOR EACH ROW EXECUTE FUNCTION "Application_%s_fts_sync"()''' % (model, model, model))
+        statements.append(pg_upsert(model, 'TRUE').rstrip(';'))
+    return statements
+
+
+def pg_reverse():
+    statements = []
+    for model in PG_ALIASES:
+        statements.append('DROP TRIGGER IF EXISTS "Application_%s_fts_sync" ON "Application_%s"' % (model, model))
+        statements.append('DROP FUNCTION IF EXISTS "Application_%s_fts_sync"()' % model)
+        statements.append('DROP TABLE IF EXISTS "Application_%s_fts"' % model)
+    return statements
+
+
+def run(statements_for):
+    def apply(apps, schema_editor):
+        statements = statements_for(schema_editor.connection.vendor)
+        for sql in statements:
+            schema_editor.execute(sql, params=None)
+    return apply
+
+
+def forward_statements(vendor):
+    if vendor == 'sqlite':
+        return SQLITE_FORWARD
+    if vendor == 'postgresql':
+        return pg_forward()
+    return []
+
+
+def reverse_statements(vendor):
+    if vendor == 'sqlite':
+        return SQLITE_REVERSE
+    if vendor == 'postgresql':
+        return pg_reverse()
+    return []
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0002_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(forward_statements), run(reverse_statements)),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['name', 'id'], name='category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['created_at', 'id'], name='note_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['task', 'created_at'], name='note_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priority',
+            index=models.Index(fields=['name', 'id'], name='priority_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['title', 'id'], name='subtask_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['status', 'id'], name='subtask_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['created_at', 'id'], name='subtask_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['task', 'created_at'], name='subtask_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['title', 'id'], name='task_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'id'], name='task_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['deadline', 'id'], name='task_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['category', 'id'], name='task_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['priority', 'id'], name='task_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0004_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
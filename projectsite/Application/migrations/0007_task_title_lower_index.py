@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:31
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0006_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(django.db.models.functions.text.Lower('title'), models.F('id'), name='task_title_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:33
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite adds these columns by rebuilding Application_task, and the rebuild
+# fails while the full-text triggers from 0003_search_index still refer to the
+# table, so they are dropped first and recreated afterwards. The recreated
+# task update trigger only fires for the indexed columns, so counter updates
+# (the backfill below and every subtask/note write after it) no longer
+# rewrite the task's search document. Postgres gets the same column list.
+search_index = import_module('Application.migrations.0003_search_index')
+
+INDEXED_COLUMNS = 'title, description, status, priority_id, category_id'
+TASK_UPDATE = 'AFTER UPDATE ON "Application_task"'
+
+SQLITE_TRIGGERS = [sql for sql in search_index.SQLITE_FORWARD if sql.startswith('CREATE TRIGGER')]
+SQLITE_DROP_TRIGGERS = [sql for sql in search_index.SQLITE_REVERSE if sql.startswith('DROP TRIGGER')]
+SQLITE_RESTRICTED_TRIGGERS = [
+    sql.replace(TASK_UPDATE, 'AFTER UPDATE OF %s ON "Application_task"' % INDEXED_COLUMNS)
+    for sql in SQLITE_TRIGGERS
+]
+
+
+def pg_task_trigger(update):
+    return [
+        'DROP TRIGGER IF EXISTS "Application_task_fts_sync" ON "Application_task"',
+        '''CREATE TRIGGER "Application_task_fts_sync"
+            AFTER INSERT OR %s OR DELETE ON "Application_task"
+            FOR EACH ROW EXECUTE FUNCTION "Application_task_fts_sync"()''' % update,
+    ]
+
+
+def drop_statements(vendor):
+    return SQLITE_DROP_TRIGGERS if vendor == 'sqlite' else []
+
+
+def original_statements(vendor):
+    return SQLITE_TRIGGERS if vendor == 'sqlite' else []
+
+
+def restricted_statements(vendor):
+    if vendor == 'sqlite':
+        return SQLITE_RESTRICTED_TRIGGERS
+    if vendor == 'postgresql':
+        return pg_task_trigger('UPDATE OF %s' % INDEXED_COLUMNS)
+    return []
+
+
+def unrestricted_statements(vendor):
+    # SQLite's triggers come back with the original definitions once the
+    # columns are gone again (see the first operation)
+    if vendor == 'sqlite':
+        return SQLITE_DROP_TRIGGERS
+    if vendor == 'postgresql':
+        return pg_task_trigger('UPDATE')
+    return []
+
+
+BACKFILL = [
+    '''UPDATE "Application_task" SET
+        subtask_count = (SELECT COUNT(*) FROM "Application_subtask" s
+                         WHERE s.task_id = "Application_task".id),
+        subtasks_done = (SELECT COUNT(*) FROM "Application_subtask" s
+                         WHERE s.task_id = "Application_task".id AND s.status = 'Completed'),
+        note_count = (SELECT COUNT(*) FROM "Application_note" n
+                      WHERE n.task_id = "Application_task".id)''',
+    '''UPDATE "Application_task" SET progress = CASE
+        WHEN subtask_count > 0 THEN subtasks_done * 100 / subtask_count ELSE 0 END''',
+]
+
+
+def backfill(apps, schema_editor):
+    for sql in BACKFILL:
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0007_task_title_lower_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(search_index.run(drop_statements), search_index.run(original_statements)),
+        migrations.AddField(
+            model_name='task',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtask_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtasks_done',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['progress', 'id'], name='task_progress_idx'),
+        ),
+        migrations.RunPython(search_index.run(restricted_statements), search_index.run(unrestricted_statements)),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0008_task_progress_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['updated_at', 'id'], name='note_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['updated_at', 'id'], name='subtask_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,163 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Full-text index over archived tasks for ArchiveListView, built like the ones
+# in 0003_search_index. Archived rows are only ever inserted and deleted, so
+# besides those the triggers only follow priority/category renames.
+
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE "Application_archivedtask_fts" USING fts5(title, description, status, priority, category)',
+    '''CREATE TRIGGER "Application_archivedtask_fts_ai" AFTER INSERT ON "Application_archivedtask" BEGIN
+        INSERT INTO "Application_archivedtask_fts"(rowid, title, description, status, priority, category) VALUES (
+            new.id, new.title, new.description, new.status,
+            (SELECT name FROM "Application_priority" WHERE id = new.priority_id),
+            (SELECT name FROM "Application_category" WHERE id = new.category_id)
+        );
+    END''',
+    '''CREATE TRIGGER "Application_archivedtask_fts_ad" AFTER DELETE ON "Application_archivedtask" BEGIN
+        DELETE FROM "Application_archivedtask_fts" WHERE rowid = old.id;
+    END''',
+    '''CREATE TRIGGER "Application_category_archive_fts_au" AFTER UPDATE OF name ON "Application_category"
+    WHEN old.name IS NOT new.name BEGIN
+        UPDATE "Application_archivedtask_fts" SET category = new.name
+            WHERE rowid IN (SELECT id FROM "Application_archivedtask" WHERE category_id = new.id);
+    END''',
+    '''CREATE TRIGGER "Application_priority_archive_fts_au" AFTER UPDATE OF name ON "Application_priority"
+    WHEN old.name IS NOT new.name BEGIN
+        UPDATE "Application_archivedtask_fts" SET priority = new.name
+            WHERE rowid IN (SELECT id FROM "Application_archivedtask" WHERE priority_id = new.id);
+    END''',
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS "Application_priority_archive_fts_au"',
+    'DROP TRIGGER IF EXISTS "Application_category_archive_fts_au"',
+    'DROP TRIGGER IF EXISTS "Application_archivedtask_fts_ad"',
+    'DROP TRIGGER IF EXISTS "Application_archivedtask_fts_ai"',
+    'DROP TABLE IF EXISTS "Application_archivedtask_fts"',
+]
+
+PG_UPSERT = '''INSERT INTO "Application_archivedtask_fts"(id, document)
+            SELECT t.id, to_tsvector('simple', concat_ws(' ', t.title, t.description, t.status, p.name, c.name))
+            FROM "Application_archivedtask" t
+            JOIN "Application_priority" p ON p.id = t.priority_id
+            JOIN "Application_category" c ON c.id = t.category_id
+            WHERE %s
+            ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document;'''
+
+PG_FORWARD = [
+    'CREATE TABLE "Application_archivedtask_fts" (id bigint PRIMARY KEY, document tsvector NOT NULL)',
+    'CREATE INDEX "Application_archivedtask_fts_document" ON "Application_archivedtask_fts" USING GIN (document)',
+    '''CREATE FUNCTION "Application_archivedtask_fts_sync"() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM "Application_archivedtask_fts" WHERE id = OLD.id;
+                RETURN OLD;
+            END IF;
+            %s
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql''' % (PG_UPSERT % 't.id = NEW.id'),
+    '''CREATE TRIGGER "Application_archivedtask_fts_sync"
+            AFTER INSERT OR DELETE ON "Application_archivedtask"
+            FOR EACH ROW EXECUTE FUNCTION "Application_archivedtask_fts_sync"()''',
+    # Shared by the priority and category triggers; TG_ARGV[0] is the FK column
+    '''CREATE FUNCTION "Application_archivedtask_fts_rename"() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.name IS DISTINCT FROM OLD.name THEN
+                %s
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql''' % (PG_UPSERT % "(CASE TG_ARGV[0] WHEN 'priority_id' THEN t.priority_id ELSE t.category_id END) = NEW.id"),
+] + [
+    '''CREATE TRIGGER "Application_%s_archive_fts_rename"
+            AFTER UPDATE OF name ON "Application_%s"
+            FOR EACH ROW EXECUTE FUNCTION "Application_archivedtask_fts_rename"('%s_id')''' % (model, model, model)
+    for model in ('priority', 'category')
+]
+
+PG_REVERSE = [
+    'DROP TRIGGER IF EXISTS "Application_%s_archive_fts_rename" ON "Application_%s"' % (model, model)
+    for model in ('priority', 'category')
+] + [
+    'DROP FUNCTION IF EXISTS "Application_archivedtask_fts_rename"()',
+    'DROP TRIGGER IF EXISTS "Application_archivedtask_fts_sync" ON "Application_archivedtask"',
+    'DROP FUNCTION IF EXISTS "Application_archivedtask_fts_sync"()',
+    'DROP TABLE IF EXISTS "Application_archivedtask_fts"',
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql, params=None)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0009_sync_changes_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=50)),
+                ('deadline', models.DateTimeField(blank=True, null=True)),
+                ('subtask_count', models.PositiveIntegerField(default=0)),
+                ('subtasks_done', models.PositiveIntegerField(default=0)),
+                ('note_count', models.PositiveIntegerField(default=0)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='Application.category')),
+                ('priority', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='Application.priority')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedSubTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=50)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subtasks', to='Application.archivedtask')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedNote',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='Application.archivedtask')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['updated_at', 'id'], name='archivedtask_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['title', 'id'], name='archivedtask_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['created_at', 'id'], name='archivedtask_created_idx'),
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': PG_FORWARD}),
+            run({'sqlite': SQLITE_REVERSE, 'postgresql': PG_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.24 on 2026-10-18 18:54
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite adds the deleting columns by rebuilding the category, priority and
+# task tables; as in 0008, the full-text triggers (0008's and 0010's) have to
+# be dropped around the rebuild and are recreated unchanged afterwards.
+progress_counters = import_module('Application.migrations.0008_task_progress_counters')
+task_archive = import_module('Application.migrations.0010_task_archive')
+
+SQLITE_TRIGGERS = progress_counters.SQLITE_RESTRICTED_TRIGGERS + [
+    sql for sql in task_archive.SQLITE_FORWARD if sql.startswith('CREATE TRIGGER')
+]
+SQLITE_DROP_TRIGGERS = progress_counters.SQLITE_DROP_TRIGGERS + [
+    sql for sql in task_archive.SQLITE_REVERSE if sql.startswith('DROP TRIGGER')
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for sql in statements:
+                schema_editor.execute(sql, params=None)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0010_task_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(SQLITE_DROP_TRIGGERS), run(SQLITE_TRIGGERS)),
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('total', models.BigIntegerField(blank=True, null=True)),
+                ('deleted', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='deleting',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='priority',
+            name='deleting',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='deleting',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(run(SQLITE_TRIGGERS), run(SQLITE_DROP_TRIGGERS)),
+    ]
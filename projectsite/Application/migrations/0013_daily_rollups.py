@@ -0,0 +1,31 @@
+# Generated by Django 4.2.24 on 2026-10-18 19:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0012_deadline_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('model', models.CharField(choices=[('task', 'Tasks'), ('subtask', 'Subtasks'), ('note', 'Notes')], max_length=10)),
+                ('status', models.CharField(blank=True, max_length=50)),
+                ('created', models.IntegerField(default=0)),
+                ('entered', models.IntegerField(default=0)),
+                ('exited', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='Application.category')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('model', 'day', 'category', 'status'), name='dailyrollup_unique'),
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 4.2.24 on 2026-10-18 19:12
+
+import re
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Status labels become small integer codes. The full-text documents keep the
+# labels, so search works as before: the triggers translate the code.
+#
+# SQLite rebuilds the tables to change the column type; as in 0011 the
+# triggers are dropped around the rebuild, then recreated translating the
+# code. Postgres alters the columns in place; its trigger functions are
+# switched to the translating versions first, which accept the old text
+# values too, so the documents stay right while the rows are converted.
+# Postgres won't change the type of a column named in a trigger's UPDATE OF
+# list, so the task trigger from 0008 is dropped around the AlterFields (the
+# labels don't change, so the task documents stay right meanwhile).
+search_index = import_module('Application.migrations.0003_search_index')
+progress_counters = import_module('Application.migrations.0008_task_progress_counters')
+task_archive = import_module('Application.migrations.0010_task_archive')
+background_deletes = import_module('Application.migrations.0011_background_deletes')
+
+LABELS = [(1, 'Pending'), (2, 'In Progress'), (3, 'Completed')]
+TABLES = ['Application_task', 'Application_subtask', 'Application_archivedtask', 'Application_archivedsubtask']
+COLUMN_RE = re.compile(r'\b(new|t|s)\.status\b')
+
+
+def label_sql(column, quote):
+    whens = ' '.join("WHEN %s THEN '%s'" % (f"'{code}'" if quote else code, label) for code, label in LABELS)
+    # ELSE keeps values that are still labels while the rows are converted
+    return 'CASE %s %s ELSE %s END' % (column, whens, f'{column}::text' if quote else column)
+
+
+def labelled(sql, quote=False):
+    return COLUMN_RE.sub(lambda m: label_sql(m.group(0), quote), sql)
+
+
+def replace_function(sql):
+    return sql.replace('CREATE FUNCTION', 'CREATE OR REPLACE FUNCTION', 1)
+
+
+PG_FUNCTIONS = [
+    sql for sql in search_index.pg_forward() + task_archive.PG_FORWARD if sql.startswith('CREATE FUNCTION')
+]
+PG_LABELLED_FUNCTIONS = [replace_function(labelled(sql, quote=True)) for sql in PG_FUNCTIONS]
+PG_ORIGINAL_FUNCTIONS = [replace_function(sql) for sql in PG_FUNCTIONS]
+SQLITE_LABELLED_TRIGGERS = [labelled(sql) for sql in background_deletes.SQLITE_TRIGGERS]
+PG_TASK_TRIGGER = progress_counters.pg_task_trigger('UPDATE OF %s' % progress_counters.INDEXED_COLUMNS)
+PG_DROP_TASK_TRIGGER = [sql for sql in PG_TASK_TRIGGER if sql.startswith('DROP TRIGGER')]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql, params=None)
+    return apply
+
+
+def convert(pairs, rollup_pairs):
+    def apply(apps, schema_editor):
+        quote = schema_editor.connection.ops.quote_name
+        for table in TABLES:
+            cases = ' '.join("WHEN '%s' THEN '%s'" % pair for pair in pairs)
+            schema_editor.execute(
+                'UPDATE %s SET status = CASE status %s ELSE status END' % (quote(table), cases), params=None,
+            )
+        cases = ' '.join("WHEN '%s' THEN '%s'" % pair for pair in rollup_pairs)
+        schema_editor.execute(
+            'UPDATE %s SET status = CASE status %s ELSE status END' % (quote('Application_dailyrollup'), cases),
+            params=None,
+        )
+    return apply
+
+
+TO_CODES = [(label, code) for code, label in LABELS]
+TO_LABELS = [(code, label) for code, label in LABELS]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0013_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({
+                'sqlite': background_deletes.SQLITE_DROP_TRIGGERS,
+                'postgresql': PG_LABELLED_FUNCTIONS + PG_DROP_TASK_TRIGGER,
+            }),
+            run({
+                'sqlite': background_deletes.SQLITE_TRIGGERS,
+                'postgresql': PG_ORIGINAL_FUNCTIONS + PG_TASK_TRIGGER,
+            }),
+        ),
+        migrations.RunPython(
+            convert(TO_CODES, TO_CODES + [('', 0)]),
+            convert(TO_LABELS, TO_LABELS + [(0, '')]),
+        ),
+        migrations.AlterField(
+            model_name='archivedsubtask',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'In Progress'), (3, 'Completed')]),
+        ),
+        migrations.AlterField(
+            model_name='archivedtask',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'In Progress'), (3, 'Completed')]),
+        ),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='status',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='subtask',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'In Progress'), (3, 'Completed')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'In Progress'), (3, 'Completed')], default=1),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['task', 'status'], name='subtask_task_status_idx'),
+        ),
+        migrations.RunPython(
+            run({'sqlite': SQLITE_LABELLED_TRIGGERS, 'postgresql': PG_TASK_TRIGGER}),
+            run({'sqlite': background_deletes.SQLITE_DROP_TRIGGERS, 'postgresql': PG_DROP_TASK_TRIGGER}),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.24 on 2026-10-18 19:16
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite rebuilds the note table to add the column, so as in 0011 and 0014
+# the triggers are dropped around the rebuild. The backfill runs before they
+# are recreated, so it doesn't reindex every note's search document.
+background_deletes = import_module('Application.migrations.0011_background_deletes')
+integer_status = import_module('Application.migrations.0014_integer_status')
+
+# Same rule as models.note_preview, with NOTE_PREVIEW_LENGTH = 200
+BACKFILL = (
+    'UPDATE "Application_note" SET preview = CASE WHEN LENGTH(content) > 200 '
+    "THEN SUBSTR(content, 1, 199) || '…' ELSE content END"
+)
+
+
+def backfill(apps, schema_editor):
+    schema_editor.execute(BACKFILL, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0014_integer_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            integer_status.run({'sqlite': background_deletes.SQLITE_DROP_TRIGGERS}),
+            integer_status.run({'sqlite': integer_status.SQLITE_LABELLED_TRIGGERS}),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='preview',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['preview', 'id'], name='note_preview_idx'),
+        ),
+        migrations.RunPython(
+            integer_status.run({'sqlite': integer_status.SQLITE_LABELLED_TRIGGERS}),
+            integer_status.run({'sqlite': background_deletes.SQLITE_DROP_TRIGGERS}),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.24 on 2026-10-18 19:33
+
+# The change log replaces the delete tombstones. Cursors issued before it
+# carry no change id, so clients holding one get 410 and sync from scratch;
+# the old tombstones are not needed for that.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0015_note_preview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='Tombstone',
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['changed_at'], name='change_changed_idx'),
+        ),
+    ]
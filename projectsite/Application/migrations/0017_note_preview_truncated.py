@@ -0,0 +1,41 @@
+# Generated by Django 4.2.24 on 2026-10-18 19:39
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# As in 0015: the SQLite triggers are dropped around the table rebuild and
+# the backfill runs before they're recreated.
+background_deletes = import_module('Application.migrations.0011_background_deletes')
+integer_status = import_module('Application.migrations.0014_integer_status')
+
+# NOTE_PREVIEW_LENGTH = 200
+BACKFILL = 'UPDATE "Application_note" SET preview_truncated = LENGTH(content) > 200'
+
+
+def backfill(apps, schema_editor):
+    schema_editor.execute(BACKFILL, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Application', '0016_sync_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            integer_status.run({'sqlite': background_deletes.SQLITE_DROP_TRIGGERS}),
+            integer_status.run({'sqlite': integer_status.SQLITE_LABELLED_TRIGGERS}),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='preview_truncated',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(
+            integer_status.run({'sqlite': integer_status.SQLITE_LABELLED_TRIGGERS}),
+            integer_status.run({'sqlite': background_deletes.SQLITE_DROP_TRIGGERS}),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Lower
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -7,27 +10,56 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+class VisibleManager(models.Manager):
+    # Default manager of models that can be deleted in the background
+    # (Application/deletion.py): rows waiting to be removed are hidden from
+    # lists, forms and lookups. _base_manager still sees them.
+    def get_queryset(self):
+        return super().get_queryset().filter(deleting=False)
+
+# Statuses are stored as small integers; the labels are what forms, exports,
+# the batch API, the importer and the changes feed use
+PENDING, IN_PROGRESS, COMPLETED = 1, 2, 3
 STATUS_CHOICES = [
-    ("Pending", "Pending"),
-    ("In Progress", "In Progress"),
-    ("Completed", "Completed"),
+    (PENDING, "Pending"),
+    (IN_PROGRESS, "In Progress"),
+    (COMPLETED, "Completed"),
 ]
+STATUS_CODES = {label.lower(): code for code, label in STATUS_CHOICES}
+
+def parse_status(value):
+    """The code for a status label (any case); anything else is returned as is, for validation to reject."""
+    if isinstance(value, str) and value.strip().lower() in STATUS_CODES:
+        return STATUS_CODES[value.strip().lower()]
+    return value
 
 class Category(BaseModel):
     name = models.CharField(max_length=100)
+    deleting = models.BooleanField(default=False, editable=False)
+
+    objects = VisibleManager()
 
     class Meta:
         verbose_name = "Category"
         verbose_name_plural = "Categories"
+        indexes = [
+            models.Index(fields=['name', 'id'], name='category_name_idx'),
+        ]
     def __str__(self):
         return self.name
 
 class Priority(BaseModel):
     name = models.CharField(max_length=100)
+    deleting = models.BooleanField(default=False, editable=False)
+
+    objects = VisibleManager()
 
     class Meta:
         verbose_name = "Priority"
         verbose_name_plural = "Priorities"
+        indexes = [
+            models.Index(fields=['name', 'id'], name='priority_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -35,10 +67,36 @@ class Priority(BaseModel):
 class Task(BaseModel):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
-    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="Pending")
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=PENDING)
     deadline = models.DateTimeField(null=True, blank=True)
     priority = models.ForeignKey(Priority, on_delete=models.CASCADE, related_name='tasks')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='tasks')
+    # Denormalized child counts, maintained by Application/progress.py.
+    # progress is subtasks_done as a percentage of subtask_count (0 without subtasks).
+    subtask_count = models.PositiveIntegerField(default=0, editable=False)
+    subtasks_done = models.PositiveIntegerField(default=0, editable=False)
+    note_count = models.PositiveIntegerField(default=0, editable=False)
+    progress = models.PositiveSmallIntegerField(default=0, editable=False)
+    deleting = models.BooleanField(default=False, editable=False)
+
+    objects = VisibleManager()
+
+    # One index per sort option in TaskListView.get_ordering(), with id as the
+    # keyset tiebreaker, plus (status, deadline) for "open tasks by due date"
+    # and lower(title) for the case-insensitive prefix lookup (TaskLookupView).
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], name='task_title_idx'),
+            models.Index(fields=['status', 'id'], name='task_status_idx'),
+            models.Index(fields=['deadline', 'id'], name='task_deadline_idx'),
+            models.Index(fields=['created_at', 'id'], name='task_created_idx'),
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            models.Index(fields=['category', 'id'], name='task_category_idx'),
+            models.Index(fields=['priority', 'id'], name='task_priority_idx'),
+            models.Index(Lower('title'), F('id'), name='task_title_lower_idx'),
+            models.Index(fields=['progress', 'id'], name='task_progress_idx'),
+            models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -46,14 +104,240 @@ class Task(BaseModel):
 class SubTask(BaseModel):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='subtasks')
     title = models.CharField(max_length=200)
-    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="Pending")
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=PENDING)
+
+    # (task, status) lets the per-task done counts (Application/progress.py)
+    # be answered from the index alone
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'id'], name='subtask_title_idx'),
+            models.Index(fields=['status', 'id'], name='subtask_status_idx'),
+            models.Index(fields=['created_at', 'id'], name='subtask_created_idx'),
+            models.Index(fields=['task', 'created_at'], name='subtask_task_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='subtask_updated_idx'),
+            models.Index(fields=['task', 'status'], name='subtask_task_status_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+NOTE_PREVIEW_LENGTH = 200
+
+def note_preview(content):
+    """The stored preview of a note: its first NOTE_PREVIEW_LENGTH characters, ending in … if cut."""
+    if len(content) <= NOTE_PREVIEW_LENGTH:
+        return content
+    return content[:NOTE_PREVIEW_LENGTH - 1] + "…"
+
 class Note(BaseModel):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notes')
     content = models.TextField()
+    # Set from content on save (set_preview); lists show it and defer content.
+    # Bulk writes (batch API, seeding, importer) call set_preview themselves.
+    preview = models.CharField(max_length=NOTE_PREVIEW_LENGTH, blank=True, editable=False)
+    preview_truncated = models.BooleanField(default=False, editable=False)
+
+    # content is deliberately not indexed: notes can be tens of KB, which
+    # bloats the index and exceeds Postgres' btree row limit. Sorting by
+    # content uses the bounded preview instead.
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='note_created_idx'),
+            models.Index(fields=['task', 'created_at'], name='note_task_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='note_updated_idx'),
+            models.Index(fields=['preview', 'id'], name='note_preview_idx'),
+        ]
+
+    def set_preview(self):
+        self.preview = note_preview(self.content)
+        # Stored: the preview alone can't tell a cut note from one that ends in …
+        self.preview_truncated = len(self.content) > NOTE_PREVIEW_LENGTH
+
+    def save(self, *args, **kwargs):
+        # A note loaded with content deferred keeps the preview it has
+        if 'content' not in self.get_deferred_fields():
+            self.set_preview()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'preview', 'preview_truncated'}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        # Not the task title: that would cost a query wherever the task isn't loaded
+        return self.preview or f"Note {self.pk}"
+
+class Counter(models.Model):
+    # Dashboard totals, kept up to date by the signals in Application/signals.py
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+class ModelVersion(models.Model):
+    # Bumped on every write to a model; list pages derive ETag/Last-Modified from it
+    name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class ImportCheckpoint(models.Model):
+    # Records committed so far by an import (Application/importing.py), written
+    # in the same transaction as each batch so a rerun can resume after it
+    name = models.CharField(max_length=200, unique=True)
+    records = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.records}"
+
+class Change(models.Model):
+    # A write to a Task/SubTask/Note, for the offline changes feed
+    # (Application/sync.py). Ids follow commit order; the feed's cursor is the
+    # last id a client has seen. Purged after SYNC_TOMBSTONE_DAYS.
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['changed_at'], name='change_changed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} changed {self.changed_at:%Y-%m-%d %H:%M}"
+
+class Watermark(models.Model):
+    # How far an incremental scan has got (e.g. Application/deadlines.py)
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.value:%Y-%m-%d %H:%M:%S}"
+
+NOTIFICATION_KINDS = [
+    ("due_soon", "Due within 24 hours"),
+    ("overdue", "Overdue"),
+]
+
+class Notification(models.Model):
+    # A task crossing a deadline threshold, one row per user, written by the
+    # scan_deadlines command. deadline is the one that was crossed, so a
+    # rescheduled task is announced again.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=10, choices=NOTIFICATION_KINDS)
+    deadline = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    read = models.BooleanField(default=False)
+
+    # The navbar only reads unread rows, newest first
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'task', 'kind', 'deadline'], name='notification_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at'], condition=Q(read=False), name='notification_unread_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} {self.get_kind_display().lower()} for {self.user}"
+
+class DeletionJob(models.Model):
+    # Background delete of a Category, Priority or Task and everything under
+    # it (Application/deletion.py). total is filled in when the job starts.
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    total = models.BigIntegerField(null=True, blank=True)
+    deleted = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Delete {self.model} {self.object_id} ({self.deleted}/{self.total or '?'})"
+
+ROLLUP_MODELS = [
+    ("task", "Tasks"),
+    ("subtask", "Subtasks"),
+    ("note", "Notes"),
+]
+
+class DailyRollup(models.Model):
+    # Activity per day, category and status for the home page charts
+    # (Application/rollups.py). Rows entering and leaving a status are
+    # counted separately; how many were in it on a day is the running total
+    # of the difference. Notes have no status (0). No FK constraint: the
+    # history stays when a category is deleted.
+    day = models.DateField()
+    model = models.CharField(max_length=10, choices=ROLLUP_MODELS)
+    category = models.ForeignKey(
+        Category, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+    status = models.PositiveSmallIntegerField(default=0)
+    created = models.IntegerField(default=0)
+    entered = models.IntegerField(default=0)
+    exited = models.IntegerField(default=0)
+
+    # Also the index for the time-series endpoint: model, then a day range
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'day', 'category', 'status'], name='dailyrollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {dict(STATUS_CHOICES).get(self.status, '-')} {self.day} (category {self.category_id})"
+
+# Archive: completed tasks moved out of the working tables, with their
+# subtasks and notes, by Application/archiving.py. Rows keep their original
+# ids and timestamps and are never edited once archived.
+class ArchivedTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES)
+    deadline = models.DateTimeField(null=True, blank=True)
+    priority = models.ForeignKey(Priority, on_delete=models.CASCADE, related_name='archived_tasks')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='archived_tasks')
+    subtask_count = models.PositiveIntegerField(default=0)
+    subtasks_done = models.PositiveIntegerField(default=0)
+    note_count = models.PositiveIntegerField(default=0)
+    progress = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # One index per sort option in ArchiveListView
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='archivedtask_updated_idx'),
+            models.Index(fields=['title', 'id'], name='archivedtask_title_idx'),
+            models.Index(fields=['created_at', 'id'], name='archivedtask_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+class ArchivedSubTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='subtasks')
+    title = models.CharField(max_length=200)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.title
+
+class ArchivedNote(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='notes')
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
 
     def __str__(self):
-        return f"Note for {self.task.title} ({self.created_at:%Y-%m-%d})"
\ No newline at end of file
+        # As Note: the task title would cost a query per row
+        return f"Note {self.pk} for task {self.task_id} ({self.created_at:%Y-%m-%d})"
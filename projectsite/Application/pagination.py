@@ -0,0 +1,238 @@
+import datetime
+
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from Application import counters
+
+CURSOR_SALT = 'Application.pagination.cursor'
+
+
+def resolve_field(model, path):
+    """Return the model field at the end of a lookup path like 'category__name'."""
+    field = None
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def resolve_value(obj, path):
+    for name in path.split('__'):
+        obj = getattr(obj, name) if obj is not None else None
+    return obj
+
+
+def counter_total(queryset):
+    """Row count of an unfiltered queryset from the dashboard counters, else None."""
+    model = queryset.model
+    name = counters.counter_name(model)
+    # Rows the default manager hides (VisibleManager) aren't counted either
+    if queryset.query.where != model._default_manager.all().query.where or name not in counters.COUNTED_MODELS:
+        return None
+    return counters.snapshot()[name]
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset pagination over (ordering field, tiebreakers..., pk).
+
+    Each page is a range scan starting after/before the row the cursor points
+    at, so page 10,000 costs the same as page 1. Cursors are signed so they're
+    opaque to clients and can't be tampered with.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = ordering.startswith('-')
+        self.field_path = ordering.lstrip('-')
+        self.ordering = ordering
+        self.field = resolve_field(queryset.model, self.field_path)
+        # Sorting on a related column ('category__name') also breaks ties on
+        # the related row's id, so the join can walk the related table's
+        # (name, id) index and then our (fk, id) index without a sort step.
+        self.tiebreakers = ['pk']
+        self.related_pk = None
+        if '__' in self.field_path:
+            fk = queryset.model._meta.get_field(self.field_path.split('__')[0])
+            self.tiebreakers.insert(0, fk.attname)
+            # Django rewrites category__id to the local category_id column,
+            # which the planner can't match against the related index.
+            quote = connection.ops.quote_name
+            self.related_pk = RawSQL(
+                f'{quote(fk.related_model._meta.db_table)}.{quote(fk.target_field.column)}', ()
+            )
+
+    def order_by(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        tiebreakers = [prefix + path for path in self.tiebreakers]
+        if self.related_pk is not None:
+            tiebreakers[0] = self.related_pk.desc() if descending else self.related_pk.asc()
+        if not self.field.null:
+            return [prefix + self.field_path] + tiebreakers
+        # Nulls sort first ascending and last descending on every backend
+        if descending:
+            return [F(self.field_path).desc(nulls_last=True)] + tiebreakers
+        return [F(self.field_path).asc(nulls_first=True)] + tiebreakers
+
+    def after(self, key, reverse=False):
+        """Rows strictly after ``key`` in the (possibly reversed) ordering."""
+        descending = self.descending != reverse
+        op = 'lt' if descending else 'gt'
+        value, rest = key[0], key[1:]
+
+        # Tiebreakers are never null: (a > x) OR (a = x AND (b > y ...))
+        tail = Q(**{f'{self.tiebreakers[-1]}__{op}': rest[-1]})
+        for path, v in reversed(list(zip(self.tiebreakers[:-1], rest[:-1]))):
+            tail = Q(**{f'{path}__{op}': v}) | (Q(**{path: v}) & tail)
+
+        isnull = f'{self.field_path}__isnull'
+        if value is None:
+            same = Q(**{isnull: True}) & tail
+            return same if descending else same | Q(**{isnull: False})
+        beyond = Q(**{f'{self.field_path}__{op}': value}) | (Q(**{self.field_path: value}) & tail)
+        if descending and self.field.null:
+            beyond |= Q(**{isnull: True})
+        return beyond
+
+    def encode(self, direction, obj=None):
+        payload = {'o': self.ordering, 'd': direction}
+        if obj is not None:
+            value = resolve_value(obj, self.field_path)
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                value = value.isoformat()
+            payload['k'] = [value] + [getattr(obj, path) for path in self.tiebreakers]
+        return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+    def decode(self, cursor):
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if payload.get('o') != self.ordering:
+            return None
+        key = payload.get('k')
+        if key is not None:
+            if len(key) != len(self.tiebreakers) + 1:
+                return None
+            if key[0] is not None:
+                key[0] = self.field.to_python(key[0])
+        return payload
+
+    def page_query(self, cursor):
+        """(payload, queryset fetching one row more than a page) for a cursor."""
+        payload = self.decode(cursor) if cursor else None
+        reverse = payload is not None and payload['d'] == 'prev'
+        qs = self.queryset.order_by(*self.order_by(reverse))
+        if payload and 'k' in payload:
+            qs = qs.filter(self.after(payload['k'], reverse))
+        return payload, qs[:self.per_page + 1]
+
+    def page(self, cursor=None):
+        payload, qs = self.page_query(cursor)
+        page = self.build_page(payload, list(qs))
+        # Paged back past the start: show a full first page instead
+        return self.page() if page is None else page
+
+    async def apage(self, cursor=None):
+        """page() on the async ORM."""
+        payload, qs = self.page_query(cursor)
+        page = self.build_page(payload, [obj async for obj in qs])
+        return await self.apage() if page is None else page
+
+    def build_page(self, payload, rows):
+        reverse = payload is not None and payload['d'] == 'prev'
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse and not has_more and 'k' in payload:
+            return None
+        if reverse:
+            rows.reverse()
+            # A 'prev' cursor without a position jumps to the last page
+            has_next = payload is not None and 'k' in payload
+            has_previous = has_more
+        else:
+            has_next = has_more
+            has_previous = payload is not None
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=self.encode('next', rows[-1]) if has_next and rows else None,
+            previous_cursor=self.encode('prev', rows[0]) if has_previous and rows else None,
+        )
+
+    @property
+    def last_cursor(self):
+        return self.encode('prev')
+
+    @property
+    def estimated_count(self):
+        """Total rows from the dashboard counters, for unfiltered lists only."""
+        return counter_total(self.queryset)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never runs an exact COUNT(*) over a whole table.
+
+    Unfiltered querysets are counted from the dashboard counters; filtered
+    ones are counted up to ``max_count`` rows only.
+    """
+    max_count = 10000
+
+    @cached_property
+    def count(self):
+        total = counter_total(self.object_list)
+        if total is not None:
+            return total
+        return self.object_list[:self.max_count].count()
+
+
+def page_window(page, each_side=2):
+    """The page numbers linked around the current one, so templates don't loop over every page."""
+    return range(max(1, page.number - each_side), min(page.paginator.num_pages, page.number + each_side) + 1)
+
+
+class CursorPaginationMixin:
+    """Keyset pagination for list views; ``?page=N`` and ranked searches keep OFFSET paging."""
+
+    def paginate_queryset(self, queryset, page_size):
+        ranked = hasattr(self, 'is_ranked') and self.is_ranked()
+        if ranked or self.request.GET.get('page'):
+            paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+            page.window = page_window(page)
+            return paginator, page, object_list, is_paginated
+        paginator = CursorPaginator(queryset, page_size, self.get_ordering())
+        page = paginator.page(self.request.GET.get('cursor'))
+        return (paginator, page, page.object_list, page.has_other_pages())
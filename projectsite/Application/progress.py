@@ -0,0 +1,152 @@
+"""Denormalized subtask and note counts on Task.
+
+Task.subtask_count, subtasks_done, note_count and progress are adjusted in
+place with F() updates: from signals for single saves and deletes (see
+signals.py), and explicitly by the bulk write paths (batch API, bulk seeding,
+importer), which bypass signals. ``repair`` recomputes them from scratch.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from Application.models import Task, SubTask, Note, COMPLETED
+
+DONE = COMPLETED
+
+
+def percent(done, total):
+    return done * 100 // total if total else 0
+
+
+def progress_after(total_delta, done_delta):
+    """SQL for the progress column after adding the deltas to the counts."""
+    return Case(
+        When(subtask_count__gt=-total_delta,
+             then=(F('subtasks_done') + done_delta) * 100 / (F('subtask_count') + total_delta)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def adjust(deltas):
+    """Apply {task_id: (subtasks, done, notes)} deltas, one UPDATE per distinct delta."""
+    groups = defaultdict(list)
+    for task_id, delta in deltas.items():
+        if task_id is not None and any(delta):
+            groups[delta].append(task_id)
+    for (total, done, notes), task_ids in groups.items():
+        Task.objects.filter(pk__in=task_ids).update(
+            subtask_count=F('subtask_count') + total,
+            subtasks_done=F('subtasks_done') + done,
+            note_count=F('note_count') + notes,
+            progress=progress_after(total, done),
+        )
+
+
+def add(deltas, task_id, total=0, done=0, notes=0):
+    t, d, n = deltas.get(task_id, (0, 0, 0))
+    deltas[task_id] = (t + total, d + done, n + notes)
+
+
+def subtask_change(deltas, old, new):
+    """Record a subtask going from old to new (task_id, status); None means absent."""
+    if old is not None:
+        add(deltas, old[0], total=-1, done=-(old[1] == DONE))
+    if new is not None:
+        add(deltas, new[0], total=1, done=int(new[1] == DONE))
+
+
+def note_change(deltas, old, new):
+    """Record a note moving from task old to task new; None means absent."""
+    if old is not None:
+        add(deltas, old, notes=-1)
+    if new is not None:
+        add(deltas, new, notes=1)
+
+
+def subtask_state(instance):
+    # Read from __dict__ so deferred fields aren't loaded just for this
+    return (instance.__dict__.get('task_id'), instance.__dict__.get('status'))
+
+
+def note_state(instance):
+    return instance.__dict__.get('task_id')
+
+
+def track_bulk(model, created=(), updated=()):
+    """Adjust the counts for rows written with bulk_create/bulk_update.
+
+    Updated rows are compared against the state they were loaded with (kept
+    by the post_init receiver in signals.py).
+    """
+    if model is SubTask:
+        change, state = subtask_change, subtask_state
+    elif model is Note:
+        change, state = note_change, note_state
+    else:
+        return
+    deltas = {}
+    for obj in created:
+        change(deltas, None, state(obj))
+    for obj in updated:
+        change(deltas, obj._progress_state, state(obj))
+    for obj in list(created) + list(updated):
+        obj._progress_state = state(obj)
+    adjust(deltas)
+
+
+def set_initial(task, subtasks=(), notes=()):
+    """Fill in the counts of a new task that's written together with its children."""
+    task.subtask_count = len(subtasks)
+    task.subtasks_done = sum(1 for subtask in subtasks if subtask.status == DONE)
+    task.note_count = len(notes)
+    task.progress = percent(task.subtasks_done, task.subtask_count)
+
+
+def repair(chunk_size=10000):
+    """Recompute the counts from the SubTask and Note tables, a pk range at a time.
+
+    Returns the number of tasks whose counts were wrong.
+    """
+    def count(model, **filters):
+        rows = (model.objects.filter(task=OuterRef('pk'), **filters)
+                .order_by().values('task').annotate(n=Count('pk')).values('n'))
+        return Coalesce(Subquery(rows), 0)
+
+    fixed = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            pks = list(Task.objects.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            wrong = list(
+                Task.objects.filter(pk__gte=pks[0], pk__lte=last_pk)
+                .annotate(
+                    actual_total=count(SubTask),
+                    actual_done=count(SubTask, status=DONE),
+                    actual_notes=count(Note),
+                )
+                .filter(
+                    ~Q(subtask_count=F('actual_total'))
+                    | ~Q(subtasks_done=F('actual_done'))
+                    | ~Q(note_count=F('actual_notes'))
+                    | ~Q(progress=Case(
+                        When(actual_total__gt=0, then=F('actual_done') * 100 / F('actual_total')),
+                        default=Value(0), output_field=IntegerField(),
+                    ))
+                )
+                .only('pk')
+            )
+            for task in wrong:
+                task.subtask_count = task.actual_total
+                task.subtasks_done = task.actual_done
+                task.note_count = task.actual_notes
+                task.progress = percent(task.actual_done, task.actual_total)
+            Task.objects.bulk_update(wrong, ['subtask_count', 'subtasks_done', 'note_count', 'progress'])
+            fixed += len(wrong)
+    return fixed
@@ -0,0 +1,289 @@
+"""Daily activity rollups behind the home page charts.
+
+DailyRollup keeps, per day, category and status, how many Tasks, SubTasks and
+Notes were created, and how many entered and left the status (by being
+created, edited, moved to another category or deleted); notes count under
+NO_STATUS. The number in a
+status on a given day is the running total of entered - exited, so the
+time-series endpoint reads only rollup rows: a sum over the days before the
+range plus one row per day, category and status inside it.
+
+Single saves and deletes are recorded by the receivers in signals.py; the
+bulk write paths (batch API, seeding, importer, background deletes) call
+``track_created``/``track_bulk``/``track_deleted``. Subtasks and notes count
+under their task's category, so moving a task moves them too (``track_moved``,
+called from both). Archiving leaves the
+rollups alone: archived rows are still part of the history. ``rebuild``
+recomputes everything from the live and archive tables; lacking the history
+of each row, it assumes every row was created with its model's default
+status and moved to its current one when it was last updated.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.generic import View
+
+from Application import progress
+from Application.archiving import raw_delete
+from Application.models import (
+    Task, SubTask, Note, ArchivedTask, ArchivedSubTask, ArchivedNote, DailyRollup, ROLLUP_MODELS, STATUS_CHOICES,
+)
+
+# Rollup name of each tracked model, archived ones included
+NAMES = {
+    Task: 'task', SubTask: 'subtask', Note: 'note',
+    ArchivedTask: 'task', ArchivedSubTask: 'subtask', ArchivedNote: 'note',
+}
+# Models whose category is their task's, and where that task lives
+PARENTS = {SubTask: Task, Note: Task, ArchivedSubTask: ArchivedTask, ArchivedNote: ArchivedTask}
+NO_STATUS = 0
+DEFAULT_DAYS = 30
+MAX_DAYS = 3660
+
+
+def state(instance):
+    """(category id, or task id for children; status) of a row; notes have NO_STATUS."""
+    # Read from __dict__ so deferred fields aren't loaded just for this
+    parent = 'task_id' if type(instance) in PARENTS else 'category_id'
+    return (instance.__dict__.get(parent), instance.__dict__.get('status', NO_STATUS))
+
+
+def add(deltas, key, created=0, entered=0, exited=0):
+    c, e, x = deltas.get(key, (0, 0, 0))
+    deltas[key] = (c + created, e + entered, x + exited)
+
+
+def apply(deltas):
+    """Add {(model, day, category id, status): (created, entered, exited)} to the rollups."""
+    for (model, day, category, status), (created, entered, exited) in deltas.items():
+        if not (created or entered or exited):
+            continue
+        key = {'model': model, 'day': day, 'category_id': category, 'status': status}
+        increments = {
+            'created': F('created') + created, 'entered': F('entered') + entered, 'exited': F('exited') + exited,
+        }
+        if DailyRollup.objects.filter(**key).update(**increments):
+            continue
+        _, made = DailyRollup.objects.get_or_create(
+            **key, defaults={'created': created, 'entered': entered, 'exited': exited},
+        )
+        if not made:
+            DailyRollup.objects.filter(**key).update(**increments)
+
+
+def record(model, changes, now=None):
+    """Record [(old state, new state, created_at)] for rows of model.
+
+    A state of None means the row is absent; created_at is given for new rows,
+    which count on the day they were created.
+    """
+    changes = [change for change in changes if change[0] != change[1]]
+    if not changes:
+        return
+    if model in PARENTS:
+        task_ids = {s[0] for old, new, _ in changes for s in (old, new) if s is not None}
+        categories = dict(
+            PARENTS[model]._base_manager.filter(pk__in=task_ids).values_list('pk', 'category_id')
+        )
+        changes = [
+            tuple(None if s is None else (categories.get(s[0]), s[1]) for s in (old, new)) + (created_at,)
+            for old, new, created_at in changes
+        ]
+    name, today = NAMES[model], timezone.localdate(now)
+    deltas = {}
+    for old, new, created_at in changes:
+        if old == new:
+            continue
+        if old is not None and old[0] is not None:
+            add(deltas, (name, today) + old, exited=1)
+        if new is not None and new[0] is not None:
+            if created_at is not None:
+                add(deltas, (name, timezone.localdate(created_at)) + new, created=1, entered=1)
+            else:
+                add(deltas, (name, today) + new, entered=1)
+    apply(deltas)
+
+
+def track_created(model, instances):
+    """Record rows written with bulk_create, which doesn't send post_save."""
+    instances = list(instances)
+    record(model, [(None, state(obj), obj.created_at) for obj in instances])
+    for obj in instances:
+        obj._rollup_state = state(obj)
+
+
+def track_bulk(model, created=(), updated=()):
+    """Record a batch written with bulk_create/bulk_update.
+
+    Updated rows are compared against the state they were loaded with (kept
+    by the post_init receiver in signals.py).
+    """
+    if model not in NAMES:
+        return
+    changes = [(None, state(obj), obj.created_at) for obj in created]
+    changes += [(obj._rollup_state, state(obj), None) for obj in updated]
+    record(model, changes)
+    if model is Task:
+        track_moved({obj.pk: (obj._rollup_state[0], state(obj)[0]) for obj in updated})
+    for obj in list(created) + list(updated):
+        obj._rollup_state = state(obj)
+
+
+def track_moved(moves):
+    """Re-attribute the live subtasks and notes of tasks moved to another category.
+
+    moves is {task id: (old category id, new category id)}; each child leaves
+    the old category and enters the new one, in the status it has.
+    """
+    moves = {pk: categories for pk, categories in moves.items() if categories[0] != categories[1]}
+    if not moves:
+        return
+    today = timezone.localdate()
+    deltas = {}
+    for model in (SubTask, Note):
+        columns = ['task_id'] + (['status'] if model is SubTask else [])
+        rows = model._base_manager.filter(task_id__in=list(moves)).values(*columns).annotate(n=Count('pk')).order_by()
+        for row in rows:
+            old, new = moves[row['task_id']]
+            status = row.get('status', NO_STATUS)
+            if old is not None:
+                add(deltas, (NAMES[model], today, old, status), exited=row['n'])
+            if new is not None:
+                add(deltas, (NAMES[model], today, new, status), entered=row['n'])
+    apply(deltas)
+
+
+def track_deleted(model, pks):
+    """Record rows about to be removed without post_delete. Call before the DELETE."""
+    category = 'task__category_id' if model in PARENTS else 'category_id'
+    columns = [category] + (['status'] if model not in (Note, ArchivedNote) else [])
+    rows = model._base_manager.filter(pk__in=list(pks)).values(*columns).annotate(n=Count('pk')).order_by()
+    name, today = NAMES[model], timezone.localdate()
+    deltas = {}
+    for row in rows:
+        add(deltas, (name, today, row[category], row.get('status', NO_STATUS)), exited=row['n'])
+    apply(deltas)
+
+
+def history(qs, name, category, default):
+    """Rollup deltas reconstructed from the rows of qs; see the module docstring."""
+    deltas = {}
+    created = (qs.annotate(day=TruncDate('created_at'), rollup_category=F(category))
+               .values('day', 'rollup_category').annotate(n=Count('pk')).order_by())
+    for row in created:
+        add(deltas, (name, row['day'], row['rollup_category'], default), created=row['n'], entered=row['n'])
+    if name == 'note':
+        return deltas
+    moved = (qs.exclude(status=default)
+             .annotate(day=TruncDate('updated_at'), rollup_category=F(category))
+             .values('day', 'rollup_category', 'status').annotate(n=Count('pk')).order_by())
+    for row in moved:
+        add(deltas, (name, row['day'], row['rollup_category'], default), exited=row['n'])
+        add(deltas, (name, row['day'], row['rollup_category'], row['status']), entered=row['n'])
+    return deltas
+
+
+def rebuild():
+    """Recompute every rollup row from the base tables; returns the number of rows."""
+    sources = [
+        (Task.objects.all(), 'task', 'category_id'),
+        (ArchivedTask.objects.all(), 'task', 'category_id'),
+        # Rows waiting for a background delete are already gone as far as the charts go
+        (SubTask.objects.filter(task__deleting=False), 'subtask', 'task__category_id'),
+        (ArchivedSubTask.objects.all(), 'subtask', 'task__category_id'),
+        (Note.objects.filter(task__deleting=False), 'note', 'task__category_id'),
+        (ArchivedNote.objects.all(), 'note', 'task__category_id'),
+    ]
+    deltas = {}
+    for qs, name, category in sources:
+        default = NO_STATUS if name == 'note' else Task._meta.get_field('status').default
+        for key, (c, e, x) in history(qs, name, category, default).items():
+            add(deltas, key, c, e, x)
+    rows = [
+        DailyRollup(model=model, day=day, category_id=category, status=status,
+                    created=created, entered=entered, exited=exited)
+        for (model, day, category, status), (created, entered, exited) in deltas.items()
+        if created or entered or exited
+    ]
+    with transaction.atomic():
+        raw_delete(DailyRollup.objects.all())
+        DailyRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def series(model, start, end, category=None):
+    """Daily series for start..end (inclusive) from the rollup rows alone.
+
+    created and completed are per day; open (not Completed), total and each
+    status's count (keyed by label) are as at the end of the day.
+    """
+    qs = DailyRollup.objects.filter(model=model)
+    if category is not None:
+        qs = qs.filter(category_id=category)
+    before = (qs.filter(day__lt=start).values('status')
+              .annotate(net=Sum(F('entered') - F('exited'))).order_by())
+    levels = defaultdict(int, {row['status']: row['net'] for row in before})
+    by_day = defaultdict(list)
+    rows = (qs.filter(day__gte=start, day__lte=end).values('day', 'status')
+            .annotate(created=Sum('created'), entered=Sum('entered'), exited=Sum('exited')).order_by())
+    for row in rows:
+        by_day[row['day']].append(row)
+
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    data = {
+        'days': [day.isoformat() for day in days],
+        'created': [], 'completed': [], 'open': [], 'total': [],
+        'statuses': {} if model == 'note' else {status: [] for status, _ in STATUS_CHOICES},
+    }
+    for day in days:
+        created = completed = 0
+        for row in by_day[day]:
+            created += row['created']
+            levels[row['status']] += row['entered'] - row['exited']
+            if row['status'] == progress.DONE:
+                completed += row['entered']
+        data['created'].append(created)
+        data['completed'].append(completed)
+        data['open'].append(sum(n for status, n in levels.items() if status != progress.DONE))
+        data['total'].append(sum(levels.values()))
+        for status, values in data['statuses'].items():
+            values.append(levels[status])
+    labels = dict(STATUS_CHOICES)
+    data['statuses'] = {labels[status]: values for status, values in data['statuses'].items()}
+    return data
+
+
+class ActivityView(LoginRequiredMixin, View):
+    """``GET api/activity/?model=task&start=YYYY-MM-DD&end=YYYY-MM-DD&category=<id>``
+
+    Daily series for the charts (see ``series``); defaults to tasks over the
+    last DEFAULT_DAYS days across all categories.
+    """
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        model = request.GET.get('model', 'task')
+        if model not in dict(ROLLUP_MODELS):
+            return JsonResponse({'error': 'model must be one of %s.' % ', '.join(dict(ROLLUP_MODELS))}, status=400)
+        try:
+            end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+            start = (date.fromisoformat(request.GET['start']) if request.GET.get('start')
+                     else end - timedelta(days=DEFAULT_DAYS - 1))
+        except ValueError:
+            return JsonResponse({'error': 'start and end must be dates (YYYY-MM-DD).'}, status=400)
+        if start > end:
+            return JsonResponse({'error': 'start must not be after end.'}, status=400)
+        if (end - start).days >= MAX_DAYS:
+            return JsonResponse({'error': f'At most {MAX_DAYS} days per request.'}, status=400)
+        category = request.GET.get('category')
+        if category and not category.isdigit():
+            return JsonResponse({'error': 'category must be an integer.'}, status=400)
+
+        data = series(model, start, end, int(category) if category else None)
+        return JsonResponse({'model': model, 'start': start, 'end': end, **data})
@@ -0,0 +1,84 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Q
+
+from Application.models import Category, Priority, Task, SubTask, Note, ArchivedTask, STATUS_CHOICES
+
+# Fields each list view searched with icontains before the full-text index
+# existed. Still used on backends without an index (see migration 0003);
+# status is matched by label and filtered on the codes (see ``matches``).
+# The full-text documents hold the labels (migration 0014).
+SEARCH_FIELDS = {
+    Category: ['name'],
+    Priority: ['name'],
+    Task: ['title', 'description', 'status', 'priority__name', 'category__name'],
+    SubTask: ['title', 'status', 'task__title'],
+    Note: ['content', 'task__title'],
+    ArchivedTask: ['title', 'description', 'status', 'priority__name', 'category__name'],
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def index_table(model):
+    return f"{model._meta.db_table}_fts"
+
+
+def tokens(q):
+    return TOKEN_RE.findall(q or '')
+
+
+def fts5_query(q):
+    # Every word must match as a prefix; quoting keeps user input out of FTS5 syntax
+    return ' '.join(f'"{token}"*' for token in tokens(q))
+
+
+def tsquery(q):
+    return ' & '.join(f"{token}:*" for token in tokens(q))
+
+
+def search(qs, q):
+    """Filter qs down to rows matching q and annotate them with ``search_rank``.
+
+    Lower ranks are better matches, so ``order_by_rank`` sorts ascending.
+    """
+    model = qs.model
+    if not tokens(q):
+        return qs.none()
+
+    quote = connection.ops.quote_name
+    table = quote(index_table(model))
+    base = quote(model._meta.db_table)
+
+    if connection.vendor == 'sqlite':
+        return qs.extra(
+            select={'search_rank': f'{table}.rank'},
+            tables=[index_table(model)],
+            where=[f'{table} MATCH %s', f'{table}.rowid = {base}.id'],
+            params=[fts5_query(q)],
+        )
+    if connection.vendor == 'postgresql':
+        return qs.extra(
+            select={'search_rank': f"-ts_rank({table}.document, to_tsquery('simple', %s))"},
+            select_params=[tsquery(q)],
+            tables=[index_table(model)],
+            where=[f"{table}.document @@ to_tsquery('simple', %s)", f'{table}.id = {base}.id'],
+            params=[tsquery(q)],
+        )
+    return qs.filter(
+        reduce(or_, (matches(field, q) for field in SEARCH_FIELDS[model]))
+    ).extra(select={'search_rank': '0'})
+
+
+def matches(field, q):
+    if field == 'status':
+        # The codes whose label contains q, rather than a scan of the column
+        return Q(status__in=[code for code, label in STATUS_CHOICES if q.lower() in label.lower()])
+    return Q(**{f'{field}__icontains': q})
+
+
+def order_by_rank(qs):
+    return qs.order_by('search_rank', 'pk')
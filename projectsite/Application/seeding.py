@@ -0,0 +1,51 @@
+"""Fake row generation for ``Initial_data --bulk``.
+
+Kept free of Django imports so process-pool workers can import it without
+setting up Django. Workers only produce plain tuples; all database writes
+happen in the parent process.
+"""
+import random
+
+from faker import Faker
+
+_fake = None
+
+
+def _faker():
+    global _fake
+    if _fake is None:
+        _fake = Faker()
+    return _fake
+
+
+def generate_batch(args):
+    """Build one batch of tasks with their subtasks and notes.
+
+    Each batch is seeded from (seed, batch index), so the same --seed always
+    produces the same dataset regardless of how many workers run.
+    """
+    (batch_index, batch_size, seed, subtasks_per_task, notes_per_task,
+     status_values, n_priorities, n_categories) = args
+
+    fake = _faker()
+    batch_seed = None if seed is None else seed * 1_000_003 + batch_index
+    fake.seed_instance(batch_seed)
+    rng = random.Random(batch_seed)
+
+    rows = []
+    for _ in range(batch_size):
+        task = (
+            fake.sentence(nb_words=5),
+            fake.paragraph(nb_sentences=3),
+            rng.choice(status_values),
+            fake.date_time_this_month(),
+            rng.randrange(n_priorities),
+            rng.randrange(n_categories),
+        )
+        subtasks = [
+            (fake.sentence(nb_words=5), rng.choice(status_values))
+            for _ in range(subtasks_per_task)
+        ]
+        notes = [fake.paragraph(nb_sentences=3) for _ in range(notes_per_task)]
+        rows.append((task, subtasks, notes))
+    return rows
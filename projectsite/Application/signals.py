@@ -0,0 +1,143 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from Application import counters, progress, rollups, sync, versions
+from Application.models import Category, Priority, Task, SubTask, Note, ArchivedTask
+
+TRACKED_MODELS = (Category, Priority, Task, SubTask, Note, ArchivedTask)
+
+
+# Dashboard counters
+@receiver(post_save)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if sender not in TRACKED_MODELS or not created or raw:
+        return
+    counters.track_created(sender, [instance])
+
+
+@receiver(post_delete)
+def count_deleted(sender, instance, **kwargs):
+    if sender not in TRACKED_MODELS:
+        return
+    name = counters.counter_name(sender)
+    counters.bump(name, -1)
+    if name in counters.YEARLY_MODELS:
+        counters.bump(counters.year_key(name, counters.created_year(instance)), -1)
+
+
+# Version stamps for conditional GET on list pages
+@receiver(post_save)
+def bump_version_on_save(sender, instance, raw=False, **kwargs):
+    if sender in TRACKED_MODELS and not raw:
+        versions.bump(sender)
+
+
+@receiver(post_delete)
+def bump_version_on_delete(sender, instance, **kwargs):
+    if sender in TRACKED_MODELS:
+        versions.bump(sender)
+
+
+# Denormalized subtask/note counts on Task (Application/progress.py). The
+# state each row was loaded with is kept so moves and status changes can be
+# turned into deltas without re-reading the row.
+@receiver(post_init, sender=SubTask)
+def remember_subtask_state(sender, instance, **kwargs):
+    instance._progress_state = progress.subtask_state(instance)
+
+
+@receiver(post_init, sender=Note)
+def remember_note_state(sender, instance, **kwargs):
+    instance._progress_state = progress.note_state(instance)
+
+
+@receiver(post_save, sender=SubTask)
+def count_subtask_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    new = progress.subtask_state(instance)
+    progress.subtask_change(deltas, None if created else instance._progress_state, new)
+    progress.adjust(deltas)
+    instance._progress_state = new
+
+
+@receiver(post_delete, sender=SubTask)
+def count_subtask_deleted(sender, instance, **kwargs):
+    deltas = {}
+    progress.subtask_change(deltas, instance._progress_state, None)
+    progress.adjust(deltas)
+
+
+@receiver(post_save, sender=Note)
+def count_note_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    deltas = {}
+    new = progress.note_state(instance)
+    progress.note_change(deltas, None if created else instance._progress_state, new)
+    progress.adjust(deltas)
+    instance._progress_state = new
+
+
+@receiver(post_delete, sender=Note)
+def count_note_deleted(sender, instance, **kwargs):
+    deltas = {}
+    progress.note_change(deltas, instance._progress_state, None)
+    progress.adjust(deltas)
+
+
+# Change log for the offline changes feed (Application/sync.py)
+@receiver(post_save)
+def record_change_on_save(sender, instance, raw=False, **kwargs):
+    if sender in sync.SYNCED_MODELS and not raw:
+        sync.record(sender, [instance.pk])
+
+
+@receiver(post_delete)
+def record_change_on_delete(sender, instance, **kwargs):
+    if sender in sync.SYNCED_MODELS:
+        sync.record(sender, [instance.pk])
+
+
+@receiver(post_init, sender=Category)
+@receiver(post_init, sender=Priority)
+def remember_name(sender, instance, **kwargs):
+    instance._synced_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Priority)
+def record_renamed_tasks(sender, instance, created, raw=False, **kwargs):
+    # Tasks are sent with their category and priority names
+    if not created and not raw and instance.name != instance._synced_name:
+        sync.record_tasks(**{sender._meta.model_name: instance.pk})
+    instance._synced_name = instance.name
+
+
+# Daily activity rollups (Application/rollups.py)
+@receiver(post_init, sender=Task)
+@receiver(post_init, sender=SubTask)
+@receiver(post_init, sender=Note)
+def remember_rollup_state(sender, instance, **kwargs):
+    instance._rollup_state = rollups.state(instance)
+
+
+@receiver(post_save)
+def rollup_saved(sender, instance, created, raw=False, **kwargs):
+    if sender not in (Task, SubTask, Note) or raw:
+        return
+    new = rollups.state(instance)
+    if created:
+        rollups.record(sender, [(None, new, instance.created_at)])
+    else:
+        rollups.record(sender, [(instance._rollup_state, new, None)])
+        if sender is Task:
+            rollups.track_moved({instance.pk: (instance._rollup_state[0], new[0])})
+    instance._rollup_state = new
+
+
+@receiver(post_delete)
+def rollup_deleted(sender, instance, **kwargs):
+    if sender in rollups.NAMES:
+        rollups.record(sender, [(rollups.state(instance), None, None)])
@@ -0,0 +1,188 @@
+"""Delta sync for offline clients (the service worker's IndexedDB copy).
+
+Every write to a Task, SubTask or Note adds a Change row naming it: the
+post_save/post_delete receivers in signals.py for single rows, ``record`` in
+the bulk write paths (batch API, seeding, importer, archiving, background
+deletes). Renaming a category or priority records all of its tasks, as the
+feed sends tasks with those names.
+
+Change ids follow commit order, so a client that has seen up to id N has
+seen every change committed before N: SQLite only lets one transaction write
+at a time, and on Postgres ``numbered`` holds an advisory lock from the
+moment a transaction numbers its rows until it commits.
+
+``GET api/changes/?since=<cursor>`` returns the current row of each object
+changed after the cursor's id, or its id under ``deleted`` if it's gone, for
+up to ``limit`` changes per call; ``more`` says whether to call again
+straight away. Without ``since`` (a client's first full sync) the feed first
+pages through the tables in id order, then carries on from the last change
+id it saw when it started, so rows written meanwhile are sent again.
+Change rows are purged after SYNC_TOMBSTONE_DAYS; a cursor older than that
+gets 410 Gone and the client has to start over.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core import signing
+from django.db import connection, transaction
+from django.db.models import Max
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.generic import View
+
+from Application.models import Task, SubTask, Note, Change, STATUS_CHOICES
+
+SALT = 'Application.sync.changes'
+DEFAULT_LIMIT = 500
+# pg_advisory_xact_lock key serializing the numbering of Change rows
+LOCK_KEY = 4_210_019
+
+# name in the response -> (model, values() sent to the client)
+STREAMS = {
+    'tasks': (Task, [
+        'id', 'title', 'description', 'status', 'deadline', 'priority__name', 'category__name', 'updated_at',
+    ]),
+    'subtasks': (SubTask, ['id', 'task_id', 'title', 'status', 'updated_at']),
+    'notes': (Note, ['id', 'task_id', 'content', 'updated_at']),
+}
+RENAMED = {'priority__name': 'priority', 'category__name': 'category'}
+# Clients get status labels, not the stored codes
+LABELS = {'status': dict(STATUS_CHOICES)}
+
+SYNCED_MODELS = {Task: 'task', SubTask: 'subtask', Note: 'note'}
+
+
+@contextmanager
+def numbered():
+    """Write Change rows inside this, so their ids follow commit order."""
+    if connection.vendor != 'postgresql':
+        # SQLite has a single writer: ids are handed out in commit order anyway
+        yield
+        return
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Held until commit, so whoever numbers rows next waits for it
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [LOCK_KEY])
+        yield
+
+
+def record(model, pks):
+    """Change rows for rows of model written or removed without post_save/post_delete."""
+    rows = [Change(model=SYNCED_MODELS[model], object_id=pk) for pk in pks]
+    if not rows:
+        return
+    with numbered():
+        if len(rows) == 1:
+            # A single save is one INSERT; bulk_create would add a transaction around it
+            rows[0].save(force_insert=True)
+        else:
+            Change.objects.bulk_create(rows, batch_size=1000)
+
+
+def record_tasks(**lookup):
+    """Change rows for every task matching lookup, e.g. the tasks of a renamed category."""
+    select, params = Task.objects.filter(**lookup).values('pk').query.sql_with_params()
+    sql = 'INSERT INTO %s (model, object_id, changed_at) SELECT %%s, U.id, %%s FROM (%s) U' % (
+        connection.ops.quote_name(Change._meta.db_table), select,
+    )
+    with numbered(), connection.cursor() as cursor:
+        cursor.execute(sql, ['task', connection.ops.adapt_datetimefield_value(timezone.now()), *params])
+
+
+def purge_tombstones(now=None):
+    """Delete Change rows older than SYNC_TOMBSTONE_DAYS; cursors that old get 410."""
+    horizon = (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    deleted, _ = Change.objects.filter(changed_at__lt=horizon).delete()
+    return deleted
+
+
+def encode(seq, at, positions=None):
+    """A cursor: the last change id seen, plus {stream: last id} while the first sync pages through the tables."""
+    return signing.dumps({'at': at.isoformat(), 'seq': seq, 'positions': positions}, salt=SALT)
+
+
+def decode(cursor):
+    """(change id, positions, issued at); raises signing.BadSignature if it's been tampered with.
+
+    Cursors from before the change log have no change id; they come back as
+    issued at the epoch, i.e. expired.
+    """
+    data = signing.loads(cursor, salt=SALT)
+    if 'seq' not in data:
+        return 0, None, parse_datetime('1970-01-01T00:00:00+00:00')
+    return data['seq'], data['positions'], parse_datetime(data['at'])
+
+
+def serialize(row):
+    return {RENAMED.get(key, key): LABELS[key][value] if key in LABELS else value for key, value in row.items()}
+
+
+def snapshot(positions, limit):
+    """({stream: rows}, new positions, more): the next ``limit`` rows of each table, in id order."""
+    batches, positions, more = {}, dict(positions), False
+    for name, (model, columns) in STREAMS.items():
+        qs = model.objects.filter(pk__gt=positions.get(name, 0)).order_by('pk').values(*columns)
+        rows = list(qs[:limit + 1])
+        if len(rows) > limit:
+            rows, more = rows[:limit], True
+        if rows:
+            positions[name] = rows[-1]['id']
+        batches[name] = [serialize(row) for row in rows]
+    return batches, positions, more
+
+
+def changes(seq, limit):
+    """({stream: rows}, {model: deleted ids}, new change id, more) for up to ``limit`` changes after seq."""
+    log = list(Change.objects.filter(pk__gt=seq).order_by('pk').values_list('pk', 'model', 'object_id')[:limit + 1])
+    more = len(log) > limit
+    log = log[:limit]
+    if log:
+        seq = log[-1][0]
+    changed = defaultdict(set)
+    for _, model, pk in log:
+        changed[model].add(pk)
+
+    batches, deleted = {}, {}
+    for name, (model, columns) in STREAMS.items():
+        ids = changed[SYNCED_MODELS[model]]
+        rows = list(model.objects.filter(pk__in=ids).order_by('pk').values(*columns)) if ids else []
+        batches[name] = [serialize(row) for row in rows]
+        deleted[SYNCED_MODELS[model]] = sorted(ids - {row['id'] for row in rows})
+    return batches, deleted, seq, more
+
+
+class ChangesView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(max(1, int(request.GET.get('limit', DEFAULT_LIMIT))), DEFAULT_LIMIT)
+        except ValueError:
+            return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+
+        since = request.GET.get('since')
+        if since:
+            try:
+                seq, positions, issued = decode(since)
+            except signing.BadSignature:
+                return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+            if issued < timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+                return JsonResponse({'error': 'Cursor expired; sync again from scratch.'}, status=410)
+        else:
+            # Taken before reading the tables: anything written from here on is in the log after it
+            seq, positions = Change.objects.aggregate(last=Max('pk'))['last'] or 0, {}
+
+        now = timezone.now()
+        if positions is not None:
+            batches, positions, more = snapshot(positions, limit)
+            deleted = {name: [] for name in SYNCED_MODELS.values()}
+            if not more:
+                positions = None
+                more = Change.objects.filter(pk__gt=seq).exists()
+        else:
+            batches, deleted, seq, more = changes(seq, limit)
+        return JsonResponse({**batches, 'deleted': deleted, 'cursor': encode(seq, now, positions), 'more': more})
@@ -0,0 +1,19 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """<link>/<script> tags for a STATIC_BUNDLES entry (see Application/assets.py).
+
+    One tag for the built bundle when the storage builds them, otherwise one
+    per source file.
+    """
+    names = [name] if getattr(staticfiles_storage, 'bundles_enabled', False) else settings.STATIC_BUNDLES[name]
+    tag = '<link rel="stylesheet" href="{}">' if name.endswith('.css') else '<script src="{}"></script>'
+    return format_html_join('\n', tag, ((static(n),) for n in names))
@@ -1,6 +1,33 @@
-from django.test import TestCase
+import json
+import os
+import runpy
+import tempfile
+from io import StringIO
+import gzip
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Max, Q
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from .models import Category, Priority, Task, SubTask, Note
+from .models import (
+    Category, Priority, Task, SubTask, Note, Counter, ImportCheckpoint, Change,
+    ArchivedTask, ArchivedSubTask, ArchivedNote, DeletionJob, Notification, Watermark, DailyRollup,
+    PENDING, IN_PROGRESS, COMPLETED, NOTE_PREVIEW_LENGTH, note_preview,
+)
+from .middleware import histograms
+from .pagination import CursorPaginator
+from . import (
+    archiving, assets, benchmarks, counters, deadlines, deletion, exporting, importing, pagination, progress,
+    rollups, search, sync, versions, views,
+)
+from django.contrib.auth.models import User
 from django.utils import timezone
 
 
@@ -11,7 +38,7 @@ class CRUDViewsSmokeTests(TestCase):
         self.task = Task.objects.create(
             title="Initial Task",
             description="Test desc",
-            status="Pending",
+            status=PENDING,
             deadline=timezone.now(),
             priority=self.priority,
             category=self.category,
@@ -39,7 +66,7 @@ class CRUDViewsSmokeTests(TestCase):
         payload = {
             "title": "New Task",
             "description": "Something",
-            "status": "Pending",
+            "status": PENDING,
             "deadline": (timezone.now() + timezone.timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'),
             "priority": self.priority.id,
             "category": self.category.id,
@@ -54,7 +81,7 @@ class CRUDViewsSmokeTests(TestCase):
         payload = {
             "task": self.task.id,
             "title": "Sub 1",
-            "status": "Pending",
+            "status": PENDING,
         }
         resp = self.client.post(reverse('subtask-add'), payload, follow=True)
         self.assertEqual(resp.status_code, 200)
@@ -69,4 +96,1656 @@ class CRUDViewsSmokeTests(TestCase):
         }
         resp = self.client.post(reverse('note-add'), payload, follow=True)
         self.assertEqual(resp.status_code, 200)
-        self.assertTrue(Note.objects.filter(content__icontains="Remember").exists())
\ No newline at end of file
+        self.assertTrue(Note.objects.filter(content__icontains="Remember").exists())
+
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+
+    def make_task(self, title="Task"):
+        return Task.objects.create(title=title, priority=self.priority, category=self.category)
+
+    def test_counters_follow_saves_and_deletes(self):
+        task = self.make_task()
+        SubTask.objects.create(task=task, title="Sub")
+        Note.objects.create(task=task, content="Hello")
+        counts = counters.snapshot()
+        self.assertEqual(counts['task'], 1)
+        self.assertEqual(counts['subtask'], 1)
+        self.assertEqual(counts['note'], 1)
+        self.assertEqual(counts[counters.year_key('task', timezone.localdate().year)], 1)
+
+        # Cascade deletes decrement the children too
+        self.category.delete()
+        counts = counters.snapshot()
+        self.assertEqual(counts['category'], 0)
+        self.assertEqual(counts['task'], 0)
+        self.assertEqual(counts['subtask'], 0)
+        self.assertEqual(counts['note'], 0)
+
+    def test_snapshot_is_one_query(self):
+        self.make_task()
+        with self.assertNumQueries(1):
+            counters.snapshot()
+
+    def test_reconcile_repairs_drift(self):
+        self.make_task()
+        Counter.objects.filter(name='task').update(value=42)
+        counters.reconcile()
+        self.assertEqual(counters.snapshot()['task'], 1)
+
+    def test_home_page_shows_counts(self):
+        self.make_task()
+        user = User.objects.create_user("dash", password="pw")
+        self.client.force_login(user)
+        resp = self.client.get(reverse('home'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['tasks_count'], 1)
+        self.assertEqual(resp.context['categories_count'], 1)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        self.task = Task.objects.create(
+            title="Quarterly report",
+            description="Collect numbers",
+            status=IN_PROGRESS,
+            priority=self.priority,
+            category=self.category,
+        )
+        Task.objects.create(title="Groceries", priority=self.priority, category=self.category)
+
+    def titles(self, url_name, q, key):
+        resp = self.client.get(reverse(url_name), {"q": q})
+        self.assertEqual(resp.status_code, 200)
+        return [str(obj) for obj in resp.context[key]]
+
+    def test_task_search_matches_prefixes_and_related_names(self):
+        self.assertEqual(self.titles('task-list', 'quart', 'tasks'), ["Quarterly report"])
+        self.assertEqual(self.titles('task-list', 'progress', 'tasks'), ["Quarterly report"])
+        self.assertEqual(len(self.titles('task-list', 'work', 'tasks')), 2)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.category.name = "Office"
+        self.category.save()
+        self.assertEqual(len(self.titles('task-list', 'office', 'tasks')), 2)
+        self.task.delete()
+        self.assertEqual(self.titles('task-list', 'quarterly', 'tasks'), [])
+
+    def test_child_search_uses_task_title(self):
+        SubTask.objects.create(task=self.task, title="Draft")
+        Note.objects.create(task=self.task, content="Ask finance")
+        self.assertEqual(self.titles('subtask-list', 'quarterly', 'subtasks'), ["Draft"])
+        self.assertEqual(len(self.titles('note-list', 'finance', 'notes')), 1)
+        self.task.title = "Annual report"
+        self.task.save()
+        self.assertEqual(self.titles('subtask-list', 'annual', 'subtasks'), ["Draft"])
+
+    def test_ranked_results_and_explicit_sort(self):
+        Task.objects.create(
+            title="Report report report", priority=self.priority, category=self.category
+        )
+        ranked = self.titles('task-list', 'report', 'tasks')
+        self.assertEqual(ranked[0], "Report report report")
+        resp = self.client.get(reverse('task-list'), {"q": "report", "sort_by": "title"})
+        self.assertEqual([t.title for t in resp.context['tasks']], ["Quarterly report", "Report report report"])
+
+    def test_fts_syntax_in_query_is_harmless(self):
+        self.assertEqual(self.titles('task-list', '"quart* (report', 'tasks'), ["Quarterly report"])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        now = timezone.now()
+        for i in range(12):
+            Task.objects.create(
+                title=f"Task {i:02d}",
+                deadline=None if i % 4 == 0 else now + timezone.timedelta(days=i % 3),
+                priority=self.priority,
+                category=self.category,
+            )
+
+    def walk(self, sort_by):
+        titles, cursor, pages = [], None, 0
+        while True:
+            params = {"sort_by": sort_by}
+            if cursor:
+                params["cursor"] = cursor
+            resp = self.client.get(reverse('task-list'), params)
+            page = resp.context['page_obj']
+            titles += [t.title for t in page]
+            pages += 1
+            if not page.has_next():
+                return titles, pages, page
+            cursor = page.next_cursor
+
+    def test_walk_matches_full_ordering(self):
+        for sort_by in ['title', 'deadline', '-created_at', 'category__name']:
+            titles, pages, _ = self.walk(sort_by)
+            self.assertEqual(len(titles), 12, sort_by)
+            self.assertEqual(len(set(titles)), 12, sort_by)
+            self.assertEqual(pages, 3)
+            if sort_by == 'title':
+                self.assertEqual(titles, sorted(titles))
+
+    def test_previous_cursor_returns_prior_page(self):
+        first = self.client.get(reverse('task-list'), {"sort_by": "title"}).context['page_obj']
+        second = self.client.get(
+            reverse('task-list'), {"sort_by": "title", "cursor": first.next_cursor}
+        ).context['page_obj']
+        back = self.client.get(
+            reverse('task-list'), {"sort_by": "title", "cursor": second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual([t.title for t in back], [t.title for t in first])
+        self.assertFalse(back.has_previous())
+
+    def test_last_page_and_estimated_total(self):
+        resp = self.client.get(reverse('task-list'), {"sort_by": "title"})
+        last = self.client.get(
+            reverse('task-list'), {"sort_by": "title", "cursor": resp.context['paginator'].last_cursor}
+        ).context['page_obj']
+        self.assertEqual([t.title for t in last], ["Task 07", "Task 08", "Task 09", "Task 10", "Task 11"])
+        self.assertEqual(resp.context['paginator'].estimated_count, 12)
+
+    def test_tampered_cursor_restarts(self):
+        resp = self.client.get(reverse('task-list'), {"sort_by": "title", "cursor": "garbage"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['page_obj'].object_list[0].title, "Task 00")
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN is SQLite-specific")
+class ListIndexQueryPlanTests(TestCase):
+    # Every sort option offered by the list views; notes sort by content
+    # through the indexed preview (see the comment on Note.Meta).
+    SORTS = {
+        views.CategoryListView: ['name'],
+        views.PriorityListView: ['name'],
+        views.TaskListView: [
+            'title', 'status', 'deadline', 'priority__name', 'category__name', 'created_at', '-created_at',
+            'progress', '-progress',
+        ],
+        views.SubTaskListView: ['task__title', 'title', 'status', 'created_at', '-created_at'],
+        views.NoteListView: ['task__title', 'content', 'created_at', '-created_at'],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [Category.objects.create(name=f"Category {i}") for i in range(5)]
+        priorities = [Priority.objects.create(name=f"Priority {i}") for i in range(5)]
+        tasks = Task.objects.bulk_create([
+            Task(title=f"Task {i}", priority=priorities[i % 5], category=categories[i % 5])
+            for i in range(200)
+        ])
+        SubTask.objects.bulk_create([SubTask(task=t, title=f"Sub {t.pk}") for t in tasks for _ in range(3)])
+        Note.objects.bulk_create([Note(task=t, content="note") for t in tasks for _ in range(3)])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def plan(self, view_class, sort_by):
+        view = view_class()
+        view.setup(RequestFactory().get('/', {"sort_by": sort_by}))
+        qs = view.get_queryset()
+        paginator = CursorPaginator(qs, view.paginate_by, view.get_ordering())
+        sql, params = qs.order_by(*paginator.order_by())[:view.paginate_by + 1].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_sorts_use_an_index(self):
+        for view_class, sorts in self.SORTS.items():
+            for sort_by in sorts:
+                with self.subTest(view=view_class.__name__, sort_by=sort_by):
+                    plan = self.plan(view_class, sort_by)
+                    self.assertFalse([step for step in plan if 'TEMP B-TREE' in step], plan)
+
+    def test_status_deadline_filter_uses_composite_index(self):
+        qs = Task.objects.filter(status=PENDING, deadline__lt=timezone.now()).order_by('deadline')
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("task_status_deadline_idx", plan)
+
+
+class BulkSeedTests(TestCase):
+    def seed(self, **options):
+        call_command('Initial_data', bulk=True, workers=1, stdout=StringIO(), **options)
+
+    def test_bulk_mode_writes_rows_and_counters(self):
+        self.seed(tasks=5, subtasks_per_task=3, notes_per_task=2, batch_size=2, seed=7)
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertEqual(SubTask.objects.count(), 15)
+        self.assertEqual(Note.objects.count(), 10)
+        counts = counters.snapshot()
+        self.assertEqual((counts['task'], counts['subtask'], counts['note']), (5, 15, 10))
+
+    def test_seed_is_reproducible(self):
+        self.seed(tasks=4, batch_size=3, seed=11)
+        first = list(Task.objects.order_by('pk').values_list('title', 'status'))
+        Task.objects.all().delete()
+        self.seed(tasks=4, batch_size=3, seed=11)
+        second = list(Task.objects.order_by('pk').values_list('title', 'status'))
+        self.assertEqual(first, second)
+
+
+class ViewBudgetTests(TestCase):
+    """Runs the benchmark suite (Application/benchmarks.py) at test size."""
+
+    def test_views_within_query_budget(self):
+        results = benchmarks.run(10)
+        self.assertEqual(benchmarks.over_budget(results, benchmarks.load_budgets()), [])
+
+    def test_query_counts_do_not_grow_with_data(self):
+        # Enough rows that every list is paginated in both runs
+        for i in range(10):
+            Category.objects.create(name=f"Extra {i}")
+            Priority.objects.create(name=f"Extra {i}")
+        small = benchmarks.run(10)
+        large = benchmarks.run(50)
+        grown = {
+            name: (small[name]['queries'], large[name]['queries'])
+            for name in small
+            if large[name]['queries'] > small[name]['queries']
+        }
+        self.assertEqual(grown, {})
+
+
+@override_settings(REQUEST_TIMING_SLOW_MS=0)
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        histograms.reset()
+
+    def test_server_timing_header_and_slow_log(self):
+        with self.assertLogs('Application.timing', level='WARNING') as logs:
+            resp = self.client.get(reverse('task-list'))
+        self.assertIn('db;dur=', resp['Server-Timing'])
+        self.assertIn('tpl;dur=', resp['Server-Timing'])
+        self.assertIn('total;dur=', resp['Server-Timing'])
+        self.assertIn('task-list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_metrics_endpoint_is_staff_only(self):
+        with self.assertLogs('Application.timing', level='WARNING'):
+            self.client.get(reverse('task-list'))
+            self.client.get(reverse('task-list'))
+            user = User.objects.create_user("ops", password="pw")
+            self.client.force_login(user)
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+            user.is_staff = True
+            user.save()
+            resp = self.client.get(reverse('metrics'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['requests']['task-list']['count'], 2)
+
+
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        Task.objects.create(title="First", priority=self.priority, category=self.category)
+
+    def test_unchanged_page_returns_304(self):
+        resp = self.client.get(reverse('task-list'))
+        self.assertIn('ETag', resp)
+        self.assertIn('Last-Modified', resp)
+        resp = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_cached_page_skips_list_queries(self):
+        first = self.client.get(reverse('task-list'), {"sort_by": "title"})
+        with self.assertNumQueries(1):  # version stamps only
+            second = self.client.get(reverse('task-list'), {"sort_by": "title"})
+        self.assertEqual(first.content, second.content)
+
+    def test_related_write_invalidates(self):
+        etag = self.client.get(reverse('task-list'))['ETag']
+        self.category.name = "Office"
+        self.category.save()
+        resp = self.client.get(reverse('task-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Office")
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_etag_varies_with_query(self):
+        plain = self.client.get(reverse('task-list'))['ETag']
+        searched = self.client.get(reverse('task-list'), {"q": "first"})['ETag']
+        self.assertNotEqual(plain, searched)
+
+
+class BatchApiTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        self.task = Task.objects.create(title="Parent", priority=self.priority, category=self.category)
+        self.client.force_login(User.objects.create_user("api", password="pw"))
+
+    def post(self, url_name, items):
+        return self.client.post(reverse(url_name), json.dumps(items), content_type="application/json")
+
+    def test_creates_subtasks_in_bulk(self):
+        items = [{"task": self.task.pk, "title": f"Sub {i}", "status": "Pending"} for i in range(200)]
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.post('api-subtask-batch', items)
+        # A handful of statements for the whole batch, not one per item
+        self.assertLess(len(queries), 30)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['created'], 200)
+        self.assertEqual(SubTask.objects.filter(task=self.task).count(), 200)
+        self.assertEqual(counters.snapshot()['subtask'], 200)
+
+    def test_mixed_create_and_partial_update(self):
+        sub = SubTask.objects.create(task=self.task, title="Old")
+        resp = self.post('api-subtask-batch', [
+            {"id": sub.pk, "status": "Completed"},
+            {"task": self.task.pk, "title": "New"},
+        ])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([r['status'] for r in resp.json()['results']], ['updated', 'created'])
+        sub.refresh_from_db()
+        self.assertEqual((sub.title, sub.status), ("Old", COMPLETED))
+
+    def test_invalid_item_rejects_whole_batch(self):
+        resp = self.post('api-task-batch', [
+            {"title": "Good", "status": "Pending", "priority": self.priority.pk, "category": self.category.pk},
+            {"title": "Bad", "status": "Nope", "priority": 999, "category": self.category.pk},
+        ])
+        self.assertEqual(resp.status_code, 400)
+        errors = resp.json()['errors']
+        self.assertEqual(errors[0]['index'], 1)
+        self.assertIn('status', errors[0]['errors'])
+        self.assertIn('priority', errors[0]['errors'])
+        self.assertFalse(Task.objects.filter(title="Good").exists())
+
+    def test_malformed_ids_are_item_errors(self):
+        resp = self.post('api-subtask-batch', [
+            {"id": "abc", "status": "Completed"},
+            {"task": [self.task.pk], "title": "Listed"},
+            {"task": {"id": self.task.pk}, "title": "Nested"},
+            {"task": self.task.pk, "title": "Good"},
+        ])
+        self.assertEqual(resp.status_code, 400)
+        errors = resp.json()['errors']
+        self.assertEqual([(e['index'], list(e['errors'])) for e in errors], [(0, ['id']), (1, ['task']), (2, ['task'])])
+        self.assertFalse(SubTask.objects.exists())
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.post('api-note-batch', []).status_code, 403)
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="exporter", password="pass")
+        self.client.login(username="exporter", password="pass")
+        category = Category.objects.create(name="Work")
+        priority = Priority.objects.create(name="High")
+        for i in range(5):
+            task = Task.objects.create(title=f"Report {i}", priority=priority, category=category)
+            SubTask.objects.create(task=task, title=f"Draft {i}")
+            Note.objects.create(task=task, content=f"Note {i}")
+        Task.objects.create(title="Unrelated", priority=priority, category=category)
+
+    def test_ndjson_nests_children_and_honours_filters(self):
+        resp = self.client.get(reverse('task-export'), {"q": "report", "sort_by": "title"})
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+        self.assertEqual([r['title'] for r in rows], [f"Report {i}" for i in range(5)])
+        self.assertEqual(rows[0]['subtasks'][0]['title'], "Draft 0")
+        self.assertEqual(rows[0]['notes'][0]['content'], "Note 0")
+
+    def test_csv_has_a_row_per_record(self):
+        resp = self.client.get(reverse('task-export'), {"format": "csv"})
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("record,id,task_id"))
+        self.assertEqual(len(lines), 1 + 6 + 5 + 5)
+
+    def test_children_are_prefetched_per_chunk(self):
+        # One task query plus a subtask and a note query for each chunk of 2
+        with self.assertNumQueries(1 + 3 * 2):
+            lines = list(exporting.export_lines('ndjson', chunk_size=2))
+        self.assertEqual(len(lines), 6)
+
+    def test_command_writes_file(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.csv")
+            call_command('export_tasks', format='csv', output=path, stderr=out)
+            with open(path) as f:
+                self.assertEqual(len(f.read().splitlines()), 17)
+        self.assertIn("Wrote 17 lines", out.getvalue())
+
+
+class TaskImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="importer", password="pass", is_staff=True)
+        self.client.login(username="importer", password="pass")
+
+    def ndjson(self, n, start=0):
+        return "".join(json.dumps({
+            "title": f"Imported {i}", "status": "Pending", "category": "Work", "priority": "High",
+            "deadline": "2026-01-01T09:00:00+00:00",
+            "subtasks": [{"title": f"Step {i}"}], "notes": [{"content": f"Note {i}"}],
+        }) + "\n" for i in range(start, start + n))
+
+    def run_import(self, text, fmt='ndjson', **kwargs):
+        importer = importing.Importer(**kwargs)
+        return importer.run(importing.READERS[fmt](StringIO(text)))
+
+    def test_imports_records_and_resolves_names(self):
+        Category.objects.create(name="Work")
+        result = self.run_import(self.ndjson(5), batch_size=2)
+        self.assertEqual((result.tasks, result.subtasks, result.notes), (5, 5, 5))
+        self.assertEqual(Category.objects.filter(name="Work").count(), 1)
+        self.assertEqual(Priority.objects.get().name, "High")
+        self.assertEqual(counters.snapshot()['task'], 5)
+        self.assertEqual(Task.objects.get(title="Imported 3").subtasks.get().title, "Step 3")
+
+    def test_invalid_records_are_skipped_and_reported(self):
+        text = self.ndjson(1) + "not json\n" + json.dumps({"title": "", "category": "Work"}) + "\n"
+        result = self.run_import(text)
+        self.assertEqual(result.tasks, 1)
+        self.assertEqual(result.invalid, 2)
+        self.assertEqual([e['line'] for e in result.errors], [2, 3])
+        self.assertIn('priority', result.errors[1]['errors'])
+
+    def test_null_fields_do_not_abort_the_batch(self):
+        text = (
+            self.ndjson(1)
+            + json.dumps({"title": "Blank", "description": None, "category": "Work", "priority": "High"}) + "\n"
+            + json.dumps({"title": None, "category": "Work", "priority": "High"}) + "\n"
+            + json.dumps({"title": "Empty note", "category": "Work", "priority": "High",
+                          "notes": [{"content": None}]}) + "\n"
+            + self.ndjson(1, start=1)
+        )
+        result = self.run_import(text)
+        self.assertEqual((result.tasks, result.invalid), (3, 2))
+        self.assertEqual([e['line'] for e in result.errors], [3, 4])
+        self.assertEqual(Task.objects.get(title="Blank").description, "")
+
+    def test_resume_skips_committed_batches(self):
+        text = self.ndjson(6)
+        self.run_import(self.ndjson(4), batch_size=2, checkpoint="dump")
+        self.assertEqual(ImportCheckpoint.objects.get(name="dump").records, 4)
+        result = self.run_import(text, batch_size=2, checkpoint="dump", resume=True)
+        self.assertEqual(result.tasks, 2)
+        self.assertEqual(Task.objects.count(), 6)
+        self.assertEqual(ImportCheckpoint.objects.get(name="dump").records, 6)
+
+    def test_export_round_trips_through_csv(self):
+        self.run_import(self.ndjson(3))
+        exported = "".join(exporting.export_lines('csv'))
+        Task.objects.all().delete()
+        result = self.run_import(exported, fmt='csv')
+        self.assertEqual((result.tasks, result.subtasks, result.notes, result.invalid), (3, 3, 3, 0))
+        self.assertIsNotNone(Task.objects.get(title="Imported 0").deadline)
+
+    def test_upload_endpoint_is_staff_only(self):
+        upload = SimpleUploadedFile("tasks.ndjson", self.ndjson(2).encode())
+        resp = self.client.post(reverse('task-import'), {"file": upload})
+        self.assertEqual(resp.json()['tasks'], 2)
+        User.objects.create_user(username="plain", password="pass")
+        self.client.login(username="plain", password="pass")
+        upload = SimpleUploadedFile("tasks.ndjson", self.ndjson(1).encode())
+        self.assertEqual(self.client.post(reverse('task-import'), {"file": upload}).status_code, 403)
+
+    def test_command_reports_rows_per_second(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.ndjson")
+            with open(path, "w") as f:
+                f.write(self.ndjson(3))
+            out = StringIO()
+            call_command('import_tasks', path, stdout=out)
+        self.assertIn("Imported 3 tasks", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="async", password="pass")
+        category = Category.objects.create(name="Work")
+        priority = Priority.objects.create(name="High")
+        for i in range(12):
+            Task.objects.create(title=f"Task {i:02}", priority=priority, category=category)
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    async def test_dashboard_matches_sync_view(self):
+        resp = await self.async_client.get(reverse('async-home'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['total_tasks'], 12)
+        self.assertEqual(resp.context['tasks_created_this_year'], 12)
+
+    async def test_dashboard_requires_login(self):
+        await sync_to_async(self.async_client.logout)()
+        resp = await self.async_client.get(reverse('async-home'))
+        self.assertEqual(resp.status_code, 302)
+
+    async def test_list_pages_match_sync_view(self):
+        params = {"sort_by": "title"}
+        while True:
+            sync_resp = await sync_to_async(self.client.get)(reverse('task-list'), params)
+            async_resp = await self.async_client.get(reverse('async-task-list'), params)
+            self.assertEqual(
+                [t.pk for t in async_resp.context['tasks']],
+                [t.pk for t in sync_resp.context['tasks']],
+            )
+            page = async_resp.context['page_obj']
+            if not page.has_next():
+                break
+            params = {"sort_by": "title", "cursor": page.next_cursor}
+
+    async def test_search_and_conditional_get(self):
+        resp = await self.async_client.get(reverse('async-task-list'), {"q": "task 03"})
+        self.assertEqual([t.title for t in resp.context['tasks']], ["Task 03"])
+        again = await self.async_client.get(
+            reverse('async-task-list'), {"q": "task 03"}, headers={"If-None-Match": resp['ETag']},
+        )
+        self.assertEqual(again.status_code, 304)
+
+    async def test_timing_middleware_counts_async_queries(self):
+        resp = await self.async_client.get(reverse('async-category-list'))
+        self.assertRegex(resp['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+
+class ThroughputBenchmarkTests(TransactionTestCase):
+    def test_wsgi_and_asgi_serve_every_request(self):
+        Task.objects.create(
+            title="Task", priority=Priority.objects.create(name="High"),
+            category=Category.objects.create(name="Work"),
+        )
+        results = benchmarks.throughput(0, total=8, threads=2, concurrency=4)
+        self.assertEqual([r['mode'] for r in results], ['wsgi', 'asgi'])
+        for r in results:
+            self.assertEqual((r['requests'], r['errors']), (8, 0))
+
+    def test_db_profiles_both_read_and_write(self):
+        category, priority = Category.objects.create(name="Work"), Priority.objects.create(name="High")
+        Task.objects.bulk_create([Task(title=f"Task {i}", priority=priority, category=category) for i in range(5)])
+        results = benchmarks.db_concurrency(duration=0.2, readers=2, writers=1)
+        self.assertEqual([r['profile'] for r in results], ['development', 'production'])
+        for r in results:
+            self.assertGreater(r['reads_per_s'], 0)
+            # The in-memory test database locks whole tables, so some writes can
+            # fail here (benchmark_db runs on a file)
+            self.assertGreater(r['writes_per_s'] + r['errors'], 0)
+
+
+class DatabaseProfileTests(TestCase):
+    SETTINGS_FILE = settings.BASE_DIR / 'projectsite1' / 'settings.py'
+
+    def load_settings(self, **env):
+        with mock.patch.dict(os.environ, env):
+            return runpy.run_path(str(self.SETTINGS_FILE))
+
+    def test_development_is_the_default(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DJANGO_PROFILE', None)
+            os.environ.pop('POSTGRES_DB', None)
+            conf = runpy.run_path(str(self.SETTINGS_FILE))
+        self.assertTrue(conf['DEBUG'])
+        self.assertEqual(conf['SQLITE_PRAGMAS'], {})
+        self.assertNotIn('CONN_MAX_AGE', conf['DATABASES']['default'])
+
+    def test_production_profile(self):
+        conf = self.load_settings(DJANGO_PROFILE='production', POSTGRES_DB='')
+        self.assertFalse(conf['DEBUG'])
+        db = conf['DATABASES']['default']
+        self.assertEqual((db['CONN_MAX_AGE'], db['CONN_HEALTH_CHECKS']), (600, True))
+        self.assertEqual(conf['SQLITE_PRAGMAS']['journal_mode'], 'WAL')
+        loader, _ = conf['TEMPLATES'][0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+
+        conf = self.load_settings(DJANGO_PROFILE='production', POSTGRES_DB='hangarin', POSTGRES_POOLER='pgbouncer')
+        db = conf['DATABASES']['default']
+        self.assertEqual(db['ENGINE'], 'django.db.backends.postgresql')
+        self.assertTrue(db['DISABLE_SERVER_SIDE_CURSORS'])
+        self.assertEqual(conf['SQLITE_PRAGMAS'], {})
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite pragmas")
+    def test_pragmas_applied_to_new_connections(self):
+        with override_settings(SQLITE_PRAGMAS={'cache_size': -1234, 'temp_store': 'MEMORY'}):
+            db = connections.create_connection('default')
+            try:
+                with db.cursor() as cursor:
+                    cursor.execute("PRAGMA cache_size")
+                    self.assertEqual(cursor.fetchone()[0], -1234)
+                    cursor.execute("PRAGMA temp_store")
+                    self.assertEqual(cursor.fetchone()[0], 2)
+            finally:
+                db.close()
+
+
+class LargeDataAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="pass", email="a@example.com")
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        self.task = Task.objects.create(title="Parent", priority=self.priority, category=self.category)
+
+    def add_children(self, n):
+        subtasks = SubTask.objects.bulk_create([SubTask(task=self.task, title=f"Step {i}") for i in range(n)])
+        notes = Note.objects.bulk_create([Note(task=self.task, content=f"Note {i}") for i in range(n)])
+        progress.track_bulk(SubTask, created=subtasks)
+        progress.track_bulk(Note, created=notes)
+
+    def changelist_queries(self, model_name):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse(f'admin:Application_{model_name}_changelist'))
+        self.assertEqual(resp.status_code, 200)
+        return queries
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_children(3)
+        small = {name: len(self.changelist_queries(name)) for name in ('subtask', 'note', 'task')}
+        self.add_children(40)
+        large = {name: len(self.changelist_queries(name)) for name in ('subtask', 'note', 'task')}
+        self.assertEqual(small, large)
+
+    def test_unfiltered_changelist_skips_count(self):
+        self.add_children(5)
+        queries = self.changelist_queries('subtask')
+        counts = [q['sql'] for q in queries if 'COUNT(' in q['sql'] and 'Application_subtask' in q['sql']]
+        self.assertEqual(counts, [])
+
+    def test_search_uses_full_text_index(self):
+        Task.objects.create(title="Quarterly report", priority=self.priority, category=self.category)
+        resp = self.client.get(reverse('admin:Application_task_changelist'), {"q": "quart"})
+        self.assertEqual([t.title for t in resp.context['cl'].result_list], ["Quarterly report"])
+
+    def test_inlines_show_one_page_of_children(self):
+        self.add_children(25)
+        url = reverse('admin:Application_task_change', args=[self.task.pk])
+        resp = self.client.get(url)
+        subtasks = resp.context['inline_admin_formsets'][0].formset
+        self.assertEqual(subtasks.initial_form_count(), 20)
+        self.assertEqual(subtasks.total, 25)
+        self.assertContains(resp, "subtask_page=2")
+        resp = self.client.get(url, {"subtask_page": 2})
+        self.assertEqual(resp.context['inline_admin_formsets'][0].formset.initial_form_count(), 5)
+
+    def test_inline_totals_use_the_task_counters(self):
+        self.add_children(25)
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(reverse('admin:Application_task_change', args=[self.task.pk]))
+        self.assertEqual([f.formset.total for f in resp.context['inline_admin_formsets']], [25, 25])
+        counts = [q['sql'] for q in queries if 'COUNT(' in q['sql']]
+        self.assertEqual(counts, [])
+
+    def test_fk_fields_use_autocomplete(self):
+        resp = self.client.get(reverse('admin:Application_subtask_add'))
+        self.assertContains(resp, "admin-autocomplete")
+
+
+class TaskLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Work")
+        priority = Priority.objects.create(name="High")
+        Task.objects.bulk_create(
+            [Task(title=f"Report {i:02}", priority=priority, category=category) for i in range(25)]
+            + [Task(title="Unrelated chore", priority=priority, category=category)]
+        )
+        cls.task = Task.objects.get(title="Report 00")
+
+    def test_prefix_lookup_is_case_insensitive_and_paginated(self):
+        data = self.client.get(reverse('task-lookup'), {"q": "rEP"}).json()
+        self.assertEqual([r['text'] for r in data['results']], [f"Report {i:02}" for i in range(20)])
+        data = self.client.get(data['next']).json()
+        self.assertEqual([r['text'] for r in data['results']], [f"Report {i:02}" for i in range(20, 25)])
+        self.assertIsNone(data['next'])
+
+    @skipUnless(connection.vendor == 'sqlite', "checks the SQLite query plan")
+    def test_lookup_uses_the_lower_title_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('task-lookup'), {"q": "rep"})
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + queries[-1]['sql'].replace('%', '%%'))
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("task_title_lower_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_forms_render_only_the_chosen_task(self):
+        resp = self.client.get(reverse('subtask-add'))
+        self.assertContains(resp, 'data-lookup-url="/tasks/lookup/"')
+        self.assertNotContains(resp, "Report 01")
+        subtask = SubTask.objects.create(task=self.task, title="Step")
+        resp = self.client.get(reverse('subtask-edit', args=[subtask.pk]))
+        self.assertContains(resp, f'<option value="{self.task.pk}" selected>Report 00</option>', html=True)
+        self.assertNotContains(resp, "Unrelated chore")
+
+    def test_chosen_id_is_validated(self):
+        resp = self.client.post(reverse('note-add'), {"task": 999999, "content": "Hello"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(Note.objects.exists())
+        resp = self.client.post(reverse('note-add'), {"task": self.task.pk, "content": "Hello"})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Note.objects.get().task, self.task)
+
+
+class TaskProgressCounterTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        self.task = Task.objects.create(title="Report", priority=self.priority, category=self.category)
+        self.other = Task.objects.create(title="Chores", priority=self.priority, category=self.category)
+
+    def counts(self, task):
+        task.refresh_from_db()
+        return (task.subtask_count, task.subtasks_done, task.note_count, task.progress)
+
+    def test_single_writes_adjust_the_counts(self):
+        first = SubTask.objects.create(task=self.task, title="Draft", status=COMPLETED)
+        second = SubTask.objects.create(task=self.task, title="Review")
+        SubTask.objects.create(task=self.task, title="Send")
+        Note.objects.create(task=self.task, content="Ask finance")
+        self.assertEqual(self.counts(self.task), (3, 1, 1, 33))
+
+        second.status = COMPLETED
+        second.save()
+        self.assertEqual(self.counts(self.task), (3, 2, 1, 66))
+
+        # Moving a subtask takes its status with it
+        first.task = self.other
+        first.save()
+        self.assertEqual(self.counts(self.task), (2, 1, 1, 50))
+        self.assertEqual(self.counts(self.other), (1, 1, 0, 100))
+
+        first.delete()
+        self.assertEqual(self.counts(self.other), (0, 0, 0, 0))
+        self.task.notes.get().delete()
+        self.assertEqual(self.counts(self.task), (2, 1, 0, 50))
+
+    def test_batch_api_adjusts_the_counts(self):
+        self.client.force_login(User.objects.create_user("api", password="pw"))
+        sub = SubTask.objects.create(task=self.task, title="Draft")
+        resp = self.client.post(reverse('api-subtask-batch'), json.dumps([
+            {"id": sub.pk, "task": self.other.pk, "status": "Completed"},
+            {"task": self.task.pk, "title": "New", "status": "Completed"},
+        ]), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.counts(self.task), (1, 1, 0, 100))
+        self.assertEqual(self.counts(self.other), (1, 1, 0, 100))
+
+    def test_batch_api_rejects_a_repeated_id(self):
+        self.client.force_login(User.objects.create_user("api", password="pw"))
+        sub = SubTask.objects.create(task=self.task, title="Draft")
+        before = counters.snapshot()
+        resp = self.client.post(reverse('api-subtask-batch'), json.dumps([
+            {"id": sub.pk, "status": "Completed"},
+            {"id": sub.pk, "status": "Completed"},
+        ]), content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual([e['index'] for e in resp.json()['errors']], [1])
+        self.assertEqual(self.counts(self.task), (1, 0, 0, 0))
+        self.assertEqual(counters.snapshot(), before)
+
+    def test_import_and_bulk_seed_set_the_counts(self):
+        record = {
+            "title": "Imported", "status": "Pending", "category": "Work", "priority": "High",
+            "subtasks": [{"title": "A", "status": "Completed"}, {"title": "B"}, {"title": "C"}],
+            "notes": [{"content": "N"}],
+        }
+        importing.Importer().run(importing.read_ndjson(StringIO(json.dumps(record) + "\n")))
+        self.assertEqual(self.counts(Task.objects.get(title="Imported")), (3, 1, 1, 33))
+
+        call_command('Initial_data', tasks=4, subtasks_per_task=3, notes_per_task=2, bulk=True, workers=1, stdout=StringIO())
+        self.assertEqual(progress.repair(), 0)
+
+    def test_repair_fixes_drifted_counts(self):
+        SubTask.objects.bulk_create([SubTask(task=self.task, title=f"Step {i}", status=COMPLETED) for i in range(4)])
+        Task.objects.filter(pk=self.other.pk).update(subtask_count=5, note_count=2)
+        out = StringIO()
+        call_command('repair_task_progress', chunk_size=1, stdout=out)
+        self.assertIn("Repaired the counts of 2 tasks.", out.getvalue())
+        self.assertEqual(self.counts(self.task), (4, 4, 0, 100))
+        self.assertEqual(self.counts(self.other), (0, 0, 0, 0))
+        self.assertEqual(progress.repair(), 0)
+
+    def test_counter_updates_leave_the_search_index_alone(self):
+        SubTask.objects.create(task=self.task, title="Draft")
+        resp = self.client.get(reverse('task-list'), {"q": "report"})
+        self.assertEqual([t.title for t in resp.context['tasks']], ["Report"])
+
+    def test_task_list_sorts_and_filters_by_progress(self):
+        SubTask.objects.create(task=self.task, title="Draft", status=COMPLETED)
+        SubTask.objects.create(task=self.task, title="Review")
+        SubTask.objects.create(task=self.other, title="Sweep", status=COMPLETED)
+        idle = Task.objects.create(title="Idle", priority=self.priority, category=self.category)
+
+        def titles(**params):
+            resp = self.client.get(reverse('task-list'), params)
+            self.assertEqual(resp.status_code, 200)
+            return [t.title for t in resp.context['tasks']]
+
+        self.assertEqual(titles(sort_by='-progress'), ["Chores", "Report", "Idle"])
+        self.assertEqual(titles(sort_by='progress'), ["Idle", "Report", "Chores"])
+        self.assertEqual(titles(progress='in-progress'), ["Report"])
+        self.assertEqual(titles(progress='complete'), ["Chores"])
+        self.assertEqual(titles(progress='not-started'), [idle.title])
+        resp = self.client.get(reverse('task-list'), {"sort_by": "title"})
+        self.assertContains(resp, "1/2 (50%)")
+
+
+class ListRenderingTests(TestCase):
+    def setUp(self):
+        caches['template_fragments'].clear()
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        self.task = Task.objects.create(title="Report", priority=self.priority, category=self.category)
+
+    def test_rows_are_cached_on_pk_and_updated_at(self):
+        self.assertContains(self.client.get(reverse('task-list'), {"r": 1}), "Report")
+        # A queryset update leaves updated_at alone, so the cached row is served
+        Task.objects.filter(pk=self.task.pk).update(title="Renamed")
+        self.assertContains(self.client.get(reverse('task-list'), {"r": 2}), "<td>Report</td>", html=True)
+        self.task.refresh_from_db()
+        self.task.save()
+        self.assertContains(self.client.get(reverse('task-list'), {"r": 3}), "<td>Renamed</td>", html=True)
+
+    def test_rows_follow_related_names_and_progress(self):
+        self.client.get(reverse('task-list'), {"r": 1})
+        Category.objects.filter(pk=self.category.pk).update(name="Office")
+        SubTask.objects.create(task=self.task, title="Draft", status=COMPLETED)
+        resp = self.client.get(reverse('task-list'), {"r": 2})
+        self.assertContains(resp, "<td>Office</td>", html=True)
+        self.assertContains(resp, "1/1 (100%)")
+
+    def test_offset_pagination_links_only_a_window(self):
+        Category.objects.bulk_create([Category(name=f"Category {i:02}") for i in range(60)])
+        resp = self.client.get(reverse('category-list'), {"page": 6})
+        self.assertEqual(list(resp.context['page_obj'].window), [4, 5, 6, 7, 8])
+        self.assertContains(resp, 'href="?page=4&')
+        self.assertNotContains(resp, 'href="?page=3&')
+        self.assertContains(resp, 'href="?page=13&')  # Last
+
+
+BUNDLED_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'Application.assets.BundledManifestStaticFilesStorage'},
+}
+
+
+class StaticAssetPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.TemporaryDirectory()
+        cls.settings = override_settings(STATIC_ROOT=cls.static_root.name, STORAGES=BUNDLED_STORAGES)
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        cls.static_root.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("assets", password="pw"))
+
+    def hashed(self, name):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        return staticfiles_storage.stored_name(name)
+
+    def test_pages_load_one_hashed_bundle_per_type(self):
+        resp = self.client.get(reverse('home'))
+        self.assertContains(resp, f'href="/static/{self.hashed("css/base.bundle.css")}"')
+        self.assertContains(resp, f'src="/static/{self.hashed("js/base.bundle.js")}"')
+        self.assertNotContains(resp, "jquery.mapael")
+        self.assertNotContains(resp, "bootstrap.min.js")
+
+    def test_bundles_are_precompressed_and_precached(self):
+        bundle = os.path.join(self.static_root.name, self.hashed("css/base.bundle.css"))
+        with open(bundle, 'rb') as f, gzip.open(bundle + '.gz') as gz:
+            self.assertEqual(gz.read(), f.read())
+        with open(os.path.join(self.static_root.name, 'serviceworker.js')) as f:
+            worker = f.read()
+        self.assertIn(f'"/static/{self.hashed("js/base.bundle.js")}"', worker)
+        self.assertNotIn("'/static/css/ready.min.css'", worker)
+
+    def test_hashed_files_are_served_compressed_with_far_future_headers(self):
+        name = self.hashed("js/base.bundle.js")
+        resp = self.client.get(f'/static/{name}', headers={"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertEqual(resp['Content-Type'], 'text/javascript')
+        self.assertEqual(resp['Cache-Control'], assets.FAR_FUTURE)
+        resp = self.client.get('/static/js/base.bundle.js')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+        self.assertEqual(resp['Cache-Control'], assets.SHORT_LIVED)
+        self.assertEqual(self.client.get('/static/../manage.py').status_code, 404)
+
+
+class BundleTagTests(TestCase):
+    def test_development_loads_the_sources(self):
+        self.client.force_login(User.objects.create_user("assets", password="pw"))
+        resp = self.client.get(reverse('home'))
+        self.assertContains(resp, 'src="/static/js/core/bootstrap.min.js"')
+        self.assertContains(resp, 'href="/static/css/ready.min.css"')
+        self.assertContains(resp, 'src="/static/js/plugin/chartist/chartist.min.js"')
+        # Chartist is only loaded by the page with the charts
+        self.assertNotContains(self.client.get(reverse('task-list')), "chartist")
+
+    def test_minify_css(self):
+        css = "/* header */\na ,\nb  {\n  color : red ;\n  width: calc(1px + 2px);\n}\n"
+        self.assertEqual(assets.minify_css(css), "a,b{color : red;width: calc(1px + 2px);}")
+
+
+class ChangesFeedTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("sync", password="pw"))
+        category = Category.objects.create(name="Work")
+        priority = Priority.objects.create(name="High")
+        self.task = Task.objects.create(title="Report", priority=priority, category=category)
+        self.subtask = SubTask.objects.create(task=self.task, title="Draft")
+        self.note = Note.objects.create(task=self.task, content="Remember the charts")
+
+    def pull(self, cursor=None, **params):
+        if cursor:
+            params['since'] = cursor
+        resp = self.client.get(reverse('api-changes'), params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_first_sync_sends_everything(self):
+        data = self.pull()
+        self.assertEqual([t['title'] for t in data['tasks']], ["Report"])
+        self.assertEqual(data['tasks'][0]['priority'], "High")
+        self.assertEqual(data['tasks'][0]['category'], "Work")
+        self.assertEqual(data['subtasks'][0]['task_id'], self.task.pk)
+        self.assertEqual(data['notes'][0]['content'], "Remember the charts")
+        self.assertEqual(data['deleted'], {'task': [], 'subtask': [], 'note': []})
+        self.assertFalse(data['more'])
+        self.assertTrue(str(Change.objects.latest('pk')).startswith(f"note {self.note.pk} changed "))
+
+    def test_next_sync_sends_only_changes(self):
+        cursor = self.pull()['cursor']
+        data = self.pull(cursor)
+        self.assertEqual((data['tasks'], data['subtasks'], data['notes']), ([], [], []))
+        self.subtask.title = "Draft v2"
+        self.subtask.save()
+        data = self.pull(data['cursor'])
+        self.assertEqual([s['title'] for s in data['subtasks']], ["Draft v2"])
+        self.assertEqual((data['tasks'], data['notes']), ([], []))
+
+    def test_deletes_are_sent_as_tombstones(self):
+        cursor = self.pull()['cursor']
+        note_pk = self.note.pk
+        self.note.delete()
+        data = self.pull(cursor)
+        self.assertEqual(data['deleted']['note'], [note_pk])
+        task_pk, subtask_pk = self.task.pk, self.subtask.pk
+        self.task.delete()
+        data = self.pull(data['cursor'])
+        self.assertEqual(data['deleted'], {'task': [task_pk], 'subtask': [subtask_pk], 'note': []})
+
+    def test_batches_are_limited(self):
+        Task.objects.bulk_create([Task(title=f"Bulk {i}", priority=self.task.priority, category=self.task.category)
+                                  for i in range(4)])
+        data = self.pull(limit=2)
+        seen = [t['id'] for t in data['tasks']]
+        self.assertTrue(data['more'])
+        while data['more']:
+            data = self.pull(data['cursor'], limit=2)
+            seen += [t['id'] for t in data['tasks']]
+        self.assertEqual(seen, sorted(Task.objects.values_list('id', flat=True)))
+
+    def test_changes_follow_commit_order_not_timestamps(self):
+        cursor = self.pull()['cursor']
+        # Stamped long before the cursor, as by a transaction that took a while to commit
+        Task.objects.filter(pk=self.task.pk).update(
+            title="Late", updated_at=timezone.now() - timezone.timedelta(minutes=5))
+        sync.record(Task, [self.task.pk])
+        self.assertEqual([t['title'] for t in self.pull(cursor)['tasks']], ["Late"])
+
+    def test_bulk_writes_are_sent(self):
+        cursor = self.pull()['cursor']
+        resp = self.client.post(reverse('api-subtask-batch'), json.dumps([
+            {"id": self.subtask.pk, "title": "Batched"},
+            {"task": self.task.pk, "title": "Added"},
+        ]), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(sorted(s['title'] for s in self.pull(cursor)['subtasks']), ["Added", "Batched"])
+
+    def test_renamed_category_resends_its_tasks(self):
+        cursor = self.pull()['cursor']
+        category = self.task.category
+        category.save()
+        self.assertEqual(self.pull(cursor)['tasks'], [])
+        category.name = "Office"
+        category.save()
+        data = self.pull(cursor)
+        self.assertEqual([(t['id'], t['category']) for t in data['tasks']], [(self.task.pk, "Office")])
+
+    def test_writes_during_the_first_sync_are_not_missed(self):
+        extra = [Task.objects.create(title=f"Extra {i}", priority=self.task.priority, category=self.task.category)
+                 for i in range(2)]
+        data = self.pull(limit=1)
+        self.assertTrue(data['more'])
+        Task.objects.filter(pk=self.task.pk).update(title="Changed meanwhile")
+        sync.record(Task, [self.task.pk])
+        titles = {}
+        while True:
+            titles.update((t['id'], t['title']) for t in data['tasks'])
+            if not data['more']:
+                break
+            data = self.pull(data['cursor'], limit=1)
+        self.assertEqual(titles[self.task.pk], "Changed meanwhile")
+        self.assertEqual(set(titles), {self.task.pk, *(t.pk for t in extra)})
+
+    def test_bad_and_expired_cursors(self):
+        resp = self.client.get(reverse('api-changes'), {'since': "not-a-cursor"})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get(reverse('api-changes'), {'limit': "lots"})
+        self.assertEqual(resp.status_code, 400)
+        old = sync.encode(0, timezone.now() - timezone.timedelta(days=settings.SYNC_TOMBSTONE_DAYS + 1))
+        resp = self.client.get(reverse('api-changes'), {'since': old})
+        self.assertEqual(resp.status_code, 410)
+        # Cursors from before the change log have to start over too
+        legacy = signing.dumps({'at': timezone.now().isoformat(), 'positions': {}}, salt=sync.SALT)
+        self.assertEqual(self.client.get(reverse('api-changes'), {'since': legacy}).status_code, 410)
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api-changes')).status_code, 403)
+
+    def test_purge_tombstones(self):
+        Change.objects.exclude(model='subtask').update(
+            changed_at=timezone.now() - timezone.timedelta(days=settings.SYNC_TOMBSTONE_DAYS + 1))
+        out = StringIO()
+        call_command('purge_tombstones', stdout=out)
+        self.assertIn("2", out.getvalue())
+        self.assertEqual(list(Change.objects.values_list('model', flat=True)), ['subtask'])
+
+
+class TaskArchiveTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+        self.old = self.make("Quarterly report", COMPLETED, subtasks=2, notes=1)
+        self.recent = self.make("Weekly report", COMPLETED)
+        self.open = self.make("Yearly report", PENDING)
+        Task.objects.filter(pk__in=[self.old.pk, self.open.pk]).update(
+            updated_at=timezone.now() - timezone.timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1))
+
+    def make(self, title, status, subtasks=0, notes=0):
+        task = Task.objects.create(title=title, status=status, priority=self.priority, category=self.category)
+        for i in range(subtasks):
+            SubTask.objects.create(task=task, title=f"{title} step {i}", status=COMPLETED)
+        for i in range(notes):
+            Note.objects.create(task=task, content=f"{title} note {i}")
+        return task
+
+    def test_moves_old_completed_tasks_with_their_children(self):
+        subtask_pks = set(self.old.subtasks.values_list('pk', flat=True))
+        note_pks = set(self.old.notes.values_list('pk', flat=True))
+        self.assertEqual(archiving.archive_completed(), 1)
+
+        archived = ArchivedTask.objects.get()
+        self.assertEqual((archived.pk, archived.title, archived.subtask_count), (self.old.pk, "Quarterly report", 2))
+        self.assertEqual(set(ArchivedSubTask.objects.filter(task=archived).values_list('pk', flat=True)), subtask_pks)
+        self.assertEqual(set(ArchivedNote.objects.filter(task=archived).values_list('pk', flat=True)), note_pks)
+        note = ArchivedNote.objects.first()
+        with self.assertNumQueries(0):
+            self.assertIn(f"for task {archived.pk}", str(note))
+        self.assertEqual(set(Task.objects.values_list('title', flat=True)), {"Weekly report", "Yearly report"})
+        self.assertFalse(SubTask.objects.exists())
+        self.assertFalse(Note.objects.exists())
+
+    def test_bookkeeping_matches_the_tables(self):
+        before = versions.current([Task])['task'][0]
+        last = Change.objects.aggregate(last=Max('pk'))['last']
+        archiving.archive_completed()
+        snapshot = counters.snapshot()
+        self.assertEqual((snapshot['task'], snapshot['subtask'], snapshot['note'], snapshot['archivedtask']), (2, 0, 0, 1))
+        counters.reconcile()
+        self.assertEqual(counters.snapshot(), snapshot)
+        self.assertGreater(versions.current([Task])['task'][0], before)
+        self.assertEqual(
+            sorted(Change.objects.filter(pk__gt=last).values_list('model', flat=True)),
+            ['note', 'subtask', 'subtask', 'task'])
+
+    def test_chunks(self):
+        for i in range(4):
+            self.make(f"Old {i}", COMPLETED, subtasks=1)
+        Task.objects.filter(title__startswith="Old").update(updated_at=self.old.updated_at)
+        Task.objects.filter(pk=self.old.pk).update(
+            updated_at=timezone.now() - timezone.timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1))
+        self.assertEqual(archiving.archive_completed(chunk_size=2, days=0), 6)
+        self.assertEqual(ArchivedSubTask.objects.count(), 6)
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ["Yearly report"])
+
+    def test_archive_is_searched_separately(self):
+        archiving.archive_completed()
+        resp = self.client.get(reverse('task-list'), {"q": "report"})
+        self.assertNotContains(resp, "Quarterly report")
+        self.assertContains(resp, "Weekly report")
+        resp = self.client.get(reverse('archive-list'), {"q": "quarter"})
+        self.assertContains(resp, "Quarterly report")
+        self.assertNotContains(resp, "Weekly report")
+        self.assertContains(self.client.get(reverse('archive-list')), "Quarterly report")
+
+        resp = self.client.get(reverse('archive-detail', args=[self.old.pk]))
+        self.assertContains(resp, "Quarterly report step 1")
+        self.assertContains(resp, "Quarterly report note 0")
+
+    def test_renamed_category_is_searchable(self):
+        archiving.archive_completed()
+        self.category.name = "Finance"
+        self.category.save()
+        resp = self.client.get(reverse('archive-list'), {"q": "finance"})
+        self.assertContains(resp, "Quarterly report")
+
+    def test_deleting_a_category_removes_its_archive(self):
+        archiving.archive_completed()
+        self.category.delete()
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(ArchivedNote.objects.exists())
+        self.assertEqual(counters.snapshot()['archivedtask'], 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_tasks', days=0, stdout=out)
+        self.assertIn("Archived 2 completed tasks", out.getvalue())
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ["Yearly report"])
+
+
+@override_settings(DELETE_INLINE_LIMIT=5, DELETION_BATCH_SIZE=2, DELETION_JOBS_IN_PROCESS=False)
+class BackgroundDeleteTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Doomed")
+        self.priority = Priority.objects.create(name="High")
+        self.keep = Category.objects.create(name="Kept")
+        for i in range(2):
+            task = Task.objects.create(title=f"Doomed {i}", priority=self.priority, category=self.category)
+            SubTask.objects.create(task=task, title=f"Step {i}")
+            SubTask.objects.create(task=task, title=f"Check {i}")
+            Note.objects.create(task=task, content=f"Note {i}")
+        Task.objects.create(title="Kept", priority=self.priority, category=self.keep, status=COMPLETED)
+        Task.objects.filter(title="Doomed 1").update(status=COMPLETED, updated_at=timezone.now() - timezone.timedelta(days=365))
+        archiving.archive_completed()
+        counters.reconcile()
+
+    def test_rows_under_a_hidden_parent_stay_editable(self):
+        deletion.schedule(self.category)
+        task = Task.objects.get(title="Doomed 0")
+        data = {
+            "title": "Doomed 0 (edited)", "description": "", "status": PENDING,
+            "deadline": "2026-01-01 09:00:00", "priority": self.priority.pk, "category": self.category.pk,
+        }
+        resp = self.client.post(reverse('task-edit', args=[task.pk]), data)
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Doomed 0 (edited)")
+        # Other hidden categories are still not on offer
+        other = Category.objects.create(name="Also doomed")
+        Category.objects.filter(pk=other.pk).update(deleting=True)
+        resp = self.client.post(reverse('task-edit', args=[task.pk]), dict(data, category=other.pk))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('category', resp.context['form'].errors)
+        resp = self.client.post(reverse('task-add'), data)
+        self.assertIn('category', resp.context['form'].errors)
+
+        subtask = task.subtasks.first()
+        deletion.schedule(task)
+        resp = self.client.post(reverse('subtask-edit', args=[subtask.pk]),
+                                {"task": task.pk, "title": "Still editable", "status": PENDING})
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(SubTask.objects.get(pk=subtask.pk).title, "Still editable")
+
+    def test_batch_rows_under_a_hidden_parent_stay_editable(self):
+        self.client.force_login(User.objects.create_user("batch", password="pw"))
+        deletion.schedule(self.category)
+        task = Task.objects.get(title="Doomed 0")
+        other = Category.objects.create(name="Also doomed")
+        Category.objects.filter(pk=other.pk).update(deleting=True)
+
+        def batch(name, items):
+            return self.client.post(reverse(name), json.dumps(items), content_type='application/json')
+
+        resp = batch('api-task-batch', [{'id': task.pk, 'title': "Kept"}])
+        self.assertEqual(resp.status_code, 200)
+        # Given explicitly, the current category is accepted too
+        resp = batch('api-task-batch', [{'id': task.pk, 'title': "Still kept", 'category': self.category.pk}])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Still kept")
+        # Moving to, or creating under, a hidden category is still refused
+        resp = batch('api-task-batch', [{'id': task.pk, 'category': other.pk}])
+        self.assertEqual(resp.json()['errors'][0]['errors'], {'category': [mock.ANY]})
+        resp = batch('api-task-batch', [
+            {'title': "New", 'priority': self.priority.pk, 'category': self.category.pk},
+        ])
+        self.assertEqual(resp.json()['errors'][0]['errors'], {'category': [mock.ANY]})
+
+        subtask = task.subtasks.first()
+        deletion.schedule(task)
+        resp = batch('api-subtask-batch', [{'id': subtask.pk, 'task': task.pk, 'title': "Still editable"}])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(SubTask.objects.get(pk=subtask.pk).title, "Still editable")
+
+    def test_small_parents_are_deleted_inline(self):
+        resp = self.client.post(reverse('category-delete', args=[self.keep.pk]))
+        self.assertEqual(resp.status_code, 302)
+        self.assertFalse(Category._base_manager.filter(pk=self.keep.pk).exists())
+        self.assertFalse(DeletionJob.objects.exists())
+
+    def test_large_parent_is_hidden_then_deleted_in_batches(self):
+        last = Change.objects.aggregate(last=Max('pk'))['last']
+        resp = self.client.post(reverse('category-delete', args=[self.category.pk]))
+        self.assertRedirects(resp, reverse('category-list'), fetch_redirect_response=False)
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.model, job.object_id, job.deleted), ('category', self.category.pk, 0))
+        # Hidden straight away, children still there until the job runs
+        self.assertNotContains(self.client.get(reverse('category-list')), "Doomed")
+        self.assertFalse(Category.objects.filter(pk=self.category.pk).exists())
+        self.assertEqual(counters.snapshot()['category'], 1)
+        self.assertEqual(Task.objects.filter(category=self.category).count(), 1)
+        self.assertEqual(self.client.get(reverse('category-delete', args=[self.category.pk])).status_code, 404)
+
+        with CaptureQueriesContext(connection) as queries:
+            job = deletion.run(job)
+        # Children are deleted by id without loading them whole
+        self.assertFalse([q for q in queries if '"content"' in q['sql']])
+        self.assertTrue([q for q in queries if q['sql'].startswith('DELETE FROM "Application_subtask" WHERE')])
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.deleted, job.total)
+        self.assertEqual(job.total, 1 + 2 + 1 + 1 + 2 + 1 + 1)
+        self.assertFalse(Category._base_manager.filter(pk=self.category.pk).exists())
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ["Kept"])
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(SubTask.objects.exists() or Note.objects.exists() or ArchivedNote.objects.exists())
+
+        snapshot = counters.snapshot()
+        counters.reconcile()
+        self.assertEqual(counters.snapshot(), snapshot)
+        self.assertEqual(Change.objects.filter(pk__gt=last, model='subtask').count(), 2)
+
+    def test_interrupted_job_resumes(self):
+        job = deletion.schedule(self.category)
+        real = deletion.delete_batch
+
+        def flaky(job, model, *args):
+            # Dies once the notes are gone
+            if model is SubTask:
+                raise RuntimeError("worker died")
+            return real(job, model, *args)
+
+        with mock.patch.object(deletion, 'delete_batch', flaky), self.assertRaises(RuntimeError):
+            deletion.run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.deleted, 1)
+        self.client.force_login(User.objects.create_user("deleter", password="pw"))
+        data = self.client.get(reverse('api-deletion', args=[job.pk])).json()
+        self.assertEqual(data, {'model': 'category', 'object_id': self.category.pk, 'deleted': 1,
+                                'total': job.total, 'finished': False})
+
+        self.assertEqual(list(deletion.resumable()), [])
+        with self.settings(DELETION_JOB_STALE_SECONDS=0):
+            out = StringIO()
+            call_command('run_deletion_jobs', stdout=out)
+        self.assertIn("Finished 1 deletion jobs", out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.deleted, job.total)
+        self.assertFalse(Category._base_manager.filter(pk=self.category.pk).exists())
+
+    def test_job_starts_after_commit(self):
+        with self.settings(DELETION_JOBS_IN_PROCESS=True), mock.patch.object(deletion, 'start') as start:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = deletion.schedule(self.category)
+        start.assert_called_once_with(job.pk)
+
+    def test_hidden_rows_keep_counter_pagination(self):
+        self.assertEqual(pagination.counter_total(Task.objects.order_by('title')), 2)
+        self.assertIsNone(pagination.counter_total(Task.objects.filter(title="Kept")))
+
+
+class DeadlineNotificationTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.user = User.objects.create_user("alice", password="pw")
+        self.other = User.objects.create_user("bob", password="pw")
+        User.objects.create_user("gone", password="pw", is_active=False)
+        self.category = Category.objects.create(name="Work")
+        self.priority = Priority.objects.create(name="High")
+
+    def task(self, title, hours, status=PENDING):
+        return Task.objects.create(
+            title=title, status=status, deadline=self.now + timezone.timedelta(hours=hours),
+            priority=self.priority, category=self.category,
+        )
+
+    def notified(self, user=None):
+        return sorted(Notification.objects.filter(user=user or self.user).values_list('task__title', 'kind'))
+
+    def test_thresholds_are_crossed_once(self):
+        self.task("Tomorrow", 12)
+        self.task("Next week", 24 * 7)
+        self.task("Done", 2, status=COMPLETED)
+        self.assertEqual(deadlines.scan(self.now), {'due_soon': 1, 'overdue': 0})
+        self.assertEqual(self.notified(), [("Tomorrow", "due_soon")])
+        self.assertEqual(self.notified(self.other), [("Tomorrow", "due_soon")])
+        self.assertEqual(Notification.objects.count(), 2)
+
+        # Nothing new until time moves on
+        self.assertEqual(deadlines.scan(self.now), {'due_soon': 0, 'overdue': 0})
+        later = self.now + timezone.timedelta(days=6, hours=12)
+        self.assertEqual(deadlines.scan(later), {'due_soon': 1, 'overdue': 1})
+        self.assertEqual(self.notified(), [("Next week", "due_soon"), ("Tomorrow", "due_soon"), ("Tomorrow", "overdue")])
+
+    def test_edited_tasks_are_caught_up(self):
+        deadlines.scan(self.now)
+        Watermark.objects.filter(name=deadlines.CHANGES).update(value=self.now - timezone.timedelta(minutes=1))
+        self.task("Urgent", 1)
+        late = self.task("Late", -1)
+        self.assertEqual(deadlines.scan(self.now), {'due_soon': 1, 'overdue': 1})
+        self.assertEqual(self.notified(), [("Late", "overdue"), ("Urgent", "due_soon")])
+
+        # Rescheduling announces the new deadline
+        late.deadline = self.now - timezone.timedelta(minutes=30)
+        late.save()
+        deadlines.scan(self.now)
+        self.assertEqual(Notification.objects.filter(user=self.user, task=late).count(), 2)
+
+    @skipUnless(connection.vendor == 'sqlite', "checks the SQLite query plan")
+    def test_scan_uses_the_status_deadline_index(self):
+        qs = Task.objects.filter(status__in=deadlines.OPEN_STATUSES, deadline__gt=self.now, deadline__lte=self.now)
+        sql, params = qs.values_list('pk', 'deadline').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("task_status_deadline_idx", plan)
+        self.assertIn("deadline>?", plan)
+
+    def test_navbar_feed(self):
+        for i in range(7):
+            self.task(f"Task {i}", i + 1)
+        deadlines.scan(self.now)
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse('api-notifications')).json()
+        self.assertEqual(len([q for q in queries if 'Application_notification' in q['sql']]), 1)
+        self.assertEqual(len(data['items']), deadlines.NAVBAR_LIMIT)
+        self.assertTrue(data['more'])
+        self.assertEqual(data['items'][0]['label'], "Due within 24 hours")
+
+        first = data['items'][0]['id']
+        self.assertEqual(self.client.post(reverse('api-notifications'), {'id': first}).json(), {'read': 1})
+        self.assertEqual(self.client.post(reverse('api-notifications')).json(), {'read': 6})
+        self.assertEqual(self.client.get(reverse('api-notifications')).json(), {'items': [], 'more': False})
+        self.assertEqual(Notification.objects.filter(user=self.other, read=False).count(), 7)
+
+    def test_navbar_markup(self):
+        self.client.force_login(self.user)
+        resp = self.client.get(reverse('home'))
+        self.assertContains(resp, 'data-url="/api/notifications/"')
+        self.assertNotContains(resp, "Farrah liked Admin")
+
+    def test_archived_and_deleted_tasks_take_their_notifications(self):
+        task = self.task("Old", -24 * 365, status=IN_PROGRESS)
+        deadlines.scan(self.now)
+        Watermark.objects.all().delete()
+        Notification.objects.create(user=self.user, task=task, kind="overdue", deadline=task.deadline)
+        Task.objects.filter(pk=task.pk).update(status=COMPLETED, updated_at=self.now - timezone.timedelta(days=365))
+        archiving.archive_completed()
+        self.assertFalse(Notification.objects.exists())
+
+        task = self.task("Doomed", 1)
+        deadlines.scan(self.now)
+        deletion.run(deletion.schedule(task))
+        self.assertFalse(Notification.objects.exists())
+
+    def test_command(self):
+        self.task("Tomorrow", 12)
+        out = StringIO()
+        call_command('scan_deadlines', once=True, stdout=out)
+        self.assertIn("1 tasks due soon, 0 overdue", out.getvalue())
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("charts", password="pw"))
+        self.work = Category.objects.create(name="Work")
+        self.home = Category.objects.create(name="Home")
+        self.priority = Priority.objects.create(name="High")
+        self.today = timezone.localdate()
+
+    def task(self, title, category=None, status=PENDING):
+        return Task.objects.create(title=title, status=status, priority=self.priority, category=category or self.work)
+
+    def activity(self, **params):
+        resp = self.client.get(reverse('api-activity'), {'start': self.today, 'end': self.today, **params})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_signals_keep_created_completed_and_open(self):
+        first, second = self.task("First"), self.task("Second", category=self.home)
+        SubTask.objects.create(task=first, title="Step")
+        Note.objects.create(task=first, content="Remember")
+        first.refresh_from_db()
+        first.status = COMPLETED
+        first.save()
+        second.category = self.work
+        second.save()
+
+        data = self.activity()
+        self.assertEqual((data['created'], data['completed'], data['open'], data['total']), ([2], [1], [1], [2]))
+        self.assertEqual(data['statuses'], {'Pending': [1], 'In Progress': [0], 'Completed': [1]})
+        self.assertEqual(self.activity(category=self.home.pk)['total'], [0])
+        self.assertEqual(self.activity(model='subtask')['open'], [1])
+        self.assertEqual(self.activity(model='note')['total'], [1])
+
+        first.delete()
+        data = self.activity()
+        self.assertEqual((data['created'], data['completed'], data['total']), ([2], [1], [1]))
+        self.assertEqual(self.activity(model='subtask')['total'], [0])
+        self.assertEqual(self.activity(model='note')['total'], [0])
+
+    def test_range_carries_earlier_days_forward(self):
+        task = self.task("Old")
+        Task.objects.filter(pk=task.pk).update(created_at=timezone.now() - timezone.timedelta(days=10))
+        rollups.rebuild()
+        start = self.today - timezone.timedelta(days=2)
+        with self.assertNumQueries(2 + 2):  # session and user, then the two rollup reads
+            resp = self.client.get(reverse('api-activity'), {'start': start, 'end': self.today})
+        data = resp.json()
+        self.assertEqual(len(data['days']), 3)
+        self.assertEqual(data['created'], [0, 0, 0])
+        self.assertEqual(data['open'], [1, 1, 1])
+
+    def test_bulk_paths_are_recorded(self):
+        resp = self.client.post(
+            reverse('api-task-batch'),
+            json.dumps([{'title': 'Batch', 'status': 'Pending', 'priority': self.priority.pk, 'category': self.work.pk}]),
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 200)
+        pk = resp.json()['results'][0]['id']
+        self.client.post(
+            reverse('api-task-batch'), json.dumps([{'id': pk, 'status': 'Completed'}]), content_type='application/json',
+        )
+        data = self.activity()
+        self.assertEqual((data['created'], data['completed'], data['open']), ([1], [1], [0]))
+
+        # A background delete uncounts the task when it's scheduled and its children batch by batch
+        task = Task.objects.get(pk=pk)
+        SubTask.objects.create(task=task, title="Step")
+        with self.settings(DELETE_INLINE_LIMIT=0, DELETION_JOBS_IN_PROCESS=False):
+            job = deletion.schedule(task)
+        self.assertEqual(self.activity()['total'], [0])
+        deletion.run(job)
+        self.assertEqual(self.activity(model='subtask')['total'], [0])
+
+    def test_archiving_keeps_the_history(self):
+        task = self.task("Done", status=COMPLETED)
+        before = self.activity()
+        archiving.move([task])
+        self.assertEqual(self.activity(), before)
+
+    def test_rebuild_matches_incremental_updates(self):
+        first = self.task("First")
+        self.task("Second", category=self.home, status=IN_PROGRESS)
+        SubTask.objects.create(task=first, title="Step", status=COMPLETED)
+        Note.objects.create(task=first, content="Remember")
+        first.refresh_from_db()
+        first.status = COMPLETED
+        first.save()
+        archiving.move([first])
+
+        expected = {model: self.activity(model=model) for model in ('task', 'subtask', 'note')}
+        self.assertGreater(rollups.rebuild(), 0)
+        for model, data in expected.items():
+            rebuilt = self.activity(model=model)
+            for series in ('completed', 'open', 'total', 'statuses'):
+                self.assertEqual(rebuilt[series], data[series], (model, series))
+
+    def test_moving_a_task_moves_its_children(self):
+        first, second = self.task("First"), self.task("Second")
+        for task in (first, second):
+            SubTask.objects.create(task=task, title="Step", status=COMPLETED)
+            SubTask.objects.create(task=task, title="Next")
+            Note.objects.create(task=task, content="Remember")
+        first.refresh_from_db()
+        first.category = self.home
+        first.save()
+        resp = self.client.post(
+            reverse('api-task-batch'), json.dumps([{'id': second.pk, 'category': self.home.pk}]),
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 200)
+        SubTask.objects.filter(task=first, status=COMPLETED).get().delete()
+
+        def levels():
+            return {
+                (model, category.pk): self.activity(model=model, category=category.pk)
+                for model in ('task', 'subtask', 'note') for category in (self.work, self.home)
+            }
+
+        expected = levels()
+        self.assertEqual(expected['subtask', self.home.pk]['total'], [3])
+        self.assertEqual(expected['note', self.work.pk]['total'], [0])
+        rollups.rebuild()
+        for key, data in levels().items():
+            for series in ('open', 'total', 'statuses'):
+                self.assertEqual(data[series], expected[key][series], (key, series))
+
+    def test_bad_parameters(self):
+        url = reverse('api-activity')
+        self.assertEqual(self.client.get(url, {'model': 'user'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2026-02-01', 'end': '2026-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '1900-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'category': 'x'}).status_code, 400)
+        self.assertEqual(len(self.client.get(url).json()['days']), rollups.DEFAULT_DAYS)
+
+
+class StatusCodeTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user("codes", password="pw"))
+        self.priority = Priority.objects.create(name="High")
+        self.category = Category.objects.create(name="Work")
+        self.task = Task.objects.create(
+            title="Report", status=IN_PROGRESS, priority=self.priority, category=self.category,
+        )
+        SubTask.objects.create(task=self.task, title="Draft", status=COMPLETED)
+
+    def test_labels_at_the_edges(self):
+        rows = [json.loads(line) for line in exporting.export_lines('ndjson')]
+        self.assertEqual((rows[0]['status'], rows[0]['subtasks'][0]['status']), ("In Progress", "Completed"))
+        feed = self.client.get(reverse('api-changes')).json()
+        self.assertEqual((feed['tasks'][0]['status'], feed['subtasks'][0]['status']), ("In Progress", "Completed"))
+        self.assertContains(self.client.get(reverse('task-list')), "<td>In Progress</td>", html=True)
+
+        resp = self.client.post(reverse('api-task-batch'), json.dumps([
+            {"id": self.task.pk, "status": "completed"},
+            {"title": "Coded", "status": PENDING, "priority": self.priority.pk, "category": self.category.pk},
+        ]), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            dict(Task.objects.values_list('title', 'status')), {"Report": COMPLETED, "Coded": PENDING},
+        )
+
+    def test_search_fallback_maps_text_onto_codes(self):
+        self.assertEqual(search.matches('status', 'PROG'), Q(status__in=[IN_PROGRESS]))
+        self.assertEqual(list(Task.objects.filter(search.matches('status', 'prog'))), [self.task])
+        self.assertFalse(Task.objects.filter(search.matches('status', 'nope')).exists())
+
+    def test_done_counts_read_only_the_index(self):
+        qs = SubTask.objects.filter(task=self.task, status=COMPLETED).values('pk')
+        sql, params = qs.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN SELECT COUNT(*) FROM (%s)" % sql, params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("COVERING INDEX subtask_task_status_idx", plan)
+
+
+class NotePreviewTests(TestCase):
+    def setUp(self):
+        caches['template_fragments'].clear()
+        self.client.force_login(User.objects.create_user("notes", password="pw"))
+        self.task = Task.objects.create(
+            title="Report", priority=Priority.objects.create(name="High"),
+            category=Category.objects.create(name="Work"),
+        )
+        self.body = "Long " * 1000
+        self.note = Note.objects.create(task=self.task, content=self.body)
+
+    def test_preview_is_bounded(self):
+        self.assertEqual(note_preview("Short"), "Short")
+        preview = note_preview("x" * (NOTE_PREVIEW_LENGTH + 1))
+        self.assertEqual(len(preview), NOTE_PREVIEW_LENGTH)
+        self.assertTrue(preview.endswith("…"))
+        self.assertTrue(self.note.preview_truncated)
+        self.assertEqual(Note.objects.get().preview, note_preview(self.body))
+        # A note that fits, even one ending in …, isn't cut
+        exact = Note.objects.create(task=self.task, content="x" * (NOTE_PREVIEW_LENGTH - 1) + "…")
+        self.assertFalse(Note.objects.get(pk=exact.pk).preview_truncated)
+
+    def test_preview_follows_saves(self):
+        self.note.content = "Edited"
+        self.note.save(update_fields=['content', 'updated_at'])
+        self.assertEqual(Note.objects.get().preview, "Edited")
+        # Saving with the body deferred keeps the preview
+        note = Note.objects.defer('content').get()
+        note.save()
+        self.assertEqual(Note.objects.get().preview, "Edited")
+        self.assertEqual(str(note), "Edited")
+
+    def test_bulk_paths_fill_the_preview(self):
+        resp = self.client.post(reverse('api-note-batch'), json.dumps([
+            {"task": self.task.pk, "content": "B" * 300},
+            {"id": self.note.pk, "content": "Replaced"},
+        ]), content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(Note.objects.get(pk=self.note.pk).preview, "Replaced")
+        self.assertFalse(Note.objects.get(pk=self.note.pk).preview_truncated)
+        self.assertEqual(Note.objects.exclude(pk=self.note.pk).get().preview, note_preview("B" * 300))
+
+        importing.Importer().run(importing.read_ndjson(StringIO(json.dumps({
+            "title": "Imported", "category": "Work", "priority": "High", "notes": [{"content": "C" * 300}],
+        }) + "\n")))
+        self.assertEqual(Note.objects.get(task__title="Imported").preview, note_preview("C" * 300))
+
+    def test_list_leaves_the_body_for_the_endpoint(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('note-list'), {"sort_by": "content"})
+        self.assertContains(resp, note_preview(self.body))
+        self.assertContains(resp, 'data-note-content="%s"' % reverse('note-content', args=[self.note.pk]))
+        self.assertFalse([q for q in ctx.captured_queries if '"content"' in q['sql'] and 'Application_note' in q['sql']])
+
+        # Session and user, then the one column
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse('note-content', args=[self.note.pk]))
+        self.assertEqual(resp.json(), {'id': self.note.pk, 'content': self.body})
+        self.assertEqual(self.client.get(reverse('note-content', args=[self.note.pk + 1])).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('note-content', args=[self.note.pk])).status_code, 403)
+
+    def test_str_needs_no_query(self):
+        note = Note.objects.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(str(note), note.preview)
+
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, deadlines, deletion, exporting, importing, rollups, sync, views
 from .views import (
     CategoryListView, CategoryCreateView, CategoryUpdateView, CategoryDeleteView,
     PriorityListView, PriorityCreateView, PriorityUpdateView, PriorityDeleteView,
@@ -23,6 +23,9 @@ urlpatterns = [
 
     # Task URLs
     path('tasks/', views.TaskListView.as_view(), name='task-list'),
+    path('tasks/export/', exporting.TaskExportView.as_view(), name='task-export'),
+    path('tasks/import/', importing.TaskImportView.as_view(), name='task-import'),
+    path('tasks/lookup/', api.TaskLookupView.as_view(), name='task-lookup'),
     path('tasks/add/', views.TaskCreateView.as_view(), name='task-add'),
     path('tasks/<int:pk>/edit/', views.TaskUpdateView.as_view(), name='task-edit'),
     path('tasks/<int:pk>/delete/', views.TaskDeleteView.as_view(), name='task-delete'),
@@ -38,4 +41,29 @@ urlpatterns = [
     path('notes/add/', views.NoteCreateView.as_view(), name='note-add'),
     path('notes/<int:pk>/edit/', views.NoteUpdateView.as_view(), name='note-edit'),
     path('notes/<int:pk>/delete/', views.NoteDeleteView.as_view(), name='note-delete'),
+    path('notes/<int:pk>/content/', views.NoteContentView.as_view(), name='note-content'),
+
+    # Archive URLs
+    path('archive/', views.ArchiveListView.as_view(), name='archive-list'),
+    path('archive/<int:pk>/', views.ArchivedTaskDetailView.as_view(), name='archive-detail'),
+
+    # Batch JSON API
+    path('api/tasks/batch/', api.TaskBatchView.as_view(), name='api-task-batch'),
+    path('api/subtasks/batch/', api.SubTaskBatchView.as_view(), name='api-subtask-batch'),
+    path('api/notes/batch/', api.NoteBatchView.as_view(), name='api-note-batch'),
+    path('api/changes/', sync.ChangesView.as_view(), name='api-changes'),
+    path('api/deletions/<int:pk>/', deletion.DeletionJobView.as_view(), name='api-deletion'),
+    path('api/notifications/', deadlines.NotificationsView.as_view(), name='api-notifications'),
+    path('api/activity/', rollups.ActivityView.as_view(), name='api-activity'),
+
+    # Async (ASGI) variants of the dashboard and list views
+    path('async/', views.AsyncHomePageView.as_view(), name='async-home'),
+    path('async/categories/', views.AsyncCategoryListView.as_view(), name='async-category-list'),
+    path('async/priorities/', views.AsyncPriorityListView.as_view(), name='async-priority-list'),
+    path('async/tasks/', views.AsyncTaskListView.as_view(), name='async-task-list'),
+    path('async/subtasks/', views.AsyncSubTaskListView.as_view(), name='async-subtask-list'),
+    path('async/notes/', views.AsyncNoteListView.as_view(), name='async-note-list'),
+
+    # Metrics
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
 ]
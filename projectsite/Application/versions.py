@@ -0,0 +1,39 @@
+from django.db.models import F
+from django.utils import timezone
+
+from Application.models import ModelVersion
+
+
+def version_name(model):
+    return model._meta.model_name
+
+
+def bump(*models):
+    """Mark models as changed. Called from signals and from bulk write paths."""
+    now = timezone.now()
+    for model in models:
+        name = version_name(model)
+        if ModelVersion.objects.filter(name=name).update(version=F('version') + 1, changed_at=now):
+            continue
+        _, created = ModelVersion.objects.get_or_create(name=name, defaults={'version': 1})
+        if not created:
+            ModelVersion.objects.filter(name=name).update(version=F('version') + 1, changed_at=now)
+
+
+def current(models):
+    """{name: (version, changed_at)} for the given models, in one query.
+
+    Models that have never been written get (0, None).
+    """
+    names = [version_name(model) for model in models]
+    rows = ModelVersion.objects.filter(name__in=names).values_list('name', 'version', 'changed_at')
+    found = {name: (version, changed_at) for name, version, changed_at in rows}
+    return {name: found.get(name, (0, None)) for name in names}
+
+
+async def acurrent(models):
+    """current() on the async ORM."""
+    names = [version_name(model) for model in models]
+    rows = ModelVersion.objects.filter(name__in=names).values_list('name', 'version', 'changed_at')
+    found = {name: (version, changed_at) async for name, version, changed_at in rows}
+    return {name: found.get(name, (0, None)) for name in names}
@@ -1,11 +1,20 @@
 
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, View
 from django.urls import reverse_lazy
-from Application.models import Task, Category, Priority, SubTask, Note
-from django.db.models import Q
+from Application.models import Task, Category, Priority, SubTask, Note, ArchivedTask
+from Application.forms import NoteForm, SubTaskForm, TaskForm
+from Application import counters, search
+from Application.deletion import BackgroundDeleteMixin
+from Application.middleware import histograms
+from Application.caching import AsyncVersionedListMixin, VersionedListMixin
+from Application.pagination import CursorPaginationMixin, CursorPaginator
 from django.utils import timezone
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import Http404, JsonResponse
 
 # Home page view (Task List)
 class HomePageView(LoginRequiredMixin, ListView):
@@ -16,12 +25,14 @@ class HomePageView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Totals across your domain models
-        context['total_categories'] = Category.objects.count()
-        context['total_priorities'] = Priority.objects.count()
-        context['total_tasks'] = Task.objects.count()
-        context['total_subtasks'] = SubTask.objects.count()
-        context['total_notes'] = Note.objects.count()
+        # Totals across your domain models, read from the counters table in one query
+        year = timezone.localdate().year
+        counts = self.get_counts(year)
+        context['total_categories'] = counts['category']
+        context['total_priorities'] = counts['priority']
+        context['total_tasks'] = counts['task']
+        context['total_subtasks'] = counts['subtask']
+        context['total_notes'] = counts['note']
 
         # Provide counts under names expected by the template
         context['categories_count'] = context['total_categories']
@@ -30,17 +41,40 @@ class HomePageView(LoginRequiredMixin, ListView):
         context['subtasks_count'] = context['total_subtasks']
 
         # Year-to-date counts for models with created_at
-        today = timezone.now().date()
-        year = today.year
-        context['tasks_created_this_year'] = Task.objects.filter(created_at__year=year).count()
-        context['subtasks_created_this_year'] = SubTask.objects.filter(created_at__year=year).count()
-        context['notes_created_this_year'] = Note.objects.filter(created_at__year=year).count()
+        context['tasks_created_this_year'] = counts[counters.year_key('task', year)]
+        context['subtasks_created_this_year'] = counts[counters.year_key('subtask', year)]
+        context['notes_created_this_year'] = counts[counters.year_key('note', year)]
 
         return context
 
+    def get_counts(self, year):
+        return counters.snapshot(year)
+
+# Search over the full-text index (Application/search.py). Results are ranked
+# by relevance unless the user picked an explicit sort order.
+class SearchMixin:
+    def is_ranked(self):
+        return bool(self.request.GET.get('q')) and not self.request.GET.get('sort_by')
+
+    def search(self, qs):
+        q = self.request.GET.get('q')
+        if q:
+            qs = search.search(qs, q)
+            if self.is_ranked():
+                qs = search.order_by_rank(qs)
+        return qs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['q'] = self.request.GET.get('q', '')
+        # Use effective ordering so dropdown selection reflects current state
+        context['sort_by'] = '' if self.is_ranked() else self.get_ordering()
+        return context
+
 # Category Views
-class CategoryListView(ListView):
+class CategoryListView(VersionedListMixin, SearchMixin, CursorPaginationMixin, ListView):
     model = Category
+    version_models = (Category,)
     template_name = 'category_list.html'
     context_object_name = 'categories'
     ordering = ['name']
@@ -55,17 +89,7 @@ class CategoryListView(ListView):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        q = self.request.GET.get('q')
-        if q:
-            qs = qs.filter(name__icontains=q)
-        return qs
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['q'] = self.request.GET.get('q', '')
-        # Use effective ordering so dropdown selection reflects current state
-        context['sort_by'] = self.get_ordering()
-        return context
+        return self.search(qs)
 
 class CategoryCreateView(CreateView):
     model = Category
@@ -81,15 +105,16 @@ class CategoryUpdateView(UpdateView):
     success_url = reverse_lazy('category-list')
     paginate_by = 5
 
-class CategoryDeleteView(DeleteView):
+class CategoryDeleteView(BackgroundDeleteMixin, DeleteView):
     model = Category
     template_name = 'category_confirm_delete.html'
     success_url = reverse_lazy('category-list')
     paginate_by = 5
 
 # Priority Views
-class PriorityListView(ListView):
+class PriorityListView(VersionedListMixin, SearchMixin, CursorPaginationMixin, ListView):
     model = Priority
+    version_models = (Priority,)
     template_name = 'priority_list.html'
     context_object_name = 'priorities'
     ordering = ['name']
@@ -104,17 +129,7 @@ class PriorityListView(ListView):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        q = self.request.GET.get('q')
-        if q:
-            qs = qs.filter(name__icontains=q)
-        return qs
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['q'] = self.request.GET.get('q', '')
-        # Use effective ordering so dropdown selection reflects current state
-        context['sort_by'] = self.get_ordering()
-        return context
+        return self.search(qs)
 
 
 class PriorityCreateView(CreateView):
@@ -131,15 +146,24 @@ class PriorityUpdateView(UpdateView):
     success_url = reverse_lazy('priority-list')
     paginate_by = 5
 
-class PriorityDeleteView(DeleteView):
+class PriorityDeleteView(BackgroundDeleteMixin, DeleteView):
     model = Priority
     template_name = 'priority_confirm_delete.html'
     success_url = reverse_lazy('priority-list')
     paginate_by = 5
 
 # Task Views
-class TaskListView(ListView):
+# ?progress= filters over Task.progress (percentage of subtasks completed)
+PROGRESS_FILTERS = {
+    'not-started': {'progress': 0},
+    'in-progress': {'progress__gt': 0, 'progress__lt': 100},
+    'complete': {'progress': 100},
+}
+
+class TaskListView(VersionedListMixin, SearchMixin, CursorPaginationMixin, ListView):
     model = Task
+    # SubTask writes change the progress counts shown on this page
+    version_models = (Task, Category, Priority, SubTask)
     template_name = 'task_list.html'
     context_object_name = 'tasks'
     ordering = ['category__name', 'priority__name', 'title']
@@ -154,55 +178,54 @@ class TaskListView(ListView):
             'category__name',
             'created_at',
             '-created_at',
+            'progress',
+            '-progress',
         ]
         sort_by = self.request.GET.get('sort_by')
         if sort_by in allowed:
             return sort_by
         return 'category__name'
 
+    def get_progress(self):
+        progress = self.request.GET.get('progress')
+        return progress if progress in PROGRESS_FILTERS else ''
+
     def get_queryset(self):
         qs = super().get_queryset().select_related('priority', 'category')
-        q = self.request.GET.get('q')
-        if q:
-            qs = qs.filter(
-                Q(title__icontains=q)
-                | Q(description__icontains=q)
-                | Q(status__icontains=q)
-                | Q(priority__name__icontains=q)
-                | Q(category__name__icontains=q)
-            )
-        return qs
+        progress = self.get_progress()
+        if progress:
+            qs = qs.filter(**PROGRESS_FILTERS[progress])
+        return self.search(qs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['q'] = self.request.GET.get('q', '')
-        # Use effective ordering so dropdown selection reflects current state
-        context['sort_by'] = self.get_ordering()
+        context['progress'] = self.get_progress()
         return context
 
 class TaskCreateView(CreateView):
     model = Task
-    fields = ['title', 'description', 'status', 'deadline', 'priority', 'category']
+    form_class = TaskForm
     template_name = 'task_form.html'
     success_url = reverse_lazy('task-list')
     paginate_by = 5
 
 class TaskUpdateView(UpdateView):
     model = Task
-    fields = ['title', 'description', 'status', 'deadline', 'priority', 'category']
+    form_class = TaskForm
     template_name = 'task_form.html'
     success_url = reverse_lazy('task-list')
     paginate_by = 5
 
-class TaskDeleteView(DeleteView):
+class TaskDeleteView(BackgroundDeleteMixin, DeleteView):
     model = Task
     template_name = 'task_confirm_delete.html'
     success_url = reverse_lazy('task-list')
     paginate_by = 5
 
 # SubTask Views
-class SubTaskListView(ListView):
+class SubTaskListView(VersionedListMixin, SearchMixin, CursorPaginationMixin, ListView):
     model = SubTask
+    version_models = (SubTask, Task)
     template_name = 'subtask_list.html'
     context_object_name = 'subtasks'
     ordering = ['-created_at']
@@ -223,31 +246,19 @@ class SubTaskListView(ListView):
 
     def get_queryset(self):
         qs = super().get_queryset().select_related('task')
-        q = self.request.GET.get('q')
-        if q:
-            qs = qs.filter(
-                Q(title__icontains=q) | Q(status__icontains=q) | Q(task__title__icontains=q)
-            )
-        return qs
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['q'] = self.request.GET.get('q', '')
-        # Use effective ordering so dropdown selection reflects current state
-        context['sort_by'] = self.get_ordering()
-        return context
+        return self.search(qs)
 
 
 class SubTaskCreateView(CreateView):
     model = SubTask
-    fields = ['task', 'title', 'status']
+    form_class = SubTaskForm
     template_name = 'subtask_form.html'
     success_url = reverse_lazy('subtask-list')
     paginate_by = 5
 
 class SubTaskUpdateView(UpdateView):
     model = SubTask
-    fields = ['task', 'title', 'status']
+    form_class = SubTaskForm
     template_name = 'subtask_form.html'
     success_url = reverse_lazy('subtask-list')
     paginate_by = 5
@@ -259,8 +270,9 @@ class SubTaskDeleteView(DeleteView):
     paginate_by = 5
 
 # Note Views
-class NoteListView(ListView):
+class NoteListView(VersionedListMixin, SearchMixin, CursorPaginationMixin, ListView):
     model = Note
+    version_models = (Note, Task)
     template_name = 'note_list.html'
     context_object_name = 'notes'
     ordering = ['-created_at']
@@ -269,40 +281,45 @@ class NoteListView(ListView):
     def get_ordering(self):
         allowed = [
             'task__title',
-            'content',
             'created_at',
             '-created_at',
         ]
         sort_by = self.request.GET.get('sort_by')
+        if sort_by == 'content':
+            # Bodies aren't indexed (or loaded); sort on the indexed preview, i.e. by
+            # the first NOTE_PREVIEW_LENGTH characters
+            return 'preview'
         if sort_by in allowed:
             return sort_by
         return '-created_at'
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related('task')
-        q = self.request.GET.get('q')
-        if q:
-            qs = qs.filter(Q(content__icontains=q) | Q(task__title__icontains=q))
-        return qs
+        # Rows show the stored preview; full bodies come from NoteContentView on demand
+        qs = super().get_queryset().select_related('task').defer('content')
+        return self.search(qs)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['q'] = self.request.GET.get('q', '')
-        # Use effective ordering so dropdown selection reflects current state
-        context['sort_by'] = self.get_ordering()
-        return context
+
+class NoteContentView(LoginRequiredMixin, View):
+    """The full body of one note, as JSON, for the note list's "More" links."""
+    raise_exception = True
+
+    def get(self, request, pk, *args, **kwargs):
+        content = Note.objects.filter(pk=pk).values_list('content', flat=True).first()
+        if content is None:
+            raise Http404
+        return JsonResponse({'id': pk, 'content': content})
 
 
 class NoteCreateView(CreateView):
     model = Note
-    fields = ['task', 'content']
+    form_class = NoteForm
     template_name = 'note_form.html'
     success_url = reverse_lazy('note-list')
     paginate_by = 5
 
 class NoteUpdateView(UpdateView):
     model = Note
-    fields = ['task', 'content']
+    form_class = NoteForm
     template_name = 'note_form.html'
     success_url = reverse_lazy('note-list')
     paginate_by = 5
@@ -311,4 +328,104 @@ class NoteDeleteView(DeleteView):
     model = Note
     template_name = 'note_confirm_delete.html'
     success_url = reverse_lazy('note-list')
-    paginate_by = 5
\ No newline at end of file
+    paginate_by = 5
+
+# Archive Views (completed tasks moved out by Application/archiving.py)
+class ArchiveListView(VersionedListMixin, SearchMixin, CursorPaginationMixin, ListView):
+    model = ArchivedTask
+    version_models = (ArchivedTask, Category, Priority)
+    template_name = 'archive_list.html'
+    context_object_name = 'tasks'
+    ordering = ['-updated_at']
+    paginate_by = 5
+
+    def get_ordering(self):
+        allowed = [
+            'title',
+            'created_at',
+            '-created_at',
+            'updated_at',
+            '-updated_at',
+        ]
+        sort_by = self.request.GET.get('sort_by')
+        if sort_by in allowed:
+            return sort_by
+        return '-updated_at'
+
+    def get_queryset(self):
+        qs = super().get_queryset().select_related('priority', 'category')
+        return self.search(qs)
+
+class ArchivedTaskDetailView(DetailView):
+    model = ArchivedTask
+    template_name = 'archive_detail.html'
+    context_object_name = 'task'
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('priority', 'category')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['subtasks'] = self.object.subtasks.order_by('created_at', 'pk')
+        context['notes'] = self.object.notes.order_by('created_at', 'pk')
+        return context
+
+# Request timing histograms collected by RequestTimingMiddleware (staff only)
+class MetricsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'requests': histograms.snapshot()})
+
+
+# Async variants of the dashboard and list views, for ASGI deployments. They
+# share everything with the views above except the database reads, which go
+# through the async ORM so a slow query doesn't tie up a worker thread.
+class AsyncHomePageView(HomePageView):
+    async def dispatch(self, request, *args, **kwargs):
+        # request.user is loaded from the session on first access; do that off the event loop
+        await sync_to_async(lambda: request.user.pk)()
+        response = super().dispatch(request, *args, **kwargs)
+        return await response if asyncio.iscoroutine(response) else response
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        self.counts = await counters.asnapshot(timezone.localdate().year)
+        return self.render_to_response(self.get_context_data())
+
+    def get_counts(self, year):
+        return self.counts
+
+class AsyncListMixin:
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        page_size = self.get_paginate_by(self.object_list)
+        self.async_page = await self.apaginate_queryset(self.object_list, page_size)
+        return self.render_to_response(self.get_context_data())
+
+    async def apaginate_queryset(self, queryset, page_size):
+        if self.is_ranked() or self.request.GET.get('page'):
+            return await sync_to_async(super().paginate_queryset)(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.get_ordering())
+        page = await paginator.apage(self.request.GET.get('cursor'))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def paginate_queryset(self, queryset, page_size):
+        # Already fetched in get()
+        return self.async_page
+
+class AsyncCategoryListView(AsyncListMixin, AsyncVersionedListMixin, CategoryListView):
+    pass
+
+class AsyncPriorityListView(AsyncListMixin, AsyncVersionedListMixin, PriorityListView):
+    pass
+
+class AsyncTaskListView(AsyncListMixin, AsyncVersionedListMixin, TaskListView):
+    pass
+
+class AsyncSubTaskListView(AsyncListMixin, AsyncVersionedListMixin, SubTaskListView):
+    pass
+
+class AsyncNoteListView(AsyncListMixin, AsyncVersionedListMixin, NoteListView):
+    pass
@@ -24,8 +24,14 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-aki@&eowcq#x8yk&p5o0+qu0-b5_di=9l%^1!s1@#@6s(ns!(='
 
+# Runtime profile. DJANGO_PROFILE=production is what deployments run: DEBUG
+# off (which also stops Django keeping every query in connection.queries),
+# persistent health-checked database connections and SQLite tuned for
+# concurrent readers (see DATABASES below). Anything else is development.
+PRODUCTION = os.environ.get('DJANGO_PROFILE') == 'production'
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
 ALLOWED_HOSTS = ["joeldave.pythonanywhere.com","127.0.0.1"]
 
@@ -68,6 +74,7 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 
 MIDDLEWARE = [
+    'Application.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +85,37 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Requests slower than this are logged with their slowest SQL (Application.timing logger)
+REQUEST_TIMING_SLOW_MS = 500
+
+# Largest number of items accepted by one batch API request (Application/api.py)
+API_BATCH_LIMIT = 5000
+
+# Offline changes feed (Application/sync.py): its change log (deletes
+# included) is kept this long; older cursors must resync from scratch
+SYNC_TOMBSTONE_DAYS = 30
+
+# Completed tasks untouched for this many days are moved to the archive tables
+# by the archive_tasks command (Application/archiving.py), this many per transaction
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_CHUNK_SIZE = 200
+
+# Categories, priorities and tasks with more dependent rows than this are
+# deleted by a background job (Application/deletion.py), in batches of
+# DELETION_BATCH_SIZE. Jobs run in a thread of the process that scheduled them
+# (unless DELETION_JOBS_IN_PROCESS is off); run_deletion_jobs resumes any that
+# have made no progress for DELETION_JOB_STALE_SECONDS.
+DELETE_INLINE_LIMIT = 1000
+DELETION_BATCH_SIZE = 500
+DELETION_JOBS_IN_PROCESS = True
+DELETION_JOB_STALE_SECONDS = 60
+
+# Deadline notifications (Application/deadlines.py, scan_deadlines command):
+# open tasks are announced when they come within DUE_SOON_HOURS of their
+# deadline and again once it has passed; read ones are kept this many days
+DUE_SOON_HOURS = 24
+NOTIFICATION_RETENTION_DAYS = 30
+
 ROOT_URLCONF = 'projectsite1.urls'
 
 TEMPLATES = [
@@ -96,16 +134,92 @@ TEMPLATES = [
     },
 ]
 
+# Django 4.1+ already wraps the default loaders in the cached loader; spell
+# it out for production so parsed templates are always kept for the life of
+# the process, whatever DEBUG is
+if PRODUCTION:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'projectsite1.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite by default; setting POSTGRES_DB switches to Postgres (through
+# psycopg, listed in requirements.txt). Behind a transaction-mode pooler such
+# as PgBouncer (POSTGRES_POOLER=pgbouncer), server-side cursors can't outlive
+# a transaction, so QuerySet.iterator() (used by the exports) falls back to
+# client-side fetching.
+
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', ''),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', ''),
+            'PORT': os.environ.get('POSTGRES_PORT', ''),
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_POOLER') == 'pgbouncer',
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Applied to every new SQLite connection (Application/database.py). WAL lets
+# readers carry on while a write commits; synchronous=NORMAL is durable
+# under WAL except across a power loss; the cache and memory map keep hot
+# pages out of read() calls.
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -32000,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRAGMAS = {}
+
+if PRODUCTION:
+    # Keep each worker's connection open between requests, checking it's
+    # still usable before reusing it
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', 600))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+        # Wait for the writer's lock rather than failing with "database is locked"
+        DATABASES['default']['OPTIONS'] = {'timeout': 20}
+
+# Caches
+# "pages" holds rendered list pages keyed by their ETag (see Application/caching.py).
+# LocMemCache evicts least-recently-used entries once MAX_ENTRIES is reached.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'list-pages',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 500},
+    },
+    # {% cache %} fragments for list table rows, keyed on pk + updated_at
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
 }
 
 # Password validation
@@ -146,6 +260,49 @@ STATICFILES_DIRS = (
     BASE_DIR / 'static',
 )
 
+# Files concatenated into one per page layout by collectstatic in production
+# (Application/assets.py) and loaded with {% bundle %}. Development serves the
+# sources one by one.
+STATIC_BUNDLES = {
+    'css/base.bundle.css': [
+        'css/bootstrap.min.css',
+        'css/ready.min.css',
+        'css/demo.css',
+    ],
+    'js/base.bundle.js': [
+        'js/core/jquery.3.2.1.min.js',
+        'js/core/popper.min.js',
+        'js/core/bootstrap.min.js',
+        'js/plugin/jquery-scrollbar/jquery.scrollbar.min.js',
+        'js/ready.min.js',
+        'js/offline-sync.js',
+        'js/notifications.js',
+    ],
+    # Home page charts only
+    'js/home.bundle.js': [
+        'js/plugin/chartist/chartist.min.js',
+        'js/plugin/chartist/plugin/chartist-plugin-tooltip.min.js',
+        'js/activity-chart.js',
+    ],
+    # Note list only
+    'js/notes.bundle.js': [
+        'js/note-body.js',
+    ],
+}
+
+# Precached by the service worker along with the bundles
+STATIC_PRECACHE = [
+    'img/menu.png',
+    'img/profile.jpg',
+]
+
+if PRODUCTION:
+    # Hashed names, bundles, .gz/.br variants and a generated serviceworker.js
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'Application.assets.BundledManifestStaticFilesStorage'},
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -195,4 +352,7 @@ PWA_APP_ICONS_APPLE = [
 }
 ]
 PWA_APP_DIR = 'ltr'
-PWA_SERVICE_WORKER_PATH = os.path.join(BASE_DIR, 'static/js', 'serviceworker.js')
\ No newline at end of file
+PWA_SERVICE_WORKER_PATH = os.path.join(BASE_DIR, 'static/js', 'serviceworker.js')
+if PRODUCTION:
+    # The copy collectstatic renders with the hashed asset URLs
+    PWA_SERVICE_WORKER_PATH = os.path.join(STATIC_ROOT, 'serviceworker.js')
\ No newline at end of file
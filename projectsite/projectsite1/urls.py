@@ -14,11 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
+from django.conf import settings
 from django.contrib import admin
 
-from django.urls import path, include
+from django.urls import path, include, re_path
 from Application.views import HomePageView
-from Application import views
+from Application import assets, views
 
 urlpatterns = [
 path("admin/", admin.site.urls),
@@ -26,4 +29,11 @@ path('', include('pwa.urls')),
 path("accounts/", include("allauth.urls")), # allauth routes
 path('', views.HomePageView.as_view(), name='home'),
 path('', include('Application.urls')),
-]
\ No newline at end of file
+]
+
+if not settings.DEBUG:
+    # Only reached when no web server in front handles STATIC_URL: serves the
+    # precompressed variants with long cache lifetimes (Application/assets.py)
+    urlpatterns.append(
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), assets.serve)
+    )
@@ -0,0 +1,42 @@
+// Home page activity chart: tasks created, completed and open per day, from
+// the rollups behind api/activity/ (see Application/rollups.py).
+(function () {
+	var box = document.getElementById('activity-chart');
+	if (!box || typeof Chartist === 'undefined') {
+		return;
+	}
+
+	function points(days, values) {
+		return values.map(function (value, i) {
+			return {meta: days[i], value: value};
+		});
+	}
+
+	fetch(box.getAttribute('data-url'), {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+		.then(function (resp) { return resp.ok ? resp.json() : null; })
+		.then(function (data) {
+			if (!data) {
+				return;
+			}
+			// A label every week keeps the axis readable
+			var labels = data.days.map(function (day, i) {
+				return i % 7 === 0 ? day.slice(5) : '';
+			});
+			new Chartist.Line(box, {
+				labels: labels,
+				series: [
+					points(data.days, data.created),
+					points(data.days, data.completed),
+					points(data.days, data.open)
+				]
+			}, {
+				height: '240px',
+				low: 0,
+				fullWidth: true,
+				axisY: {onlyInteger: true},
+				chartPadding: {right: 20},
+				plugins: [Chartist.plugins.tooltip()]
+			});
+		})
+		.catch(function () {});
+})();
@@ -0,0 +1,26 @@
+// Note list: rows show the stored preview; "More" fetches the full body from
+// notes/<id>/content/ (see NoteContentView) and puts it in place.
+(function () {
+	var table = document.querySelector('[data-note-list]');
+	if (!table) {
+		return;
+	}
+
+	table.addEventListener('click', function (event) {
+		var link = event.target.closest('[data-note-content]');
+		if (!link) {
+			return;
+		}
+		event.preventDefault();
+		var cell = link.closest('td');
+		fetch(link.getAttribute('data-note-content'), {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+			.then(function (resp) { return resp.ok ? resp.json() : null; })
+			.then(function (data) {
+				if (data) {
+					cell.textContent = data.content;
+					cell.style.whiteSpace = 'pre-wrap';
+				}
+			})
+			.catch(function () {});
+	});
+})();
@@ -0,0 +1,61 @@
+// Navbar notification dropdown: deadline notifications for the signed-in
+// user from api/notifications/ (see Application/deadlines.py). Loaded after
+// the page so cached pages always show the current list.
+(function () {
+	var box = document.getElementById('notifications');
+	if (!box) {
+		return;
+	}
+	var url = box.getAttribute('data-url');
+	var badge = box.querySelector('.notification');
+	var title = box.querySelector('.dropdown-title');
+	var list = box.querySelector('.notif-center');
+	var markAll = box.querySelector('.see-all');
+	var icons = {due_soon: ['notif-primary', 'la-clock-o'], overdue: ['notif-danger', 'la-exclamation-circle']};
+
+	function csrfToken() {
+		var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+		return match ? decodeURIComponent(match[1]) : '';
+	}
+
+	function item(n) {
+		var icon = icons[n.kind] || icons.due_soon;
+		var link = document.createElement('a');
+		link.href = n.url;
+		link.innerHTML = '<div class="notif-icon ' + icon[0] + '"><i class="la ' + icon[1] + '"></i></div>' +
+			'<div class="notif-content"><span class="block"></span><span class="time"></span></div>';
+		link.querySelector('.block').textContent = n.task;
+		link.querySelector('.time').textContent = n.label + ' · ' + new Date(n.deadline).toLocaleString();
+		return link;
+	}
+
+	function render(data) {
+		var count = data.items.length;
+		list.innerHTML = '';
+		data.items.forEach(function (n) {
+			list.appendChild(item(n));
+		});
+		badge.textContent = count + (data.more ? '+' : '');
+		badge.classList.toggle('d-none', !count);
+		markAll.classList.toggle('d-none', !count);
+		title.textContent = count ? 'You have ' + badge.textContent + ' new notifications' : 'No new notifications';
+	}
+
+	function load() {
+		fetch(url, {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+			.then(function (resp) { return resp.ok ? resp.json() : null; })
+			.then(function (data) {
+				if (data) {
+					render(data);
+				}
+			})
+			.catch(function () {});
+	}
+
+	markAll.addEventListener('click', function (event) {
+		event.preventDefault();
+		fetch(url, {method: 'POST', credentials: 'same-origin', headers: {'X-CSRFToken': csrfToken()}})
+			.then(load);
+	});
+	load();
+})();
@@ -0,0 +1,23 @@
+// Ask the service worker to pull the latest changes into IndexedDB (see
+// serviceworker.js) when a page loads and whenever the connection comes back.
+(function () {
+	if (!('serviceWorker' in navigator)) {
+		return;
+	}
+
+	function requestSync() {
+		navigator.serviceWorker.ready.then(function (registration) {
+			if ('sync' in registration) {
+				// Background Sync retries by itself if we're offline right now
+				registration.sync.register('changes').catch(function () {
+					registration.active.postMessage({type: 'sync'});
+				});
+			} else if (registration.active) {
+				registration.active.postMessage({type: 'sync'});
+			}
+		});
+	}
+
+	window.addEventListener('online', requestSync);
+	requestSync();
+})();
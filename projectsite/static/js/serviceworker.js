@@ -2,13 +2,24 @@
 const CACHE_VERSION = 'v3';
 const STATIC_CACHE = `hangarin-static-${CACHE_VERSION}`;
 
-// Only include assets that exist to prevent install failures
+// Only include assets that exist to prevent install failures. In production
+// collectstatic rewrites this list (and CACHE_VERSION) with the hashed bundle
+// URLs; see Application/assets.py.
 const PRECACHE_URLS = [
   '/static/css/bootstrap.min.css',
   '/static/css/ready.min.css',
-  '/static/js/ready.min.js',
+  '/static/css/demo.css',
   '/static/js/core/jquery.3.2.1.min.js',
+  '/static/js/core/popper.min.js',
   '/static/js/core/bootstrap.min.js',
+  '/static/js/plugin/jquery-scrollbar/jquery.scrollbar.min.js',
+  '/static/js/ready.min.js',
+  '/static/js/offline-sync.js',
+  '/static/js/notifications.js',
+  '/static/js/plugin/chartist/chartist.min.js',
+  '/static/js/plugin/chartist/plugin/chartist-plugin-tooltip.min.js',
+  '/static/js/activity-chart.js',
+  '/static/js/note-body.js',
   '/static/img/menu.png',
   '/static/img/profile.jpg',
 ];
@@ -23,12 +34,107 @@ self.addEventListener('install', (event) => {
 self.addEventListener('activate', (event) => {
   event.waitUntil(
     caches.keys().then((keys) => Promise.all(
-      keys.filter((k) => k.startsWith('Application-') && k !== STATIC_CACHE)
+      keys.filter((k) => k.startsWith('hangarin-static-') && k !== STATIC_CACHE)
           .map((k) => caches.delete(k))
     )).then(() => self.clients.claim())
   );
 });
 
+// Offline data: tasks, subtasks and notes mirrored into IndexedDB from the
+// changes feed, which only sends what changed since the stored cursor.
+const CHANGES_URL = '/api/changes/';
+const DB_NAME = 'hangarin';
+const DB_VERSION = 1;
+// Object store -> model name used in the feed's "deleted" lists
+const SYNC_STORES = { tasks: 'task', subtasks: 'subtask', notes: 'note' };
+
+function openDb() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+    request.onupgradeneeded = () => {
+      const db = request.result;
+      Object.keys(SYNC_STORES).forEach((name) => db.createObjectStore(name, { keyPath: 'id' }));
+      db.createObjectStore('meta');
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function finished(tx) {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = tx.onabort = () => reject(tx.error);
+  });
+}
+
+function storedCursor(db) {
+  return new Promise((resolve, reject) => {
+    const request = db.transaction('meta').objectStore('meta').get('cursor');
+    request.onsuccess = () => resolve(request.result || null);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function applyChanges(db, batch) {
+  // Rows and the cursor that follows them are committed together
+  const tx = db.transaction([...Object.keys(SYNC_STORES), 'meta'], 'readwrite');
+  Object.entries(SYNC_STORES).forEach(([name, model]) => {
+    const store = tx.objectStore(name);
+    batch[name].forEach((row) => store.put(row));
+    batch.deleted[model].forEach((id) => store.delete(id));
+  });
+  tx.objectStore('meta').put(batch.cursor, 'cursor');
+  return finished(tx);
+}
+
+function clearAll(db) {
+  const tx = db.transaction([...Object.keys(SYNC_STORES), 'meta'], 'readwrite');
+  [...Object.keys(SYNC_STORES), 'meta'].forEach((name) => tx.objectStore(name).clear());
+  return finished(tx);
+}
+
+async function pullChanges() {
+  const db = await openDb();
+  let cursor = await storedCursor(db);
+  for (;;) {
+    const url = CHANGES_URL + (cursor ? `?since=${encodeURIComponent(cursor)}` : '');
+    const response = await fetch(url, { credentials: 'same-origin', headers: { Accept: 'application/json' } });
+    if (response.status === 410 && cursor) {
+      // Too old to catch up from: start again from an empty copy
+      await clearAll(db);
+      cursor = null;
+      continue;
+    }
+    if (!response.ok) return; // signed out or offline; the next sync retries
+    const batch = await response.json();
+    await applyChanges(db, batch);
+    cursor = batch.cursor;
+    if (!batch.more) return;
+  }
+}
+
+// One pull at a time; requests arriving mid-pull share it
+let pulling = null;
+function syncChanges() {
+  if (!pulling) {
+    pulling = pullChanges().catch(() => {}).finally(() => { pulling = null; });
+  }
+  return pulling;
+}
+
+self.addEventListener('message', (event) => {
+  if (event.data && event.data.type === 'sync') event.waitUntil(syncChanges());
+});
+
+self.addEventListener('sync', (event) => {
+  if (event.tag === 'changes') event.waitUntil(syncChanges());
+});
+
+self.addEventListener('periodicsync', (event) => {
+  if (event.tag === 'changes') event.waitUntil(syncChanges());
+});
+
 function isNavigationRequest(request) {
   return request.mode === 'navigate' || (request.method === 'GET' && request.headers.get('accept')?.includes('text/html'));
 }
@@ -39,6 +145,9 @@ self.addEventListener('fetch', (event) => {
 
   const url = new URL(request.url);
 
+  // API responses are live data; offline copies live in IndexedDB instead
+  if (url.origin === self.location.origin && url.pathname.startsWith('/api/')) return;
+
   // Strategy: Network-first for navigations (HTML), cache-first for others
   if (isNavigationRequest(request)) {
     event.respondWith(
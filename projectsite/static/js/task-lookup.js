@@ -0,0 +1,70 @@
+// Typeahead for TaskLookupWidget: replaces the <select>'s options with the
+// tasks matching the search box, fetched a page at a time from tasks/lookup/.
+(function () {
+	function setup(search) {
+		var select = document.getElementById(search.getAttribute('data-for'));
+		if (!select) {
+			return;
+		}
+		var url = select.getAttribute('data-lookup-url');
+		var timer = null;
+		var next = null;
+
+		function option(value, text) {
+			var el = document.createElement('option');
+			el.value = value;
+			el.textContent = text;
+			return el;
+		}
+
+		function load(pageUrl, append) {
+			fetch(pageUrl, {headers: {'Accept': 'application/json'}})
+				.then(function (resp) { return resp.json(); })
+				.then(function (data) {
+					var selected = select.value;
+					if (!append) {
+						// Keep the current choice so an empty search doesn't lose it
+						var current = select.options[select.selectedIndex];
+						select.innerHTML = '';
+						select.appendChild(option('', '---------'));
+						if (current && current.value) {
+							select.appendChild(option(current.value, current.textContent));
+						}
+					} else {
+						var more = select.querySelector('option[data-more]');
+						if (more) {
+							more.remove();
+						}
+					}
+					data.results.forEach(function (task) {
+						if (String(task.id) !== selected) {
+							select.appendChild(option(task.id, task.text));
+						}
+					});
+					next = data.next;
+					if (next) {
+						var more = option('', 'More results...');
+						more.setAttribute('data-more', '1');
+						select.appendChild(more);
+					}
+					select.value = selected;
+				});
+		}
+
+		search.addEventListener('input', function () {
+			clearTimeout(timer);
+			timer = setTimeout(function () {
+				load(url + '?q=' + encodeURIComponent(search.value), false);
+			}, 250);
+		});
+		select.addEventListener('change', function () {
+			var chosen = select.options[select.selectedIndex];
+			if (chosen && chosen.hasAttribute('data-more') && next) {
+				select.value = '';
+				load(next, true);
+			}
+		});
+	}
+
+	document.querySelectorAll('.task-lookup-search').forEach(setup);
+})();